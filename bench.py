@@ -0,0 +1,322 @@
+import argparse, json, platform, random, sys, time, tracemalloc
+import life, patterns
+
+PATTERNS = {
+    'r-pentomino': ['.OO', 'OO.', '.O.'],
+    'acorn': ['.O.....', '...O...', 'OO..OOO'],
+    'glider-gun': [
+        '........................O',
+        '......................O.O',
+        '............OO......OO............OO',
+        '...........O...O....OO............OO',
+        'OO........O.....O...OO',
+        'OO........O...O.OO....O.O',
+        '..........O.....O.......O',
+        '...........O...O',
+        '............OO'
+    ]
+}
+INFINITE_ENGINES = ['list', 'sparse', 'bitboard', 'hashlife']
+TORUS_ENGINES = ['list', 'numpy']
+
+def soup(world, side, density, seed):
+    """
+    Randomly populates the 'side' x 'side' square with upper-left corner (0, 0)
+    of the Life object 'world', where each cell is alive with probability
+    'density', using a random generator with the given 'seed'.
+    """
+    world.random_fill(0, 0, side, side, density, seed)
+
+def workloads(quick=False):
+    """
+    Returns a list of the standard workloads, each one a tuple (n, w, s, e,
+    f, g), where n is the name of the workload, w and s the world type and
+    size, e the engine, f a function populating a fresh Life object, and g
+    the number of time steps to run. If 'quick' is True, the largest
+    workloads are left out. The 'list' engine, being much slower, runs fewer
+    time steps than the others, and a single one on tori larger than 256.
+    """
+    result = []
+    for engine in INFINITE_ENGINES:
+        generations = 20 if engine == 'list' else 200
+        for density in (0.2, 0.375, 0.5):
+            result.append((
+                f'soup-{density}/infinite/{engine}', 'infinite', None, engine,
+                lambda world, density=density: soup(world, 64, density, 1),
+                generations
+            ))
+        for name, rows in PATTERNS.items():
+            result.append((
+                f'{name}/infinite/{engine}', 'infinite', None, engine,
+                lambda world, rows=rows: [
+                    world.set_cell(x, y) for x, y in patterns.read_plaintext(rows)
+                ],
+                generations
+            ))
+    for size in ((64, 256) if quick else (64, 256, 1024, 2048)):
+        for engine in TORUS_ENGINES:
+            generations = 50
+            if engine == 'list':
+                generations = 5 if size <= 256 else 1
+            result.append((
+                f'torus-{size}/torus/{engine}', 'torus', size, engine,
+                lambda world, size=size: soup(world, size, 0.375, 1),
+                generations
+            ))
+    return result
+
+def microbenchmarks():
+    """
+    Returns a list of the benchmarks of single Life methods, each one an
+    ordered pair (n, f), where n is the name of the benchmark and f a function
+    running it from scratch.
+    """
+    def set_cells(engine, world_type='infinite', size=None):
+        world = life.Life(world_type, size, engine=engine)
+        generator = random.Random(1)
+        for i in range(10000):
+            world.set_cell(generator.randrange(256), generator.randrange(256))
+
+    def random_fill(engine, world_type='infinite', size=None):
+        world = life.Life(world_type, size, engine=engine)
+        world.random_fill(0, 0, 512, 512, 0.375, seed=1)
+
+    def get_neighbors(world_type, size):
+        world = life.Life(world_type, size)
+        for x in range(100):
+            for y in range(100):
+                world.get_neighbors(x, y)
+
+    result = [
+        (f'set_cell/infinite/{engine}', lambda engine=engine: set_cells(engine))
+        for engine in INFINITE_ENGINES
+    ]
+    result.extend(
+        (f'set_cell/torus/{engine}',
+         lambda engine=engine: set_cells(engine, 'torus', 256))
+        for engine in TORUS_ENGINES
+    )
+    result.extend(
+        (f'random_fill/infinite/{engine}',
+         lambda engine=engine: random_fill(engine))
+        for engine in INFINITE_ENGINES
+    )
+    result.extend(
+        (f'random_fill/torus/{engine}',
+         lambda engine=engine: random_fill(engine, 'torus', 512))
+        for engine in TORUS_ENGINES
+    )
+    result.append(('get_neighbors/infinite',
+                   lambda: get_neighbors('infinite', None)))
+    result.append(('get_neighbors/torus', lambda: get_neighbors('torus', 256)))
+    return result
+
+def render_benchmarks():
+    """
+    Returns a list of the benchmarks of the rendering of view.py, each one an
+    ordered pair (n, f) like those of microbenchmarks: building the pixels of
+    a frame in the 'image' and 'density' render modes (see view.image_pixels
+    and view.density_pixels) with every engine, which needs Tkinter but no
+    display, and loading a frame into a Tkinter image and drawing frames
+    with LifeWindow.draw in the default 'rectangles' render mode (the whole
+    view, and then only the cells changed by a time step), which are skipped
+    without a display.
+    """
+    colors = (b'\x00\x00\x00', b'\xff\xff\xff')
+    root = None
+    windows = []
+
+    def tk_root():
+        nonlocal root
+        import tkinter
+        if root is None:
+            try:
+                root = tkinter.Tk()
+            except tkinter.TclError as error:
+                raise RuntimeError('no display') from error
+            root.withdraw()
+        return root
+
+    def populated(engine, world_type='infinite', size=None):
+        world = life.Life(world_type, size, engine=engine)
+        world.random_fill(0, 0, 1024, 1024, 0.375, seed=1)
+        return world
+
+    def image(engine, world_type='infinite', size=None):
+        import view
+        world = populated(engine, world_type, size)
+        return lambda: view.image_pixels(world, 0, 0, 400, 2, *colors)
+
+    def density(engine):
+        import view
+        world = populated(engine)
+        return lambda: view.density_pixels(world, -512, -512, 4096, *colors)
+
+    def photo_image():
+        import tkinter, view
+        image = tkinter.PhotoImage(master=tk_root())
+        data = b'P6 800 800 255\n' + view.image_pixels(
+            populated('bitboard'), 0, 0, 400, 2, *colors
+        )
+
+        def load():
+            image.configure(data=data, format='PPM')
+            root.update_idletasks()
+        return load
+
+    def rectangles(changes):
+        import view
+        master = tk_root()
+        while windows:
+            windows.pop().destroy()
+        world = populated('bitboard')
+        window = view.LifeWindow(world, master=master)
+        windows.append(window)
+        window.zoom = 100
+        window.draw()
+        changed = world.step() if changes else None
+        if not changes:
+            window.view = None
+
+        def draw():
+            window.draw(changed)
+            master.update_idletasks()
+        return draw
+
+    result = [
+        (f'render/image/infinite/{engine}', lambda engine=engine: image(engine))
+        for engine in INFINITE_ENGINES
+    ]
+    result.extend(
+        (f'render/image/torus/{engine}',
+         lambda engine=engine: image(engine, 'torus', 1024))
+        for engine in TORUS_ENGINES
+    )
+    result.extend(
+        (f'render/density/infinite/{engine}',
+         lambda engine=engine: density(engine))
+        for engine in INFINITE_ENGINES
+    )
+    result.append(('render/photo_image', photo_image))
+    result.append(('render/rectangles/full', lambda: rectangles(False)))
+    result.append(('render/rectangles/changes', lambda: rectangles(True)))
+    return result
+
+def measure(function, repeat):
+    """
+    Runs 'function' (which takes no arguments and returns a function to time,
+    or None if everything it does is to be timed) 'repeat' times, and then
+    once more with tracemalloc on. Returns an ordered pair (s, m), where s is
+    the smallest number of seconds taken, and m the peak number of bytes
+    allocated.
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        timed = function()
+        if timed is not None:
+            start = time.perf_counter()
+            timed()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    timed = function()
+    tracemalloc.reset_peak()
+    if timed is not None:
+        timed()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (min(times), peak)
+
+def run(quick=False, repeat=3, select=None):
+    """
+    Runs every benchmark whose name contains the string 'select' (or every
+    benchmark, if 'select' is None) and returns a dictionary with the
+    results, ready to be saved as JSON.
+    """
+    results = {}
+
+    def record(name, function):
+        if select is not None and select not in name:
+            return
+        try:
+            seconds, peak = measure(function, repeat)
+        except (ImportError, RuntimeError) as error:
+            print(f'{name}: skipped ({error})', file=sys.stderr)
+            return
+        results[name] = {'seconds': seconds, 'peak_memory': peak}
+        print(f'{name}: {seconds:.6f} s, {peak / 1024:.1f} KiB', file=sys.stderr)
+
+    for name, world_type, size, engine, populate, generations in workloads(quick):
+        def prepare(world_type=world_type, size=size, engine=engine,
+                    populate=populate, generations=generations):
+            world = life.Life(world_type, size, engine=engine)
+            populate(world)
+            return lambda: world.step(generations)
+        record(name, prepare)
+    for name, function in microbenchmarks() + render_benchmarks():
+        record(name, function)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results
+    }
+
+def compare(current, baseline, threshold):
+    """
+    Given two dictionaries of results 'current' and 'baseline' (as returned
+    by 'run'), prints every benchmark whose time changed, and returns the list
+    of names of the benchmarks that got slower by more than the fraction
+    'threshold' of their baseline time.
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['seconds']
+        change = (result['seconds'] - old) / old if old else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name}: {old:.6f} s -> {result["seconds"]:.6f} s '
+              f'({change:+.1%}){flag}')
+    return regressions
+
+def main(argv=None):
+    """
+    Runs the benchmark suite as specified by the command line arguments
+    'argv' (by default, those the program was called with). Exits with
+    status 1 if a regression was found.
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the hot paths of the Life class and of '
+                    'the rendering of the GUI.'
+    )
+    parser.add_argument('-o', '--output', help='file to save the results in (JSON)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='results (JSON) to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown counted as a regression (default: 0.1)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timed runs of each benchmark')
+    parser.add_argument('--quick', action='store_true',
+                        help='leave out the largest workloads')
+    parser.add_argument('-k', '--select',
+                        help='only run benchmarks whose name contains this')
+    args = parser.parse_args(argv)
+
+    current = run(args.quick, args.repeat, args.select)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) above {args.threshold:.0%}')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
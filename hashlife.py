@@ -0,0 +1,583 @@
+from life import CONWAY_TABLE
+
+class Node:
+    """
+    A node of the HashLife quadtree, representing a square block of cells
+    with side 2 ** 'level'.
+
+    A node of level 0 is a single cell. A node of any higher level is made
+    of four nodes of the level below it: 'nw', 'ne', 'sw' and 'se', where
+    'west' and 'east' refer to smaller and larger x coordinates, and 'north'
+    and 'south' to smaller and larger y coordinates.
+
+    Nodes are never modified once created, and the HashLife class makes sure
+    that there is only ever a single node for each block of cells -- so two
+    nodes represent the same block of cells exactly if they are the same
+    object.
+    """
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population')
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.level = level
+        self.population = population
+
+# SPREAD[b] is the mask (see HashLife.block) of the 8x8 block whose first
+# column holds the 8 cells given by the bits of the byte b.
+SPREAD = [sum(1 << (8 * k) for k in range(8) if (byte >> k) & 1)
+          for byte in range(256)]
+
+def row_blocks(x_coord, y_coord, rows, blocks):
+    """
+    Given a list of 'int's 'rows', where bit j of rows[i] is the cell
+    ('x_coord' + i, 'y_coord' + j), adds the alive cells of the rows to the
+    dictionary 'blocks' of 8x8 block masks (see HashLife.build_blocks), and
+    returns it.
+
+    The rows are cut into bytes, each of which is spread into a column of a
+    block with the SPREAD table.
+    """
+    shift, y_index = y_coord & 7, y_coord >> 3
+    for x, row in enumerate(rows, x_coord):
+        row <<= shift
+        x_index, column = x >> 3, x & 7
+        k = 0
+        while row:
+            byte = row & 255
+            if byte:
+                key = (x_index, y_index + k)
+                blocks[key] = blocks.get(key, 0) | SPREAD[byte] << column
+            row >>= 8
+            k += 1
+    return blocks
+
+def column_blocks(x_coord, y_coord, columns, blocks):
+    """
+    Given a list of 'int's 'columns', where bit i of columns[j] is the cell
+    ('x_coord' + i, 'y_coord' + j), adds the alive cells of the columns to the
+    dictionary 'blocks' of 8x8 block masks (see HashLife.build_blocks), and
+    returns it.
+
+    Since each byte of a column is a row of a block, as it is, no spreading
+    is needed (unlike with row_blocks).
+    """
+    shift, x_index = x_coord & 7, x_coord >> 3
+    for y, column in enumerate(columns, y_coord):
+        column <<= shift
+        y_index, row = y >> 3, 8 * (y & 7)
+        for k, byte in enumerate(column.to_bytes((column.bit_length() + 7) >> 3,
+                                                 'little')):
+            if byte:
+                key = (x_index + k, y_index)
+                blocks[key] = blocks.get(key, 0) | byte << row
+    return blocks
+
+DEAD = Node(None, None, None, None, 0, 0)
+ALIVE = Node(None, None, None, None, 0, 1)
+
+class HashLife:
+    """
+    An infinite grid stored as a HashLife quadtree, whose root is always
+    centered around the cell (0, 0): a root of level k covers the cells with
+    both coordinates in the range [-2 ** (k - 1), 2 ** (k - 1)).
+
+    The results of advancing nodes through time are memoized, which lets
+    patterns with a lot of repeated structure be advanced by huge numbers of
+    generations at once.
+    """
+    def __init__(self, cache_limit=1000000, table=CONWAY_TABLE):
+        """
+        Initializes an empty grid. The 'cache_limit' argument is the number of
+        nodes and memoized results past which 'trim' throws away everything
+        not needed to represent the current grid (and the blocks being
+        advanced, in the middle of a jump). The 'table' argument is the
+        transition table of the rule used (see life.rule_table); by default,
+        that of Conway's Game of Life.
+        """
+        self.cache_limit = cache_limit
+        self.table = table
+        self.cache = {}
+        self.results = {}
+        self.working = []
+        self.trim_at = cache_limit
+        self.empty_nodes = [DEAD]
+        self.pair_nodes = self.pairs()
+        self.root = self.empty(3)
+
+    @property
+    def population(self):
+        return self.root.population
+
+    def copy(self):
+        """
+        Returns a HashLife object representing the same grid. Since nodes are
+        never modified, both objects can share the same nodes and caches.
+        """
+        new_tree = HashLife.__new__(HashLife)
+        new_tree.__dict__.update(self.__dict__)
+        return new_tree
+
+    def join(self, nw, ne, sw, se):
+        """
+        Given four nodes 'nw', 'ne', 'sw' and 'se' of the same level, returns
+        the (unique) node of the level above whose children are those nodes.
+        """
+        key = (nw, ne, sw, se)
+        node = self.cache.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1,
+                        nw.population + ne.population
+                        + sw.population + se.population)
+            self.cache[key] = node
+        return node
+
+    def empty(self, level):
+        """
+        Returns the node of the given 'int' level without any alive cells.
+        """
+        while len(self.empty_nodes) <= level:
+            child = self.empty_nodes[-1]
+            self.empty_nodes.append(self.join(child, child, child, child))
+        return self.empty_nodes[level]
+
+    def pairs(self):
+        """
+        Returns the list of the 16 nodes of level 1 (2x2 blocks), where the
+        node at index i has its 'nw', 'ne', 'sw' and 'se' cells alive exactly
+        if bit 0, 1, 2 or 3 of i (respectively) is 1.
+        """
+        return [self.join(*(ALIVE if (index >> bit) & 1 else DEAD
+                            for bit in range(4)))
+                for index in range(16)]
+
+    def centre(self, node):
+        """
+        Returns a node one level above the given 'node', with the given node
+        in its center and empty space around it.
+        """
+        empty = self.empty(node.level - 1)
+        return self.join(
+            self.join(empty, empty, empty, node.nw),
+            self.join(empty, empty, node.ne, empty),
+            self.join(empty, node.sw, empty, empty),
+            self.join(node.se, empty, empty, empty)
+        )
+
+    def is_padded(self, node):
+        """
+        Returns True if all the alive cells of the given 'node' (of level k at
+        least 3) are within its central square of a quarter of its side, made
+        of its four innermost nodes of level k - 3.
+        """
+        return (node.nw.se.se.population + node.ne.sw.sw.population
+                + node.sw.ne.ne.population + node.se.nw.nw.population
+                == node.population)
+
+    def base_step(self, node):
+        """
+        Given a 'node' of level 2 (a 4x4 block), returns the node of level 1
+        representing its central 2x2 block after a single time step.
+        """
+        cells = [
+            [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+            [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+            [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+            [node.sw.sw, node.sw.se, node.se.sw, node.se.se]
+        ]
+        new_cells = []
+        for y in (1, 2):
+            for x in (1, 2):
+                block_sum = sum(
+                    cells[y + j][x + i].population
+                    for i in (-1, 0, 1) for j in (-1, 0, 1)
+                )
+                alive = self.table[block_sum + 8 * cells[y][x].population]
+                new_cells.append(ALIVE if alive else DEAD)
+        return self.join(*new_cells)
+
+    def successor(self, node, step_log):
+        """
+        Given a 'node' of level k >= 2 and an 'int' 'step_log' between 0 and
+        k - 2, returns the node of level k - 1 representing the central block
+        of the given node after 2 ** 'step_log' time steps.
+
+        The node and the blocks computed so far are kept on the 'working'
+        stack until the result is known, so that 'trim' can be called at any
+        point of the recursion (whenever the caches grow past the 'trim_at'
+        attribute) without throwing them away.
+        """
+        if node.population == 0:
+            return node.nw
+        key = (node, step_log)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+        if node.level == 2:
+            result = self.base_step(node)
+        else:
+            join = self.join
+            working = self.working
+            start = len(working)
+            working.append(node)
+            if len(self.cache) + len(self.results) > self.trim_at:
+                self.trim()
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # The nine overlapping blocks of level k - 1 covering the node,
+            # each one advanced by 2 ** 'step_log' time steps if it is the
+            # whole jump, or by half of it otherwise.
+            half = step_log if step_log < node.level - 2 else step_log - 1
+            for quads in (
+                (nw.nw, nw.ne, nw.sw, nw.se),
+                (nw.ne, ne.nw, nw.se, ne.sw),
+                (ne.nw, ne.ne, ne.sw, ne.se),
+                (nw.sw, nw.se, sw.nw, sw.ne),
+                (nw.se, ne.sw, sw.ne, se.nw),
+                (ne.sw, ne.se, se.nw, se.ne),
+                (sw.nw, sw.ne, sw.sw, sw.se),
+                (sw.ne, se.nw, sw.se, se.sw),
+                (se.nw, se.ne, se.sw, se.se)
+            ):
+                working.append(self.successor(join(*quads), half))
+            c = working[start + 1:]
+            if step_log < node.level - 2:
+                result = join(
+                    join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                    join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                    join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                    join(c[4].se, c[5].sw, c[7].ne, c[8].nw)
+                )
+            else:
+                for quads in ((0, 1, 3, 4), (1, 2, 4, 5),
+                              (3, 4, 6, 7), (4, 5, 7, 8)):
+                    working.append(self.successor(
+                        join(*(c[i] for i in quads)), half
+                    ))
+                result = join(*working[-4:])
+            del working[start:]
+        self.results[key] = result
+        return result
+
+    def advance(self, generations):
+        """
+        Updates the grid by an 'int' number of 'generations', jumping over
+        2 ** j generations at once for every bit j set in 'generations'.
+        """
+        step_log = 0
+        while generations > 0:
+            if generations & 1:
+                # With the alive cells within the central quarter of a root of
+                # level at least 'step_log' + 3, they cannot leave the central
+                # half (which is what 'successor' returns) in the meantime.
+                while (self.root.level < step_log + 3
+                       or not self.is_padded(self.root)):
+                    self.root = self.centre(self.root)
+                self.root = self.successor(self.root, step_log)
+                self.collect()
+            generations >>= 1
+            step_log += 1
+
+    def collect(self):
+        """
+        Calls 'trim' if the number of cached nodes and memoized results has
+        grown past the 'trim_at' attribute (see trim).
+        """
+        if len(self.cache) + len(self.results) > self.trim_at:
+            self.trim()
+
+    def trim(self):
+        """
+        Throws away all the cached nodes and memoized results, except for the
+        nodes making up the current grid, the nodes on the 'working' stack
+        (see successor) and the empty nodes, along with the memoized results
+        linking two of the nodes kept. Since the nodes kept are the very same
+        objects, there is still only a single node for each block of cells.
+
+        The caches are trimmed again once they grow past the 'trim_at'
+        attribute: 'cache_limit', unless the nodes kept take more than half
+        of it, in which case twice their number, so that a grid too large for
+        the limit is not trimmed over and over again.
+        """
+        kept = set()
+        stack = [self.root, *self.working, *self.empty_nodes, *self.pair_nodes]
+        while stack:
+            node = stack.pop()
+            if node.level > 0 and node not in kept:
+                kept.add(node)
+                stack += (node.nw, node.ne, node.sw, node.se)
+        self.cache = {key: node for key, node in self.cache.items()
+                      if node in kept}
+        self.results = {key: result for key, result in self.results.items()
+                        if key[0] in kept and result in kept}
+        self.trim_at = max(self.cache_limit,
+                           2 * (len(self.cache) + len(self.results)))
+
+    def contains(self, x_coord, y_coord):
+        """
+        Returns True if the cell with 'int' coordinates ('x_coord', 'y_coord')
+        is covered by the current root.
+        """
+        half = 1 << (self.root.level - 1)
+        return -half <= x_coord < half and -half <= y_coord < half
+
+    def get_cell(self, x_coord, y_coord):
+        """
+        Given the 'int' coordinates ('x_coord', 'y_coord') of a cell, returns
+        1 if the cell is alive, and 0 if it is dead.
+        """
+        if not self.contains(x_coord, y_coord):
+            return 0
+        node = self.root
+        half = 1 << (node.level - 1)
+        x, y = x_coord + half, y_coord + half
+        while node.level > 0 and node.population:
+            half = 1 << (node.level - 1)
+            if y < half:
+                node = node.nw if x < half else node.ne
+            else:
+                node = node.sw if x < half else node.se
+            x, y = x % half, y % half
+        return node.population
+
+    def set_cell(self, x_coord, y_coord, alive=True):
+        """
+        Given the 'int' coordinates ('x_coord', 'y_coord') of a cell, sets the
+        cell if 'alive' is True and clears it otherwise.
+        """
+        while not self.contains(x_coord, y_coord):
+            self.root = self.centre(self.root)
+        half = 1 << (self.root.level - 1)
+        leaf = ALIVE if alive else DEAD
+
+        def replace(node, x, y):
+            if node.level == 0:
+                return leaf
+            half = 1 << (node.level - 1)
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            if y < half:
+                if x < half:
+                    nw = replace(nw, x, y)
+                else:
+                    ne = replace(ne, x - half, y)
+            else:
+                if x < half:
+                    sw = replace(sw, x, y - half)
+                else:
+                    se = replace(se, x - half, y - half)
+            return self.join(nw, ne, sw, se)
+
+        self.root = replace(self.root, x_coord + half, y_coord + half)
+
+    def union(self, first, second):
+        """
+        Given two nodes 'first' and 'second' of the same level, returns the
+        node whose alive cells are those alive in either of them.
+        """
+        if first.population == 0 or first is second:
+            return second
+        if second.population == 0:
+            return first
+        if first.level == 0:
+            return ALIVE
+        return self.join(self.union(first.nw, second.nw),
+                         self.union(first.ne, second.ne),
+                         self.union(first.sw, second.sw),
+                         self.union(first.se, second.se))
+
+    def block(self, mask):
+        """
+        Given an 'int' 'mask' representing an 8x8 block of cells, where bit
+        8 * y + x is the cell (x, y), returns the node of level 3 representing
+        that block, built by joining its 2x2 blocks (looked up in the
+        'pair_nodes' list) and then its 4x4 blocks.
+        """
+        pair_nodes = self.pair_nodes
+        pairs = [pair_nodes[(mask >> i) & 3 | (mask >> (i + 6)) & 12]
+                 for i in (0, 2, 4, 6, 16, 18, 20, 22,
+                           32, 34, 36, 38, 48, 50, 52, 54)]
+        quads = [self.join(pairs[i], pairs[i + 1], pairs[i + 4], pairs[i + 5])
+                 for i in (0, 2, 8, 10)]
+        return self.join(*quads)
+
+    def build(self, cells):
+        """
+        Given an iterable 'cells' of 'int' cell coordinates (as ordered pairs),
+        returns a node centered around the cell (0, 0), like the root, whose
+        alive cells are exactly those cells.
+
+        The tree is built from the bottom up: the cells are first gathered into
+        8x8 blocks, and then every level is made by joining the nodes of the
+        level below in groups of four, until the whole pattern fits in four
+        nodes around the cell (0, 0).
+        """
+        blocks = {}
+        for x_coord, y_coord in cells:
+            key = (x_coord >> 3, y_coord >> 3)
+            blocks[key] = blocks.get(key, 0) | 1 << (8 * (y_coord & 7) + (x_coord & 7))
+        return self.build_blocks(blocks)
+
+    def build_blocks(self, blocks):
+        """
+        Given a dictionary 'blocks' mapping the ordered pair (x, y) to the
+        'int' mask (see 'block') of the 8x8 block of cells whose upper-left
+        cell is (8 * x, 8 * y), returns a node centered around the cell (0, 0),
+        like the root, whose alive cells are exactly those of the blocks.
+        """
+        leaves = {}
+        nodes = {}
+        for key, mask in blocks.items():
+            if mask not in leaves:
+                leaves[mask] = self.block(mask)
+            nodes[key] = leaves[mask]
+        level = 3
+        while any(x not in (-1, 0) or y not in (-1, 0) for x, y in nodes):
+            parents = {}
+            for x, y in nodes:
+                parents.setdefault((x >> 1, y >> 1), None)
+            empty = self.empty(level)
+            nodes = {
+                (x, y): self.join(
+                    nodes.get((2 * x, 2 * y), empty),
+                    nodes.get((2 * x + 1, 2 * y), empty),
+                    nodes.get((2 * x, 2 * y + 1), empty),
+                    nodes.get((2 * x + 1, 2 * y + 1), empty)
+                ) for x, y in parents
+            }
+            level += 1
+        empty = self.empty(level)
+        return self.join(nodes.get((-1, -1), empty), nodes.get((0, -1), empty),
+                         nodes.get((-1, 0), empty), nodes.get((0, 0), empty))
+
+    def set_cells(self, cells):
+        """
+        Given an iterable 'cells' of 'int' cell coordinates (as ordered pairs),
+        sets all of those cells at once.
+        """
+        self.set_root(self.build(cells))
+
+    def set_region(self, x_coord, y_coord, height, rows):
+        """
+        Given a list of 'int's 'rows', sets the cells of the rectangle with
+        upper-left cell ('x_coord', 'y_coord'), as wide as the number of rows
+        and 'height' cells high, so that the cell ('x_coord' + i, 'y_coord' +
+        j) is alive exactly if bit j of rows[i] is 1. The tree is built from
+        8x8 blocks (see row_blocks), without ever listing the alive cells.
+        """
+        self.clear_region(x_coord, y_coord, len(rows), height)
+        blocks = row_blocks(x_coord, y_coord, rows, {})
+        if blocks:
+            self.set_root(self.build_blocks(blocks))
+
+    def set_root(self, node):
+        """
+        Given a 'node' centered around the cell (0, 0), like the root, sets
+        all of its alive cells in the grid.
+        """
+        while node.level < self.root.level:
+            node = self.centre(node)
+        while self.root.level < node.level:
+            self.root = self.centre(self.root)
+        self.root = self.union(self.root, node)
+
+    def clear_region(self, x_coord, y_coord, width, height):
+        """
+        Clears all the cells in the 'width' x 'height' rectangle whose
+        upper-left cell is ('x_coord', 'y_coord'). Nodes entirely inside the
+        rectangle are replaced by empty nodes, and nodes entirely outside of it
+        are kept as they are, so only the nodes along its border are rebuilt.
+        """
+        x_end, y_end = x_coord + width, y_coord + height
+
+        def clear(node, x, y):
+            side = 1 << node.level
+            if (node.population == 0 or x >= x_end or y >= y_end
+                    or x + side <= x_coord or y + side <= y_coord):
+                return node
+            if (x_coord <= x and x + side <= x_end
+                    and y_coord <= y and y + side <= y_end):
+                return self.empty(node.level)
+            half = side >> 1
+            return self.join(clear(node.nw, x, y),
+                             clear(node.ne, x + half, y),
+                             clear(node.sw, x, y + half),
+                             clear(node.se, x + half, y + half))
+
+        half = 1 << (self.root.level - 1)
+        self.root = clear(self.root, -half, -half)
+
+    def live_cells(self, region=None):
+        """
+        Yields the coordinates (as ordered pairs of 'int's) of all the alive
+        cells in the grid, skipping over empty blocks. If a 'region' (x, y, w,
+        h) is given, only the cells in the w x h rectangle whose upper-left
+        cell is (x, y) are yielded, skipping over the blocks outside of it.
+        """
+        if region is not None:
+            x_start, y_start, width, height = region
+            x_end, y_end = x_start + width, y_start + height
+        half = 1 << (self.root.level - 1)
+        stack = [(self.root, -half, -half)]
+        while stack:
+            node, x, y = stack.pop()
+            if node.population == 0:
+                continue
+            if region is not None:
+                side = 1 << node.level
+                if (x >= x_end or y >= y_end
+                        or x + side <= x_start or y + side <= y_start):
+                    continue
+            if node.level == 0:
+                yield (x, y)
+                continue
+            half = 1 << (node.level - 1)
+            stack.append((node.se, x + half, y + half))
+            stack.append((node.sw, x, y + half))
+            stack.append((node.ne, x + half, y))
+            stack.append((node.nw, x, y))
+
+    def density(self, x_coord, y_coord, width, height, block):
+        """
+        Returns the number of alive cells in each block of a 'width' x
+        'height' grid of 'block' x 'block' squares of cells, whose upper-left
+        cell is ('x_coord', 'y_coord'), as a list of 'width' lists of 'height'
+        'int's (see Life.density).
+
+        The population of every node is already known, so nodes entirely
+        inside a single block are added as a whole, and nodes outside of the
+        grid or without alive cells are skipped: the number of nodes looked
+        at grows with the number of blocks, not with the number of cells. If
+        'block' is a power of two and the coordinates are multiples of it,
+        every block is a single node, and the nodes made of four blocks add
+        up the populations of their children without going down to them.
+        """
+        counts = [height * [0] for i in range(width)]
+        x_end, y_end = x_coord + width * block, y_coord + height * block
+        half = 1 << (self.root.level - 1)
+        stack = [(self.root, -half, -half)]
+        while stack:
+            node, x, y = stack.pop()
+            side = 1 << node.level
+            if (node.population == 0 or x >= x_end or y >= y_end
+                    or x + side <= x_coord or y + side <= y_coord):
+                continue
+            i = (x - x_coord) // block
+            j = (y - y_coord) // block
+            if (x >= x_coord and y >= y_coord
+                    and (x + side - 1 - x_coord) // block == i
+                    and (y + side - 1 - y_coord) // block == j):
+                counts[i][j] += node.population
+                continue
+            half = side >> 1
+            if (half == block and x >= x_coord and y >= y_coord
+                    and x + side <= x_end and y + side <= y_end
+                    and (x - x_coord) % block == (y - y_coord) % block == 0):
+                # Each of the four children is a whole block.
+                counts[i][j] += node.nw.population
+                counts[i + 1][j] += node.ne.population
+                counts[i][j + 1] += node.sw.population
+                counts[i + 1][j + 1] += node.se.population
+                continue
+            stack.append((node.se, x + half, y + half))
+            stack.append((node.sw, x, y + half))
+            stack.append((node.ne, x + half, y))
+            stack.append((node.nw, x, y))
+        return counts
@@ -0,0 +1,169 @@
+import argparse, os, time
+import life
+
+def run(world, generations, snapshot_every=None, snapshot_dir=None,
+        on_cycle=None):
+    """
+    Given a Life object 'world', updates it by an 'int' number of
+    'generations'. If 'snapshot_every' is a positive 'int', the world is also
+    saved into the directory 'snapshot_dir' every 'snapshot_every' time steps,
+    as an RLE pattern file named after the current time.
+
+    If 'on_cycle' is 'stop' or 'skip' and cycles are being detected (see
+    Life.detect_cycles), then as soon as the world is found to be in a cycle,
+    the run either stops, or skips over as many whole cycles as fit in the
+    remaining time steps with Life.fast_forward (and computes the time steps
+    left over). Until then, the world is updated one time step at a time,
+    whatever the engine, so that the smallest period is found.
+
+    Returns an ordered pair (s, c), where s is the number of seconds spent
+    updating the world (not counting snapshots), and c is the number of alive
+    cells processed, i.e. the sum of the population over every time step.
+    """
+    seconds = 0.0
+    cells = 0
+    interval = snapshot_every or generations
+    if snapshot_every:
+        import patterns
+    while generations > 0:
+        jump = min(interval, generations)
+        start = time.perf_counter()
+        if world.engine == 'hashlife' and not on_cycle:
+            world.step(jump)
+            cells += jump * world.population
+            done = jump
+        else:
+            done = 0
+            while done < jump and not (on_cycle and world.cycle):
+                world.step()
+                cells += world.population
+                done += 1
+        if on_cycle and world.cycle:
+            if on_cycle == 'stop':
+                generations = done
+            else:
+                skipped = world.fast_forward(generations - done)
+                cells += skipped * world.population
+                done += skipped
+                # Fewer time steps than a period are left, so they cannot be
+                # skipped and are computed instead.
+                while done < generations:
+                    world.step()
+                    cells += world.population
+                    done += 1
+        seconds += time.perf_counter() - start
+        generations -= done
+        if snapshot_every:
+            patterns.save(
+                world, os.path.join(snapshot_dir, f'gen{world.time:09d}.rle')
+            )
+    return (seconds, cells)
+
+def main(argv=None):
+    """
+    Runs a simulation without any GUI, as specified by the command line
+    arguments 'argv' (by default, those the program was called with), and
+    prints how fast it ran.
+    """
+    parser = argparse.ArgumentParser(
+        description="Runs Conway's Game of Life without a GUI."
+    )
+    parser.add_argument('pattern', nargs='?',
+                        help='pattern file (.cells, .rle or .mc) to start from')
+    parser.add_argument('-n', '--generations', type=int, required=True,
+                        help='number of time steps to run')
+    parser.add_argument('--world', choices=['infinite', 'torus'],
+                        default='infinite', help='world type')
+    parser.add_argument('--size', type=int, default=32,
+                        help='size of the torus (default: 32)')
+    parser.add_argument('--engine',
+                        choices=['list', 'numpy', 'sparse', 'hashlife', 'bitboard'],
+                        help='engine used to update the world (default: list, '
+                             'or the engine of the resumed snapshot)')
+    parser.add_argument('--rule',
+                        help="rule string, such as 'B36/S23' (default: B3/S23, "
+                             'or the rule of the resumed snapshot)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of parallel workers (numpy/bitboard)')
+    parser.add_argument('--random', type=int, metavar='SIDE',
+                        help='randomly populate a SIDE x SIDE square instead')
+    parser.add_argument('--density', type=float, default=0.375,
+                        help='density of the random square (default: 0.375)')
+    parser.add_argument('--seed', type=int, help='seed of the random square')
+    parser.add_argument('-o', '--output', help='file to save the final state in')
+    parser.add_argument('--snapshot-every', type=int, metavar='N',
+                        help='save the state every N time steps')
+    parser.add_argument('--snapshot-dir', default='.',
+                        help='directory to save the snapshots in')
+    parser.add_argument('--resume', metavar='SNAPSHOT',
+                        help='snapshot file to resume the run from')
+    parser.add_argument('--checkpoint', metavar='SNAPSHOT',
+                        help='snapshot file to save checkpoints in')
+    parser.add_argument('--checkpoint-every', type=int, default=1000,
+                        metavar='N',
+                        help='save a checkpoint every N time steps '
+                             '(default: 1000)')
+    parser.add_argument('--on-cycle', choices=['stop', 'skip'],
+                        help='detect cycles (still lifes, oscillators and '
+                             'spaceships), and then stop, or skip whole cycles')
+    parser.add_argument('--history', type=int, default=1024, metavar='N',
+                        help='number of past states searched for cycles '
+                             '(default: 1024)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='record per-step timings and counters, and save '
+                             'them in FILE (.csv or .json)')
+    args = parser.parse_args(argv)
+
+    # The other modules are only imported when they are needed, so that
+    # short runs start quickly.
+    options = {'workers': args.workers}
+    if args.rule:
+        options['rule'] = args.rule
+    if args.resume:
+        import snapshot
+        world = snapshot.load(args.resume, args.engine, **options)
+    else:
+        world = life.Life(world_type=args.world,
+                          size=args.size if args.world == 'torus' else None,
+                          engine=args.engine or 'list', **options)
+    if args.checkpoint:
+        world.checkpoint_path = args.checkpoint
+        world.checkpoint_every = args.checkpoint_every
+    if args.pattern or args.output:
+        import patterns
+    if args.pattern:
+        patterns.load(world, args.pattern)
+    if args.random:
+        world.random_fill(0, 0, args.random, args.random, args.density,
+                          args.seed)
+    if args.snapshot_every:
+        os.makedirs(args.snapshot_dir, exist_ok=True)
+    if args.on_cycle:
+        world.detect_cycles(args.history)
+    if args.profile:
+        import profiler
+        world.profiler = profiler.Profiler(history=args.generations)
+
+    start_time = world.time
+    seconds, cells = run(world, args.generations,
+                         args.snapshot_every, args.snapshot_dir, args.on_cycle)
+    world.close()
+    if args.output:
+        patterns.save(world, args.output)
+    generations = world.time - start_time
+    print(f'generations: {generations}')
+    print(f'population: {world.population}')
+    if world.cycle is not None:
+        period, x_offset, y_offset = world.cycle
+        print(f'cycle: period {period}, offset ({x_offset}, {y_offset})')
+    print(f'seconds: {seconds:.3f}')
+    if seconds > 0:
+        print(f'generations/sec: {generations / seconds:.1f}')
+        print(f'cells/sec: {cells / seconds:.1f}')
+    if args.profile:
+        world.profiler.save(args.profile)
+        for line in world.profiler.report():
+            print(f'profile: {line}')
+
+if __name__ == '__main__':
+    main()
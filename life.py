@@ -1,3 +1,6 @@
+import time
+from itertools import compress, repeat
+
 def conway(cell_value, neighbor_sum):
     """
     Using the standard rules of Conway's Game of Life, determines the state
@@ -18,6 +21,314 @@ def conway(cell_value, neighbor_sum):
     else:
         return False
 
+CONWAY_RULE = (1 << 3, 1 << 2 | 1 << 3)
+
+def parse_rule(rule):
+    """
+    Given an outer-totalistic 'rule' string, returns an ordered pair (b, s)
+    of 'int' masks, where bit n of b is 1 if a dead cell with n alive
+    neighbors becomes alive, and bit n of s is 1 if an alive cell with n
+    alive neighbors stays alive.
+
+    The rule can be written as 'B3/S23' (also 'b3/s23', 'B3S23' or
+    'S23/B3'), or in the older form '23/3', where the survival counts come
+    first. Raises a ValueError if the string is not a valid rule, or if its
+    counts are not between 0 and 8.
+    """
+    if rule == 'B3/S23':
+        # The default rule is parsed without importing the 're' module,
+        # which is most of the time taken to import this module otherwise.
+        return CONWAY_RULE
+    import re
+    match = re.fullmatch(
+        r'\s*(?:[Bb](\d*)/?[Ss](\d*)|[Ss](\d*)/?[Bb](\d*)|(\d*)/(\d*))\s*',
+        rule
+    )
+    if match is None:
+        raise ValueError(f'invalid rule: {rule!r}')
+    if match[1] is not None:
+        birth, survival = match[1], match[2]
+    elif match[3] is not None:
+        birth, survival = match[4], match[3]
+    else:
+        birth, survival = match[6], match[5]
+    if '9' in birth + survival:
+        raise ValueError(f'invalid rule: {rule!r}')
+    return (sum(1 << int(n) for n in set(birth)),
+            sum(1 << int(n) for n in set(survival)))
+
+def rule_string(birth, survival):
+    """
+    Given the masks 'birth' and 'survival' of a rule (see parse_rule), returns
+    the rule as a string in the 'B3/S23' form.
+    """
+    return ('B' + ''.join(str(n) for n in range(9) if (birth >> n) & 1)
+            + '/S' + ''.join(str(n) for n in range(9) if (survival >> n) & 1))
+
+def rule_table(birth, survival):
+    """
+    Given the masks 'birth' and 'survival' of a rule (see parse_rule), returns
+    its transition table: a bytes object where the byte at index
+    9 * v + n is the state of a cell in the next time step (1 = 'alive',
+    0 = 'dead'), given its current state v and its number n of alive
+    neighbors.
+    """
+    return bytes([(birth >> n) & 1 for n in range(9)]
+                 + [(survival >> n) & 1 for n in range(9)])
+
+CONWAY_TABLE = rule_table(*CONWAY_RULE)
+
+def step_bits(board, width, rule=CONWAY_RULE):
+    """
+    Given an 'int' 'board' whose bits represent a grid of cells with rows of
+    'width' bits each (bit 'width' * x + y is the cell in row x and column y),
+    returns an 'int' representing the grid after a single time step, using the
+    'rule' given by its masks (see parse_rule) -- by default, the rules of
+    Conway's Game of Life.
+
+    All the cells are updated at once using bitwise full adders. The cells on
+    the border of the grid are missing neighbors, so their new values are
+    meaningless and should be ignored by the caller.
+    """
+    left, right = board << 1, board >> 1
+    # Number of alive cells among each cell and its two horizontal neighbors,
+    # as the bits 'low' + 2 * 'high'.
+    low = left ^ board ^ right
+    high = (left & board) | (left & right) | (board & right)
+    up_low, up_high = low << width, high << width
+    down_low, down_high = low >> width, high >> width
+    # Adding the three rows gives the alive cells in the 3x3 block around each
+    # cell as 'total' + 2 * ('ones' + 2 * 'twos' + 'carry').
+    total = up_low ^ low ^ down_low
+    carry = (up_low & low) | (up_low & down_low) | (low & down_low)
+    ones = up_high ^ high ^ down_high
+    twos = (up_high & high) | (up_high & down_high) | (high & down_high)
+    odd, even_carry = ones ^ carry, ones & carry
+    if rule == CONWAY_RULE:
+        # A cell is alive in the next step if the block has 3 alive cells, or
+        # if it has 4 and the cell itself is alive.
+        three = total & odd & ~twos & ~even_carry
+        four = ~total & ~odd & (twos ^ even_carry) & board
+        return three | four
+    # The number of alive cells in the block, bit by bit. A dead cell is born
+    # if the block has n alive cells for some birth count n, and an alive cell
+    # survives if it has n + 1 for some survival count n.
+    planes = (total, odd, twos ^ even_carry, twos & even_carry)
+    birth, survival = rule
+    survival <<= 1
+    born = stays = 0
+    for count in range(10):
+        if not ((birth | survival) >> count) & 1:
+            continue
+        equal = -1
+        for bit, plane in enumerate(planes):
+            equal &= plane if (count >> bit) & 1 else ~plane
+        if (birth >> count) & 1:
+            born |= equal
+        if (survival >> count) & 1:
+            stays |= equal
+    return (~board & born) | (board & stays)
+
+def step_chunks(chunks, halo, rule=CONWAY_RULE, back=None, tiles=None,
+                track=False):
+    """
+    Given a dictionary 'chunks' of chunks stored with the 'bitboard' engine
+    (see Life.add_chunk), computes every one of them after a single time step
+    using the given 'rule', looking up the neighboring chunks missing from
+    'chunks' in the dictionary 'halo' (chunks missing from both are empty).
+
+    For every chunk, the rows of the chunk are packed into a single 'int'
+    together with a border of one cell taken from the neighboring chunks,
+    which is then updated all at once by step_bits and unpacked into the
+    chunk with the same key in the dictionary 'back' (added to it if needed).
+    Returns a tuple (b, t, n, e, d), where b is 'back', t is 'tiles', a
+    dictionary to which the tile counts of every new chunk are written (see
+    block_counts), n is the total population, e is the set of keys of the
+    chunks next to alive cells on the border of a new chunk, and d is the
+    set of coordinates of the cells that changed if 'track' is True, or None
+    otherwise. If 'back' or 'tiles' is None, a new dictionary is used.
+
+    This is all the work of a time step but swapping the chunks, so that the
+    workers of a parallel step (see Life.bitboard_step) can each be given a
+    band of chunks along with its halo, and send back only the new chunks.
+    """
+    size, tile = Life.chunk_size, Life.tile_size
+    width = size + 2
+    mask = (1 << size) - 1
+    empty = size * [0]
+    back = {} if back is None else back
+    tiles = {} if tiles is None else tiles
+    # The cells of each tile of a new chunk, in the packed 'int'.
+    tile_masks = [
+        sum(((1 << tile) - 1) << (width * (x + 1) + 1 + tile * c)
+            for x in range(tile * a, tile * (a + 1)))
+        for a in range(size // tile) for c in range(size // tile)
+    ]
+    no_tiles = bytes(len(tile_masks))
+    population = 0
+    border_chunks = set()
+    changes = set() if track else None
+    for (x_index, y_index), rows in chunks.items():
+        board = 0
+        shift = 0
+        for x, row_range in ((-1, (size - 1,)), (0, range(size)), (1, (0,))):
+            left = (chunks.get((x_index + x, y_index - 1))
+                    or halo.get((x_index + x, y_index - 1), empty))
+            middle = (chunks.get((x_index + x, y_index))
+                      or halo.get((x_index + x, y_index), empty))
+            right = (chunks.get((x_index + x, y_index + 1))
+                     or halo.get((x_index + x, y_index + 1), empty))
+            for r in row_range:
+                board |= ((left[r] >> (size - 1)) | (middle[r] << 1)
+                          | ((right[r] & 1) << (size + 1))) << shift
+                shift += width
+        board = step_bits(board, width, rule)
+        new_rows = back.get((x_index, y_index))
+        if new_rows is None:
+            new_rows = back[(x_index, y_index)] = size * [0]
+        for x in range(size):
+            new_rows[x] = (board >> (width * (x + 1) + 1)) & mask
+        if changes is not None:
+            for x in range(size):
+                diff = rows[x] ^ new_rows[x]
+                while diff:
+                    y = diff.bit_length() - 1
+                    changes.add((size * x_index + x, size * y_index + y))
+                    diff ^= 1 << y
+        # Chunks next to alive cells on the border of this chunk must exist,
+        # so that cells can be born in them in the next step.
+        columns = 0
+        for row in new_rows:
+            columns |= row
+        counts = no_tiles
+        if columns:
+            counts = bytes([(board & tile_mask).bit_count()
+                            for tile_mask in tile_masks])
+            population += sum(counts)
+            first, last = new_rows[0], new_rows[-1]
+            for x, y, alive in (
+                    (-1, 0, first), (1, 0, last),
+                    (0, -1, columns & 1), (0, 1, columns >> (size - 1)),
+                    (-1, -1, first & 1), (-1, 1, first >> (size - 1)),
+                    (1, -1, last & 1), (1, 1, last >> (size - 1))):
+                if alive:
+                    border_chunks.add((x_index + x, y_index + y))
+        tiles[(x_index, y_index)] = counts
+    return (back, tiles, population, border_chunks, changes)
+
+def block_counts(chunk, block):
+    """
+    Given a 'chunk' stored with the 'list' engine (a bytearray) or with the
+    'bitboard' engine (a list of 'int's), see Life.add_chunk, and a 'block'
+    size of at most 8 that divides chunk_size, returns the number of alive
+    cells in each of the 'block' x 'block' squares the chunk is cut into, as
+    a bytes object where the square of the cells of chunk coordinates (x, y)
+    is at index (chunk_size // 'block') * (x // 'block') + y // 'block'.
+    With 'block' = tile_size, these are the tile counts of the chunk.
+
+    The whole chunk is read as a single 'int' with one byte per cell, which
+    is added to itself shifted by one row, then by two rows, and so on,
+    and likewise by columns, so that the byte of the first cell of every
+    square ends up holding the number of alive cells in the square.
+    """
+    size = Life.chunk_size
+    if isinstance(chunk, list):
+        import struct
+        bits = int.from_bytes(struct.pack(f'<{size}I', *chunk), 'little')
+        # Written in binary, the chunk is made of the digits 0 and 1, one
+        # byte per cell, from the last cell.
+        cells = (int.from_bytes(format(bits, f'0{size * size}b').encode(), 'big')
+                 - int.from_bytes(b'0' * (size * size), 'big'))
+    else:
+        cells = int.from_bytes(chunk, 'little')
+    shift = 1
+    while shift < block:
+        cells += cells >> (8 * size * shift)
+        cells += cells >> (8 * shift)
+        shift <<= 1
+    data = cells.to_bytes(size * size, 'little')[::block]
+    side = size // block
+    return b''.join(data[size * a:size * a + side] for a in range(side))
+
+def step_band(padded, back, rows, block, table=None):
+    """
+    Given a NumPy array 'padded' holding some rows of a grid along with the
+    rows just above and below them, all surrounded by a border of one cell,
+    writes these rows (without the border) after a single time step into the
+    NumPy array 'back', using the rules of Conway's Game of Life -- or, if a
+    NumPy array 'table' is given, the transition table it holds (see
+    rule_table).
+
+    The neighbor sums are added up into the preallocated NumPy arrays 'rows'
+    (as wide as 'padded') and 'block' (as large as 'back'), so that no array
+    is allocated.
+    """
+    import numpy
+    center = padded[1:-1, 1:-1]
+    numpy.add(padded[:-2], padded[1:-1], out=rows)
+    numpy.add(rows, padded[2:], out=rows)
+    numpy.add(rows[:, :-2], rows[:, 1:-1], out=block)
+    numpy.add(block, rows[:, 2:], out=block)
+    # 'block' now counts the cell itself along with its eight neighbors.
+    # Without the cell, with Conway's rules, a cell is alive in the next step
+    # exactly if (neighbors | cell) == 3. Otherwise, the new state is looked
+    # up in the transition table, at index 9 * cell + neighbors, which is
+    # block + 8 * cell.
+    if table is None:
+        numpy.subtract(block, center, out=block)
+        numpy.bitwise_or(block, center, out=block)
+        numpy.equal(block, 3, out=back.view(numpy.bool_))
+    else:
+        numpy.multiply(center, 8, out=back)
+        numpy.add(block, back, out=block)
+        numpy.take(table, block, out=back)
+
+# The hash of a world is the sum of HASH_X ** x * HASH_Y ** y over its alive
+# cells (x, y), modulo HASH_MODULUS, so translating a world by (dx, dy)
+# multiplies its hash by HASH_X ** dx * HASH_Y ** dy.
+HASH_MODULUS = (1 << 61) - 1
+HASH_X = 0x1b873593d3a7c2f1 % HASH_MODULUS
+HASH_Y = 0x5bd1e9955f3a8e27 % HASH_MODULUS
+
+# Translation tables between rows of cells stored one byte per cell (0 or 1)
+# and the same rows written as binary digits.
+BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+DIGIT_BITS = bytes.maketrans(b'01', b'\x00\x01')
+
+def row_bytes(row):
+    """
+    Given a 'row' of a region of cells (a bytes-like object, a sequence of
+    cell values, or a one-dimensional NumPy array), returns it as a bytes-like
+    object with one byte per cell: 1 if the cell is alive, 0 if it is dead.
+    """
+    if isinstance(row, (bytes, bytearray)):
+        return row
+    if hasattr(row, 'astype'):
+        return (row != 0).astype('uint8').tobytes()
+    return bytes(1 if value else 0 for value in row)
+
+def random_row(generator, length, density):
+    """
+    Returns a bytearray of 'length' cells (1 if alive, 0 if dead), where each
+    cell is alive with probability 'density' (rounded to a multiple of
+    2 ** -16), using the random.Random object 'generator'.
+
+    The row is built from rows of fair random bits, one whole row at a time:
+    going through the binary digits of 'density' from the last one to the
+    first, the row is ORed with a fair row for every digit 1, and ANDed with
+    one for every digit 0.
+    """
+    level = round(density * 65536)
+    if length == 0 or level <= 0:
+        return bytearray(length)
+    if level >= 65536:
+        return bytearray(b'\x01') * length
+    bits = 0
+    for digit in range((level & -level).bit_length() - 1, 16):
+        fair = generator.getrandbits(length)
+        bits = bits | fair if (level >> digit) & 1 else bits & fair
+    return bytearray(format(bits, f'0{length}b').encode().translate(DIGIT_BITS))
+
 class WrongWorldType(Exception):
     """
     Exception designed to be thrown in case the wrong class method is used for
@@ -29,20 +340,115 @@ class WrongWorldType(Exception):
 
 class Life:
     chunk_size = 32
+    tile_size = 8
+    neighbor_vec = (
+            (-1, -1), (-1, 0), (-1, 1), (0, -1),
+            (0, 1), (1, -1), (1, 0), (1, 1)
+    )
 
-    def __init__(self, world_type='infinite', size=None):
+    def __init__(self, world_type='infinite', size=None, engine='list',
+                 cache_limit=1000000, gc_delay=16, workers=1, rule='B3/S23'):
         """
         Initializes an object of the Life class, which represents the grid where
         the simulation takes place.
+
+        The 'engine' argument chooses how the grid is stored and updated:
+        1. If engine = 'list', which is the default, the grid is stored as
+        lists of Booleans (or, in the 'infinite' case, as one bytearray per
+        chunk) and updated cell by cell. In the 'infinite' case, chunks that
+        have stayed empty, along with all their neighboring chunks, for
+        'gc_delay' consecutive time steps are deleted (never, if 'gc_delay' is
+        None).
+        2. If engine = 'numpy', the grid is stored as a NumPy array and updated
+        all at once. This engine requires NumPy and is only available for the
+        'torus' world type -- otherwise, raises a WrongWorldType exception.
+        3. If engine = 'sparse', only the set of alive cells is stored, and
+        each step only looks at alive cells and their neighbors. This engine
+        is only available for the 'infinite' world type -- otherwise, raises
+        a WrongWorldType exception.
+        4. If engine = 'hashlife', the grid is stored as a memoized quadtree
+        (see the 'hashlife' module), which lets 'step' jump over huge numbers
+        of generations at once. The 'cache_limit' argument bounds the number
+        of quadtree nodes and memoized results kept in memory, even in the
+        middle of a jump (see HashLife.trim), although a lower limit means
+        more results computed again. This engine is only available for the
+        'infinite' world type -- otherwise, raises a WrongWorldType exception.
+        5. If engine = 'bitboard', the grid is stored in chunks just like with
+        the 'list' engine, but each chunk is a list of chunk_size 'int's (one
+        per row, with one bit per cell), and all the cells of a chunk are
+        updated at once using bitwise operations (see bitboard_step). This
+        engine is only available for the 'infinite' world type -- otherwise,
+        raises a WrongWorldType exception.
+
+        With the 'numpy' and 'bitboard' engines, 'workers' is the number of
+        threads or processes used to update the grid in parallel; the results
+        are the same as with a single worker.
+
+        The 'rule' argument is an outer-totalistic rule string (see
+        parse_rule), such as 'B36/S23' for HighLife or 'B3678/S34678' for Day
+        & Night; by default, the rules of Conway's Game of Life are used. It
+        is compiled into a transition table (the 'table' attribute, see
+        rule_table) shared by all the engines. Rules where cells are born
+        with no alive neighbors (B0) are only available for the 'torus' world
+        type -- otherwise, raises a ValueError.
         """
+        if engine not in ('list', 'numpy', 'sparse', 'hashlife', 'bitboard'):
+            raise ValueError(f"unknown engine: {engine!r}")
+        if workers > 1 and engine not in ('numpy', 'bitboard'):
+            raise ValueError(f"engine {engine!r} does not support workers")
+        if engine == 'numpy' and world_type != 'torus':
+            raise WrongWorldType('torus')
+        if (engine in ('sparse', 'hashlife', 'bitboard')
+                and world_type != 'infinite'):
+            raise WrongWorldType('infinite')
+        self.birth, self.survival = parse_rule(rule)
+        if self.birth & 1 and world_type == 'infinite':
+            raise ValueError(f"rule {rule!r} needs a 'torus' world")
+        self.rule = rule_string(self.birth, self.survival)
+        self.table = rule_table(self.birth, self.survival)
         self.world_type = world_type
         self.size = size
+        self.engine = engine
+        self.gc_delay = gc_delay
+        self.workers = workers
+        self.pool = None
+        self.track_changes = False
+        self.profiler = None
+        self.timeline = None
+        self.checkpoint_path = None
+        self.checkpoint_every = None
+        self.history = None
+        self.history_limit = 0
+        self.cycle = None
+        self.hash_value = None
+        self.sum_x = self.sum_y = 0
+        self.x_powers = {}
+        self.y_powers = {}
+        self.node_hashes = {}
         self.time = 0
         self.population = 0
-        if self.world_type != 'infinite':
+        if self.engine == 'numpy':
+            import numpy
+            self.world = numpy.zeros((self.size, self.size), dtype=numpy.uint8)
+            self.back = numpy.zeros_like(self.world)
+            self.padded = numpy.zeros((self.size + 2, self.size + 2), dtype=numpy.uint8)
+            self.rows = numpy.zeros((self.size, self.size + 2), dtype=numpy.uint8)
+            self.block = numpy.zeros_like(self.world)
+        elif self.engine == 'sparse':
+            self.cells = set()
+        elif self.engine == 'hashlife':
+            import hashlife
+            self.tree = hashlife.HashLife(cache_limit, self.table)
+        elif self.world_type != 'infinite':
             self.world = [self.size * [False] for row in range(self.size)]
+            self.back = [self.size * [False] for row in range(self.size)]
         else:
             self.chunk_dict = {}
+            self.back_dict = {}
+            self.empty_time = {}
+            self.tile_counts = {}
+            self.scratch = bytearray((Life.chunk_size + 2) ** 2)
+            self.zeros = bytes(Life.chunk_size)
             self.chunk_count = 1
             self.add_chunk(0,0)
 
@@ -55,11 +461,9 @@ class Life:
         As is usual in Conway's Game of Life, a Moore neighborhood (with eight
         neighbors) is assumed.
         """
-        neighbor_vec = [
-                (-1, -1), (-1, 0), (-1, 1), (0, -1),
-                (0, 1), (1, -1), (1, 0), (1, 1)
-        ]
-        neighbors = [(x_coord + x, y_coord + y) for x, y in neighbor_vec]
+        if self.profiler is not None:
+            self.profiler.count('neighbor_lookups')
+        neighbors = [(x_coord + x, y_coord + y) for x, y in Life.neighbor_vec]
         if self.world_type == 'torus':
             neighbors = [(x % self.size, y % self.size) for x, y in neighbors]
         return neighbors
@@ -71,14 +475,60 @@ class Life:
         chunk in the chunk dictionary with key ('x_index', 'y_index') --
         but only if a chunk with the same key hadn't been initialized before.
 
-        The key represents the chunk coordinates of the chunk.
+        The key represents the chunk coordinates of the chunk, and the value
+        is a bytearray where the cell with chunk coordinates ('chunk_x',
+        'chunk_y') is stored at index chunk_size * 'chunk_x' + 'chunk_y'.
+        With the 'bitboard' engine, the value is instead a list of 'int's
+        where the same cell is stored as bit 'chunk_y' of item 'chunk_x'.
         """
         assert self.world_type == 'infinite'
         if (x_index, y_index) not in self.chunk_dict:
-            self.chunk_dict[(x_index, y_index)] = [
-                Life.chunk_size * [False] for row in range(Life.chunk_size)
-            ]
+            if self.engine == 'bitboard':
+                self.chunk_dict[(x_index, y_index)] = Life.chunk_size * [0]
+            else:
+                self.chunk_dict[(x_index, y_index)] = bytearray(Life.chunk_size ** 2)
             self.chunk_count += 1
+            if self.profiler is not None:
+                self.profiler.count('chunks_allocated')
+
+    def collect_chunks(self):
+        """
+        Assuming the chosen world type is 'infinite', deletes the chunks
+        that have been empty, along with all of their neighboring chunks,
+        for 'gc_delay' consecutive calls of this method.
+
+        Such chunks can be safely deleted, since no cell in them can become
+        alive in the next time step -- and setting a cell always initializes
+        the chunks around it again.
+        """
+        if self.gc_delay is None:
+            return
+        start = time.perf_counter()
+        chunk_count = self.chunk_count
+        empty = {
+            key for key, chunk in self.chunk_dict.items() if not any(chunk)
+        }
+        for key in empty:
+            if all(
+                (key[0] + x, key[1] + y) in empty
+                or (key[0] + x, key[1] + y) not in self.chunk_dict
+                for x, y in Life.neighbor_vec
+            ):
+                self.empty_time[key] = self.empty_time.get(key, 0) + 1
+            else:
+                self.empty_time.pop(key, None)
+        for key in list(self.empty_time):
+            if key not in empty:
+                del self.empty_time[key]
+            elif self.empty_time[key] >= self.gc_delay:
+                del self.chunk_dict[key]
+                self.back_dict.pop(key, None)
+                self.tile_counts.pop(key, None)
+                del self.empty_time[key]
+                self.chunk_count -= 1
+        if self.profiler is not None:
+            self.profiler.time('gc', time.perf_counter() - start)
+            self.profiler.count('chunks_freed', chunk_count - self.chunk_count)
     
     def get_cell(self, x_coord, y_coord):
         """
@@ -91,12 +541,24 @@ class Life:
         coordinates of the given cell (i.e. an appropriate key for the chunk
         dictionary).
         """
-        if self.world_type == 'infinite':
+        if self.engine == 'sparse':
+            chunk = (x_coord // Life.chunk_size, y_coord // Life.chunk_size)
+            return (int((x_coord, y_coord) in self.cells), chunk)
+        elif self.engine == 'hashlife':
+            chunk = (x_coord // Life.chunk_size, y_coord // Life.chunk_size)
+            return (self.tree.get_cell(x_coord, y_coord), chunk)
+        elif self.world_type == 'infinite':
             chunk = (x_coord // Life.chunk_size, y_coord // Life.chunk_size)
             if chunk in self.chunk_dict:
                 chunk_x = x_coord % Life.chunk_size
                 chunk_y = y_coord % Life.chunk_size
-                return (int(self.chunk_dict[chunk][chunk_x][chunk_y]), chunk)
+                if self.engine == 'bitboard':
+                    return ((self.chunk_dict[chunk][chunk_x] >> chunk_y) & 1,
+                            chunk)
+                return (
+                    self.chunk_dict[chunk][Life.chunk_size * chunk_x + chunk_y],
+                    chunk
+                )
             else:
                 return (0, chunk)
         else:
@@ -108,15 +570,26 @@ class Life:
         object, with the caveat that the 'time' and 'population' attributes
         are reset to 0.
         """
-        new_world = Life(self.world_type, self.size)
-        if self.world_type == 'infinite':
+        start = time.perf_counter()
+        new_world = Life(self.world_type, self.size, self.engine,
+                         gc_delay=self.gc_delay, rule=self.rule)
+        if self.engine == 'numpy':
+            new_world.world = self.world.copy()
+        elif self.engine == 'sparse':
+            new_world.cells = set(self.cells)
+        elif self.engine == 'hashlife':
+            new_world.tree = self.tree.copy()
+        elif self.world_type == 'infinite':
             for chunk in self.chunk_dict.keys():
-                new_world.chunk_dict[chunk] = [
-                    [cell for cell in row] for row in self.chunk_dict[chunk]
-                ]
+                if self.engine == 'bitboard':
+                    new_world.chunk_dict[chunk] = list(self.chunk_dict[chunk])
+                else:
+                    new_world.chunk_dict[chunk] = bytearray(self.chunk_dict[chunk])
             new_world.chunk_count = self.chunk_count
         else:
             new_world.world = [[cell for cell in row] for row in self.world]
+        if self.profiler is not None:
+            self.profiler.time('copy', time.perf_counter() - start)
         return new_world
 
     def set_cell(self, x_coord, y_coord, mode='set'):
@@ -132,22 +605,49 @@ class Life:
         2. The cell is adjacent to a cell in an uninitialized chunk
         Then, the uninitialized chunk is initialized.
         """
-        if self.world_type == 'infinite':
+        self.forget_history()
+        if self.engine == 'hashlife':
+            self.tree.set_cell(x_coord, y_coord, mode == 'set')
+            self.population = self.tree.population
+        elif self.engine == 'sparse':
+            if mode == 'set' and (x_coord, y_coord) not in self.cells:
+                self.cells.add((x_coord, y_coord))
+                self.population += 1
+            elif mode == 'clear' and (x_coord, y_coord) in self.cells:
+                self.cells.remove((x_coord, y_coord))
+                self.population -= 1
+        elif self.engine == 'bitboard':
             chunk = (x_coord // Life.chunk_size, y_coord // Life.chunk_size)
             chunk_x = x_coord % Life.chunk_size
-            chunk_y = y_coord % Life.chunk_size
+            bit = 1 << (y_coord % Life.chunk_size)
+            self.add_chunk(*chunk)
+            rows = self.chunk_dict[chunk]
+            if mode == 'set':
+                for i in self.get_neighbors(x_coord, y_coord):
+                    self.add_chunk(*(self.get_cell(*i)[1]))
+                if not rows[chunk_x] & bit:
+                    self.population += 1
+                rows[chunk_x] |= bit
+            elif mode == 'clear':
+                if rows[chunk_x] & bit:
+                    self.population -= 1
+                rows[chunk_x] &= ~bit
+        elif self.world_type == 'infinite':
+            chunk = (x_coord // Life.chunk_size, y_coord // Life.chunk_size)
+            index = (Life.chunk_size * (x_coord % Life.chunk_size)
+                     + y_coord % Life.chunk_size)
             self.add_chunk(*chunk)
             neighbors = self.get_neighbors(x_coord, y_coord)
             if mode == 'set':
                 for i in neighbors:
                     self.add_chunk(*(self.get_cell(*i)[1]))
-                if not self.chunk_dict[chunk][chunk_x][chunk_y]:
+                if not self.chunk_dict[chunk][index]:
                     self.population += 1
-                self.chunk_dict[chunk][chunk_x][chunk_y] = True
+                self.chunk_dict[chunk][index] = 1
             elif mode == 'clear':
-                if self.chunk_dict[chunk][chunk_x][chunk_y]:
+                if self.chunk_dict[chunk][index]:
                     self.population -= 1
-                self.chunk_dict[chunk][chunk_x][chunk_y] = False
+                self.chunk_dict[chunk][index] = 0
         else:
             if mode == 'set':
                 if not self.world[x_coord % self.size][y_coord % self.size]:
@@ -158,43 +658,1226 @@ class Life:
                     self.population -= 1
                 self.world[x_coord % self.size][y_coord % self.size] = False
         
-    def step(self):
+    def set_cells(self, cells, mode='set'):
+        """
+        Given an iterable 'cells' of 'int' cell coordinates (as ordered pairs,
+        or as the rows of an N x 2 NumPy array) and a 'mode', does the same as
+        calling set_cell on every one of them with that 'mode', only faster:
+        in particular, in the 'infinite' case, each chunk is initialized at
+        most once, however many cells are in it.
+        """
+        self.forget_history()
+        size = Life.chunk_size
+        if hasattr(cells, 'tolist'):
+            cells = map(tuple, cells.tolist())
+        if self.engine == 'hashlife':
+            if mode == 'set':
+                self.tree.set_cells(cells)
+            else:
+                for x_coord, y_coord in cells:
+                    self.tree.set_cell(x_coord, y_coord, False)
+            self.population = self.tree.population
+        elif self.engine == 'sparse':
+            if mode == 'set':
+                self.cells.update(cells)
+            elif mode == 'clear':
+                self.cells.difference_update(cells)
+            self.population = len(self.cells)
+        elif self.engine == 'numpy':
+            import numpy
+            coords = numpy.array(list(cells), dtype=numpy.int64).reshape(-1, 2)
+            coords %= self.size
+            self.world[coords[:, 0], coords[:, 1]] = 1 if mode == 'set' else 0
+            self.population = int(numpy.count_nonzero(self.world))
+        elif self.world_type == 'infinite':
+            touched = {}
+            for x_coord, y_coord in cells:
+                touched.setdefault(
+                    (x_coord // size, y_coord // size), []
+                ).append((x_coord % size, y_coord % size))
+            for (x_index, y_index), offsets in touched.items():
+                if mode == 'set':
+                    self.add_chunk(x_index, y_index)
+                    for x, y in Life.neighbor_vec:
+                        self.add_chunk(x_index + x, y_index + y)
+                chunk = self.chunk_dict.get((x_index, y_index))
+                if chunk is None:
+                    continue
+                before = (sum(row.bit_count() for row in chunk)
+                          if self.engine == 'bitboard' else chunk.count(1))
+                if self.engine == 'bitboard':
+                    for chunk_x, chunk_y in offsets:
+                        if mode == 'set':
+                            chunk[chunk_x] |= 1 << chunk_y
+                        else:
+                            chunk[chunk_x] &= ~(1 << chunk_y)
+                    after = sum(row.bit_count() for row in chunk)
+                else:
+                    value = 1 if mode == 'set' else 0
+                    for chunk_x, chunk_y in offsets:
+                        chunk[size * chunk_x + chunk_y] = value
+                    after = chunk.count(1)
+                self.population += after - before
+        else:
+            for x_coord, y_coord in cells:
+                self.set_cell(x_coord, y_coord, mode)
+
+    def region_chunks(self, x_coord, y_coord, width, height, existing=False):
+        """
+        Helper method that, assuming the chosen world type is 'infinite' and
+        the engine stores chunks, yields a tuple (k, x0, x1, y0, y1) for every
+        chunk overlapping the 'width' x 'height' rectangle whose upper-left
+        cell is ('x_coord', 'y_coord'), where k is the key of the chunk and
+        the cells of the chunk inside the rectangle are those with x0 <= x < x1
+        and y0 <= y < y1. If 'existing' is True, only the chunks that have been
+        initialized are yielded.
+        """
+        size = Life.chunk_size
+        x_end, y_end = x_coord + width, y_coord + height
+        x_range = range(x_coord // size, (x_end - 1) // size + 1)
+        y_range = range(y_coord // size, (y_end - 1) // size + 1)
+        if existing and len(x_range) * len(y_range) > len(self.chunk_dict):
+            keys = [(x_index, y_index) for x_index, y_index in self.chunk_dict
+                    if x_index in x_range and y_index in y_range]
+        else:
+            keys = [(x_index, y_index) for x_index in x_range
+                    for y_index in y_range]
+            if existing:
+                keys = [key for key in keys if key in self.chunk_dict]
+        for x_index, y_index in keys:
+            yield ((x_index, y_index),
+                   max(x_coord, size * x_index), min(x_end, size * (x_index + 1)),
+                   max(y_coord, size * y_index), min(y_end, size * (y_index + 1)))
+
+    def get_region(self, x_coord, y_coord, width, height):
+        """
+        Returns the cells of the 'width' x 'height' rectangle whose upper-left
+        cell is ('x_coord', 'y_coord') as a list of 'width' bytearrays of
+        'height' bytes each, where byte j of bytearray i is 1 if the cell
+        ('x_coord' + i, 'y_coord' + j) is alive, and 0 if it is dead.
+
+        In the 'infinite' case, only the chunks (or the alive cells, or the
+        quadtree nodes) overlapping the rectangle are looked at.
+        """
+        size = Life.chunk_size
+        region = [bytearray(height) for i in range(width)]
+        if width <= 0 or height <= 0:
+            return region
+        if self.engine == 'sparse':
+            if width * height < len(self.cells):
+                for i, row in enumerate(region):
+                    for j in range(height):
+                        if (x_coord + i, y_coord + j) in self.cells:
+                            row[j] = 1
+                return region
+            cells = self.cells
+        elif self.engine == 'hashlife':
+            cells = self.tree.live_cells((x_coord, y_coord, width, height))
+        elif self.engine == 'numpy':
+            import numpy
+            x_indices = numpy.arange(x_coord, x_coord + width) % self.size
+            y_indices = numpy.arange(y_coord, y_coord + height) % self.size
+            block = self.world[numpy.ix_(x_indices, y_indices)]
+            return [bytearray(row.tobytes()) for row in block]
+        elif self.world_type == 'infinite':
+            for key, x_start, x_end, y_start, y_end in self.region_chunks(
+                    x_coord, y_coord, width, height, existing=True):
+                chunk = self.chunk_dict[key]
+                start_x, start_y = size * key[0], size * key[1]
+                length = y_end - y_start
+                for x in range(x_start, x_end):
+                    row = region[x - x_coord]
+                    if self.engine == 'bitboard':
+                        bits = ((chunk[x - start_x] >> (y_start - start_y))
+                                & ((1 << length) - 1))
+                        if bits:
+                            row[y_start - y_coord:y_end - y_coord] = format(
+                                bits, f'0{length}b'
+                            )[::-1].encode().translate(DIGIT_BITS)
+                    else:
+                        start = size * (x - start_x) - start_y
+                        row[y_start - y_coord:y_end - y_coord] = (
+                            chunk[start + y_start:start + y_end]
+                        )
+            return region
+        else:
+            # Each row of the torus is repeated as many times as needed for
+            # the wrapped range of y coordinates to be a single slice of it.
+            start = y_coord % self.size
+            copies = (start + height - 1) // self.size + 1
+            for i, row in enumerate(region):
+                world_row = bytes(self.world[(x_coord + i) % self.size])
+                row[:] = (copies * world_row)[start:start + height]
+            return region
+        for x, y in cells:
+            if (x_coord <= x < x_coord + width
+                    and y_coord <= y < y_coord + height):
+                region[x - x_coord][y - y_coord] = 1
+        return region
+
+    def set_region(self, x_coord, y_coord, region):
+        """
+        Given a 'region' of cells (a sequence of rows of equal length, such as
+        a list of bytearrays returned by get_region, a list of lists of cell
+        values, or a two-dimensional NumPy array), sets the cells of the
+        rectangle whose upper-left cell is ('x_coord', 'y_coord') to the
+        values in it: the cell ('x_coord' + i, 'y_coord' + j) becomes alive
+        exactly if region[i][j] is nonzero.
+
+        In the 'infinite' case, each chunk overlapping the rectangle is
+        initialized at most once, and only if some cells in or around it are
+        alive. The 'population' attribute is updated once per chunk.
+        """
+        self.forget_history()
+        size = Life.chunk_size
+        rows = [row_bytes(row) for row in region]
+        width = len(rows)
+        height = len(rows[0]) if rows else 0
+        if width == 0 or height == 0:
+            return
+        if self.engine == 'hashlife':
+            self.tree.set_region(x_coord, y_coord, height, [
+                int(row.translate(BIT_DIGITS)[::-1], 2) for row in rows
+            ])
+            self.population = self.tree.population
+        elif self.engine == 'sparse':
+            self.clear_region(x_coord, y_coord, width, height)
+            self.set_cells([
+                cell for i, row in enumerate(rows)
+                for cell in zip(repeat(x_coord + i),
+                                compress(range(y_coord, y_coord + height), row))
+            ])
+        elif self.engine == 'numpy':
+            import numpy
+            x_indices = numpy.arange(x_coord, x_coord + width) % self.size
+            y_indices = numpy.arange(y_coord, y_coord + height) % self.size
+            self.world[numpy.ix_(x_indices, y_indices)] = numpy.frombuffer(
+                b''.join(rows), dtype=numpy.uint8
+            ).reshape(width, height)
+            self.population = int(numpy.count_nonzero(self.world))
+        elif self.world_type == 'infinite':
+            if self.engine == 'bitboard':
+                rows = [int(row.translate(BIT_DIGITS)[::-1], 2) for row in rows]
+            for key, x_start, x_end, y_start, y_end in self.region_chunks(
+                    x_coord, y_coord, width, height):
+                start_x, start_y = size * key[0], size * key[1]
+                length = y_end - y_start
+                if self.engine == 'bitboard':
+                    mask = (1 << length) - 1
+                    parts = [(rows[x - x_coord] >> (y_start - y_coord)) & mask
+                             for x in range(x_start, x_end)]
+                    alive = any(parts)
+                else:
+                    parts = [rows[x - x_coord][y_start - y_coord:y_end - y_coord]
+                             for x in range(x_start, x_end)]
+                    alive = any(1 in part for part in parts)
+                if alive:
+                    self.add_chunk(*key)
+                    for x, y in Life.neighbor_vec:
+                        self.add_chunk(key[0] + x, key[1] + y)
+                chunk = self.chunk_dict.get(key)
+                if chunk is None:
+                    continue
+                if self.engine == 'bitboard':
+                    before = sum(row.bit_count() for row in chunk)
+                    shift = y_start - start_y
+                    for x, part in zip(range(x_start - start_x, x_end - start_x),
+                                       parts):
+                        chunk[x] = chunk[x] & ~(mask << shift) | part << shift
+                    after = sum(row.bit_count() for row in chunk)
+                else:
+                    before = chunk.count(1)
+                    for x, part in zip(range(x_start - start_x, x_end - start_x),
+                                       parts):
+                        start = size * x - start_y
+                        chunk[start + y_start:start + y_end] = part
+                    after = chunk.count(1)
+                self.population += after - before
+        else:
+            for i, row in enumerate(rows):
+                world_row = self.world[(x_coord + i) % self.size]
+                for j, value in enumerate(row):
+                    world_row[(y_coord + j) % self.size] = value == 1
+            self.population = sum(row.count(True) for row in self.world)
+
+    def clear_region(self, x_coord, y_coord, width, height):
+        """
+        Clears all the cells of the 'width' x 'height' rectangle whose
+        upper-left cell is ('x_coord', 'y_coord'), without initializing any
+        chunk and without looking at the cells outside of it where the engine
+        allows it.
+        """
+        self.forget_history()
+        size = Life.chunk_size
+        if width <= 0 or height <= 0:
+            return
+        if self.engine == 'sparse':
+            x_end, y_end = x_coord + width, y_coord + height
+            if width * height < len(self.cells):
+                self.cells.difference_update(
+                    (x, y) for x in range(x_coord, x_end)
+                    for y in range(y_coord, y_end)
+                )
+            else:
+                self.cells = {
+                    (x, y) for x, y in self.cells
+                    if not (x_coord <= x < x_end and y_coord <= y < y_end)
+                }
+            self.population = len(self.cells)
+        elif self.engine == 'hashlife':
+            self.tree.clear_region(x_coord, y_coord, width, height)
+            self.population = self.tree.population
+        elif self.engine == 'numpy':
+            import numpy
+            x_indices = numpy.arange(x_coord, x_coord + width) % self.size
+            y_indices = numpy.arange(y_coord, y_coord + height) % self.size
+            self.world[numpy.ix_(x_indices, y_indices)] = 0
+            self.population = int(numpy.count_nonzero(self.world))
+        elif self.world_type == 'infinite':
+            for key, x_start, x_end, y_start, y_end in self.region_chunks(
+                    x_coord, y_coord, width, height, existing=True):
+                chunk = self.chunk_dict[key]
+                start_x, start_y = size * key[0], size * key[1]
+                if self.engine == 'bitboard':
+                    before = sum(row.bit_count() for row in chunk)
+                    mask = ~(((1 << (y_end - y_start)) - 1) << (y_start - start_y))
+                    for x in range(x_start - start_x, x_end - start_x):
+                        chunk[x] &= mask
+                    after = sum(row.bit_count() for row in chunk)
+                else:
+                    before = chunk.count(1)
+                    zeros = bytes(y_end - y_start)
+                    for x in range(x_start - start_x, x_end - start_x):
+                        start = size * x - start_y
+                        chunk[start + y_start:start + y_end] = zeros
+                    after = chunk.count(1)
+                self.population += after - before
+        else:
+            for i in range(min(width, self.size)):
+                world_row = self.world[(x_coord + i) % self.size]
+                for j in range(min(height, self.size)):
+                    world_row[(y_coord + j) % self.size] = False
+            self.population = sum(row.count(True) for row in self.world)
+
+    def random_fill(self, x_coord, y_coord, width, height, density=0.5,
+                    seed=None):
+        """
+        Fills the 'width' x 'height' rectangle whose upper-left cell is
+        ('x_coord', 'y_coord') at random: each cell becomes alive with
+        probability 'density', and dead otherwise. The same 'seed' always
+        gives the same cells, whatever the engine; if it is None, the random
+        generator is seeded from the system.
+
+        The rectangle is generated one whole row at a time by random_row, and
+        then written with set_region.
+        """
+        import random
+        generator = random.Random(seed)
+        self.set_region(x_coord, y_coord, [
+            random_row(generator, height, density) for i in range(width)
+        ])
+
+    def density(self, x_coord, y_coord, width, height, block):
+        """
+        Returns the number of alive cells in each block of a 'width' x
+        'height' grid of 'block' x 'block' squares of cells, whose upper-left
+        cell is ('x_coord', 'y_coord'), as a list of 'width' lists of 'height'
+        'int's: the item [i][j] counts the alive cells (x, y) with
+        x_coord + i * block <= x < x_coord + (i + 1) * block, and likewise
+        for y. In the 'torus' case, the coordinates wrap around the edges.
+
+        This is used to draw zoomed-out views, where a pixel shows a whole
+        block of cells, without looking at every cell in view:
+        1. With the 'hashlife' engine, the populations stored in the quadtree
+        nodes are added up (see HashLife.density). If 'block' is a power of
+        two and the coordinates are multiples of it, each block is a single
+        node.
+        2. With the 'list' and 'bitboard' engines, in the 'infinite' case, the
+        number of alive cells in every tile of every chunk (see block_counts)
+        is kept up to date by 'step' (in the 'tile_counts' dictionary). If
+        'block' and the coordinates are multiples of tile_size, each block is
+        made of whole tiles, whose counts are added up. Otherwise, the chunks
+        entirely inside a single block are added as a whole, and the chunks
+        crossing the border of a block are cut into bands of rows, one per
+        block, whose rows are added up all at once into the number of alive
+        cells of each column, so that each block then takes a single sum.
+        3. With the 'sparse' engine, only the alive cells are looked at.
+        4. In the 'torus' case, every cell of the world is counted once,
+        however many times it is in view (see torus_density).
+        """
+        size, tile = Life.chunk_size, Life.tile_size
+        x_end, y_end = x_coord + width * block, y_coord + height * block
+        if self.engine == 'hashlife':
+            return self.tree.density(x_coord, y_coord, width, height, block)
+        if self.world_type == 'torus':
+            return self.torus_density(x_coord, y_coord, width, height, block)
+        counts = [height * [0] for i in range(width)]
+        if self.engine == 'sparse':
+            for x, y in self.cells:
+                if x_coord <= x < x_end and y_coord <= y < y_end:
+                    counts[(x - x_coord) // block][(y - y_coord) // block] += 1
+            return counts
+        import operator
+        bitboard = self.engine == 'bitboard'
+        # If the blocks are made of whole squares of 'part' x 'part' cells of
+        # the chunks (their tiles, or the blocks themselves if they are
+        # smaller), the numbers of alive cells in these squares are added up.
+        part = tile if block % tile == 0 else block if size % block == 0 else 0
+        if part and (x_coord % part or y_coord % part):
+            part = 0
+        side = size // part if part else 0
+        # With the 'bitboard' engine, a row written in binary is made of the
+        # digits 0 and 1, one byte per cell, from the last cell.
+        binary = f'0{size}b'
+        zero_digits = int.from_bytes(b'0' * size, 'big')
+        for key, x_start, x_stop, y_start, y_stop in self.region_chunks(
+                x_coord, y_coord, width * block, height * block, True):
+            chunk = self.chunk_dict[key]
+            chunk_x, chunk_y = size * key[0], size * key[1]
+            first_j = (y_start - y_coord) // block
+            last_j = (y_stop - 1 - y_coord) // block
+            first_i = (x_start - x_coord) // block
+            last_i = (x_stop - 1 - x_coord) // block
+            inside = (x_stop - x_start == size and y_stop - y_start == size
+                      and first_i == last_i and first_j == last_j)
+            if inside or part == tile:
+                parts = self.tile_counts.get(key)
+                if parts is None:
+                    parts = self.tile_counts[key] = block_counts(chunk, tile)
+                if inside:
+                    counts[first_i][first_j] += sum(parts)
+                    continue
+            elif part:
+                parts = block_counts(chunk, part)
+            if part:
+                c_start = (y_start - chunk_y) // part
+                c_stop = (y_stop - chunk_y) // part
+                for a in range((x_start - chunk_x) // part,
+                               (x_stop - chunk_x) // part):
+                    column = counts[(chunk_x + part * a - x_coord) // block]
+                    if part == block:
+                        column[first_j:last_j + 1] = map(
+                            operator.add, column[first_j:last_j + 1],
+                            parts[side * a + c_start:side * a + c_stop]
+                        )
+                    else:
+                        for c in range(c_start, c_stop):
+                            column[(chunk_y + part * c - y_coord) // block] += (
+                                parts[side * a + c]
+                            )
+                continue
+            bounds = [(j, max(y_start, y_coord + j * block) - chunk_y,
+                       min(y_stop, y_coord + (j + 1) * block) - chunk_y)
+                      for j in range(first_j, last_j + 1)]
+            x = x_start
+            while x < x_stop:
+                i = (x - x_coord) // block
+                end = min(x_stop, x_coord + (i + 1) * block)
+                # The rows of the chunk in this block are added up as 'int's
+                # with one byte per cell, which gives the number of alive
+                # cells in each column (fewer than 256).
+                if bitboard:
+                    total = sum(
+                        int.from_bytes(format(row, binary).encode(), 'big')
+                        for row in chunk[x - chunk_x:end - chunk_x]
+                    ) - (end - x) * zero_digits
+                else:
+                    total = sum(
+                        int.from_bytes(chunk[size * r:size * (r + 1)], 'little')
+                        for r in range(x - chunk_x, end - chunk_x)
+                    )
+                sums = total.to_bytes(size, 'little')
+                column = counts[i]
+                for j, low, high in bounds:
+                    column[j] += sum(sums[low:high])
+                x = end
+        return counts
+
+    def torus_density(self, x_coord, y_coord, width, height, block):
         """
-        Updates the grid by a single time step, using the rules of Conway's
-        Game of Life.
+        Helper method that returns the same as density, assuming the world
+        type is 'torus', while counting every cell of the world once, rather
+        than once per time it is in view.
+
+        Along each axis, the coordinate c = q * size + r of every border
+        between two blocks is split into its quotient q and remainder r by
+        the size of the world: the alive cells of a row of the world repeated
+        over and over, before the coordinate c, are q times the population of
+        the row plus the alive cells among its first r cells. Every row of
+        the world is cut this way into the blocks along the y axis, and the
+        resulting columns of counts are then cut into the blocks along the x
+        axis.
+        """
+        size = self.size
+        x_folds = [divmod(x_coord + i * block, size) for i in range(width + 1)]
+        y_folds = [divmod(y_coord + j * block, size) for j in range(height + 1)]
+        if self.engine == 'numpy':
+            import numpy
+            x_quotients, x_rests = numpy.array(x_folds, dtype=numpy.int64).T
+            y_quotients, y_rests = numpy.array(y_folds, dtype=numpy.int64).T
+            # prefix[x, r] is the number of alive cells among the first r
+            # cells of the row x of the world.
+            prefix = numpy.zeros((size, size + 1), dtype=numpy.int32)
+            numpy.cumsum(self.world, axis=1, out=prefix[:, 1:])
+            before = prefix[:, y_rests] + numpy.outer(prefix[:, size], y_quotients)
+            rows = numpy.diff(before, axis=1)
+            prefix = numpy.zeros((size + 1, height), dtype=numpy.int64)
+            numpy.cumsum(rows, axis=0, out=prefix[1:])
+            before = prefix[x_rests] + numpy.outer(x_quotients, prefix[size])
+            return numpy.diff(before, axis=0).tolist()
+        from itertools import accumulate
+        from operator import add, itemgetter, mul, sub
+
+        def cut(lines, folds):
+            # Cuts every line (a sequence of counts along the axis of 'folds')
+            # into the blocks bounded by 'folds'.
+            quotients = [q_end - q for (q, r), (q_end, r_end)
+                         in zip(folds, folds[1:])]
+            pick = itemgetter(*(r for q, r in folds))
+            empty = (len(folds) - 1) * [0]
+            cut_lines = []
+            for line in lines:
+                prefix = list(accumulate(line, initial=0))
+                if prefix[-1] == 0:
+                    cut_lines.append(empty)
+                    continue
+                before = pick(prefix)
+                cut_lines.append(list(map(
+                    add, map(sub, before[1:], before[:-1]),
+                    map(mul, quotients, repeat(prefix[-1]))
+                )))
+            return cut_lines
+
+        rows = cut(self.world, y_folds)
+        return [list(line) for line in zip(*cut(zip(*rows), x_folds))]
+
+    def live_cells(self):
+        """
+        Yields the coordinates (as ordered pairs of 'int's) of all the alive
+        cells in the world, in no particular order, without looking at every
+        dead cell where the engine allows it.
+        """
+        size = Life.chunk_size
+        if self.engine == 'sparse':
+            yield from self.cells
+        elif self.engine == 'hashlife':
+            yield from self.tree.live_cells()
+        elif self.engine == 'numpy':
+            import numpy
+            x_coords, y_coords = numpy.nonzero(self.world)
+            yield from zip(x_coords.tolist(), y_coords.tolist())
+        elif self.engine == 'bitboard':
+            for (x_index, y_index), rows in self.chunk_dict.items():
+                for x, row in enumerate(rows):
+                    while row:
+                        y = (row & -row).bit_length() - 1
+                        yield (size * x_index + x, size * y_index + y)
+                        row &= row - 1
+        elif self.world_type == 'infinite':
+            for (x_index, y_index), chunk in self.chunk_dict.items():
+                i = chunk.find(1)
+                while i != -1:
+                    yield (size * x_index + i // size, size * y_index + i % size)
+                    i = chunk.find(1, i + 1)
+        else:
+            for x, row in enumerate(self.world):
+                for y, cell in enumerate(row):
+                    if cell:
+                        yield (x, y)
+
+    def step(self, generations=1):
+        """
+        Updates the grid by 'generations' time steps (a single one by default),
+        using the rule of the world (see the 'rule' attribute).
 
         Also increments the 'time' attribute and updates the 'population'
         attribute.
+
+        If the 'track_changes' attribute is True, returns the set of
+        coordinates of the cells whose state is different from before the
+        call. Otherwise (or with the 'hashlife' engine, which does not look at
+        individual cells), returns None.
+
+        If the 'checkpoint_every' attribute is a positive 'int', a snapshot of
+        the world is saved into the file at 'checkpoint_path' (see the
+        'snapshot' module) whenever 'time' reaches a multiple of it.
+
+        If the 'profiler' attribute is a Profiler object (see the 'profiler'
+        module), the time spent in each phase of every time step ('compute',
+        'gc', 'hash', 'timeline' and 'checkpoint') is recorded in it, along
+        with counters such as the number of cells evaluated. If it is None,
+        which is the default, nothing is recorded.
+        """
+        profiler = self.profiler
+        changed = set() if self.track_changes and self.engine != 'hashlife' else None
+        while generations > 0:
+            if profiler is not None:
+                start = time.perf_counter()
+            if self.timeline is not None:
+                self.timeline.prepare(self)
+            jump = 1
+            if self.engine == 'hashlife':
+                jump = generations
+                if self.checkpoint_every:
+                    jump = min(jump, self.checkpoint_every
+                               - self.time % self.checkpoint_every)
+                results = len(self.tree.results)
+                self.tree.advance(jump)
+                self.population = self.tree.population
+                changes = None
+                if profiler is not None:
+                    profiler.count('nodes_computed',
+                                   max(len(self.tree.results) - results, 0))
+            elif self.engine == 'numpy':
+                changes = self.numpy_step()
+            elif self.engine == 'sparse':
+                changes = self.sparse_step()
+            elif self.engine == 'bitboard':
+                changes = self.bitboard_step()
+            else:
+                changes = self.list_step()
+            self.time += jump
+            generations -= jump
+            if profiler is not None:
+                profiler.time('compute', time.perf_counter() - start)
+            if self.world_type == 'infinite' and self.engine in ('list', 'bitboard'):
+                self.collect_chunks()
+            if self.history is not None:
+                if profiler is not None:
+                    start = time.perf_counter()
+                if changes is None:
+                    self.hash_value = None
+                else:
+                    self.update_hash(changes)
+                self.check_cycle()
+                if profiler is not None:
+                    profiler.time('hash', time.perf_counter() - start)
+            if self.timeline is not None:
+                if profiler is not None:
+                    start = time.perf_counter()
+                self.timeline.record(self, changes)
+                if profiler is not None:
+                    profiler.time('timeline', time.perf_counter() - start)
+            if changed is not None:
+                changed ^= changes
+            self.checkpoint()
+            if profiler is not None:
+                profiler.end_generation(self.time, jump, self.population)
+        return changed
+
+    def tracking(self):
+        """
+        Helper method that returns True if the step helper methods have to
+        return the set of cells that changed: if the 'track_changes' attribute
+        is True, if cycles are being detected (see detect_cycles), or if a
+        timeline is kept (see keep_timeline).
+        """
+        return (self.track_changes or self.history is not None
+                or self.timeline is not None)
+
+    def detect_cycles(self, history_limit=1024):
+        """
+        Starts detecting cycles: from now on, every time step, the state of
+        the world is compared with the last 'history_limit' states, and as
+        soon as the world is in a state it has already been in (possibly
+        translated, in the 'infinite' case), the 'cycle' attribute is set to a
+        tuple (p, dx, dy), meaning that the world repeats itself every p time
+        steps, translated by (dx, dy) -- (1, 0, 0) for a still life. If
+        'history_limit' is None, stops detecting cycles.
+
+        States are compared using a hash of the world (see hash_weight), which
+        is updated with the cells that changed in each time step rather than
+        recomputed. With the 'hashlife' engine, it is computed from the hashes
+        of the quadtree nodes, which are memoized. The period found is a
+        multiple of the number of time steps given to each call of 'step',
+        so periods are only guaranteed to be the smallest ones if the world is
+        updated one time step at a time.
+        """
+        if history_limit is None:
+            self.history = None
+            self.cycle = None
+            return
+        self.history = {}
+        self.history_limit = history_limit
+        self.forget_history()
+        self.check_cycle()
+
+    def forget_history(self):
+        """
+        Helper method called whenever cells are changed other than by a time
+        step: the history of the states of the world (if cycles are being
+        detected) no longer leads to the current state, so it is cleared,
+        along with the 'cycle' attribute, and the hash is recomputed from
+        scratch before the next time step. If a timeline is kept, the new
+        state is retained as a keyframe before the next time step. The tile
+        counts of the chunks (see density) are counted again when needed.
+        """
+        if self.timeline is not None:
+            self.timeline.dirty = True
+        if self.world_type == 'infinite' and self.engine in ('list', 'bitboard'):
+            self.tile_counts.clear()
+        if self.history is not None:
+            self.history.clear()
+            self.cycle = None
+            self.hash_value = None
+
+    def keep_timeline(self, budget=64 * 2 ** 20, keyframe_every=256):
+        """
+        Starts keeping a timeline of the past states of the world (see the
+        'timeline' module): from now on, every time step, the cells that
+        changed are retained, along with all the alive cells every
+        'keyframe_every' time steps, in at most about 'budget' bytes (the
+        oldest states are forgotten first). Any retained state can then be
+        restored with rewind. If 'budget' is None, stops keeping a timeline.
+        """
+        if budget is None:
+            self.timeline = None
+            return
+        import timeline
+        self.timeline = timeline.Timeline(budget, keyframe_every)
+
+    def rewind(self, time):
+        """
+        Restores the state the world was in at the time step 'time', which
+        must be retained by the timeline (see keep_timeline) -- otherwise,
+        raises a ValueError. The retained states after it are kept until the
+        world is updated or its cells are changed, so the world can be moved
+        back and forth between them.
+        """
+        if self.timeline is None:
+            raise ValueError('no timeline is kept')
+        self.replace_cells(self.timeline.cells(time))
+        self.time = time
+        self.timeline.dirty = False
+
+    def hash_weight(self, x_coord, y_coord):
+        """
+        Helper method that returns the weight HASH_X ** 'x_coord' * HASH_Y **
+        'y_coord' (modulo HASH_MODULUS) of the cell ('x_coord', 'y_coord') in
+        the hash of the world, which is the sum of the weights of all the
+        alive cells. The powers are cached.
+        """
+        x_power = self.x_powers.get(x_coord)
+        if x_power is None:
+            if len(self.x_powers) > 1000000:
+                self.x_powers.clear()
+            x_power = self.x_powers[x_coord] = pow(HASH_X, x_coord, HASH_MODULUS)
+        y_power = self.y_powers.get(y_coord)
+        if y_power is None:
+            if len(self.y_powers) > 1000000:
+                self.y_powers.clear()
+            y_power = self.y_powers[y_coord] = pow(HASH_Y, y_coord, HASH_MODULUS)
+        return x_power * y_power % HASH_MODULUS
+
+    def node_hash(self, node):
+        """
+        Helper method that returns a tuple (h, sx, sy) for a node of the
+        HashLife quadtree, where h is the hash of the cells of the node (as
+        if its upper-left cell was the cell (0, 0)), and sx and sy are the
+        sums of the x and y coordinates of its alive cells. The results are
+        memoized, so only the nodes that are new since the last call are
+        looked at.
+        """
+        if node.population == 0:
+            return (0, 0, 0)
+        if node.level == 0:
+            return (1, 0, 0)
+        result = self.node_hashes.get(node)
+        if result is None:
+            half = 1 << (node.level - 1)
+            nw, ne, sw, se = (self.node_hash(child) for child in
+                              (node.nw, node.ne, node.sw, node.se))
+            x_power = pow(HASH_X, half, HASH_MODULUS)
+            y_power = pow(HASH_Y, half, HASH_MODULUS)
+            result = (
+                (nw[0] + ne[0] * x_power + sw[0] * y_power
+                 + se[0] * x_power * y_power) % HASH_MODULUS,
+                nw[1] + ne[1] + sw[1] + se[1]
+                + half * (node.ne.population + node.se.population),
+                nw[2] + ne[2] + sw[2] + se[2]
+                + half * (node.sw.population + node.se.population)
+            )
+            self.node_hashes[node] = result
+        return result
+
+    def rehash(self):
+        """
+        Helper method that computes the hash of the world, along with the sums
+        of the coordinates of its alive cells (the 'hash_value', 'sum_x' and
+        'sum_y' attributes) from scratch.
+        """
+        if self.engine == 'hashlife':
+            if len(self.node_hashes) > self.tree.cache_limit:
+                self.node_hashes.clear()
+            root = self.tree.root
+            half = 1 << (root.level - 1)
+            value, sum_x, sum_y = self.node_hash(root)
+            self.hash_value = (value * pow(HASH_X, -half, HASH_MODULUS)
+                               * pow(HASH_Y, -half, HASH_MODULUS) % HASH_MODULUS)
+            self.sum_x = sum_x - half * root.population
+            self.sum_y = sum_y - half * root.population
+            return
+        value = sum_x = sum_y = 0
+        for x, y in self.live_cells():
+            value += self.hash_weight(x, y)
+            sum_x += x
+            sum_y += y
+        self.hash_value = value % HASH_MODULUS
+        self.sum_x, self.sum_y = sum_x, sum_y
+
+    def update_hash(self, changes):
+        """
+        Helper method that updates the hash of the world, along with the sums
+        of the coordinates of its alive cells, given the set 'changes' of the
+        cells that changed in the last time step.
+        """
+        if self.hash_value is None:
+            self.rehash()
+            return
+        size = Life.chunk_size
+        value, sum_x, sum_y = self.hash_value, self.sum_x, self.sum_y
+        x_powers, y_powers = self.x_powers, self.y_powers
+        for x, y in changes:
+            if self.engine == 'sparse':
+                alive = (x, y) in self.cells
+            elif self.engine == 'bitboard':
+                chunk = self.chunk_dict.get((x // size, y // size), self.zeros)
+                alive = (chunk[x % size] >> (y % size)) & 1
+            elif self.world_type == 'infinite':
+                chunk = self.chunk_dict.get((x // size, y // size))
+                alive = chunk and chunk[size * (x % size) + y % size]
+            else:
+                alive = self.get_cell(x, y)
+            x_power, y_power = x_powers.get(x), y_powers.get(y)
+            if x_power is None or y_power is None:
+                weight = self.hash_weight(x, y)
+            else:
+                weight = x_power * y_power
+            if alive:
+                value += weight
+                sum_x += x
+                sum_y += y
+            else:
+                value -= weight
+                sum_x -= x
+                sum_y -= y
+        self.hash_value = value % HASH_MODULUS
+        self.sum_x, self.sum_y = sum_x, sum_y
+
+    def check_cycle(self):
+        """
+        Helper method that looks for the current state of the world in the
+        history of its states, sets the 'cycle' attribute if it is found (and
+        not set already), and then adds the state to the history, forgetting
+        the oldest state if the history has more than 'history_limit' of them.
+
+        In the 'infinite' case, states are looked up by a key which does not
+        change when the world is translated: translating the world by (dx, dy)
+        adds 'population' * dx to 'sum_x', so dividing 'sum_x' by 'population'
+        gives a quotient that changes by dx and a remainder that does not,
+        and the hash is shifted back by the quotients. In the 'torus' case,
+        only states that repeat without being translated are found.
+        """
+        if self.hash_value is None:
+            self.rehash()
+        population = self.population
+        if self.world_type == 'infinite' and population:
+            x_shift, x_rest = divmod(self.sum_x, population)
+            y_shift, y_rest = divmod(self.sum_y, population)
+            key = (population,
+                   self.hash_value * pow(HASH_X, -x_shift, HASH_MODULUS)
+                   * pow(HASH_Y, -y_shift, HASH_MODULUS) % HASH_MODULUS,
+                   x_rest, y_rest)
+        else:
+            key = (population, self.hash_value, 0, 0)
+        previous = self.history.pop(key, None)
+        if previous is not None and self.cycle is None:
+            time, sum_x, sum_y = previous
+            if population:
+                self.cycle = (self.time - time,
+                              (self.sum_x - sum_x) // population,
+                              (self.sum_y - sum_y) // population)
+            else:
+                self.cycle = (self.time - time, 0, 0)
+        self.history[key] = (self.time, self.sum_x, self.sum_y)
+        if len(self.history) > self.history_limit:
+            del self.history[next(iter(self.history))]
+
+    def translate(self, x_offset, y_offset):
+        """
+        Moves every alive cell of the world by ('x_offset', 'y_offset'). In
+        the 'torus' case, the cells wrap around the edges.
+        """
+        self.replace_cells([(x + x_offset, y + y_offset)
+                            for x, y in self.live_cells()])
+
+    def replace_cells(self, cells):
+        """
+        Helper method that replaces all the alive cells of the world with the
+        given 'cells' (a list, or any other collection of 'int' cell
+        coordinates).
+        """
+        if self.engine == 'sparse':
+            self.cells = set()
+        elif self.engine == 'hashlife':
+            self.tree.root = self.tree.empty(3)
+        elif self.world_type == 'torus':
+            self.clear_region(0, 0, self.size, self.size)
+        else:
+            self.chunk_dict = {}
+            self.back_dict = {}
+            self.empty_time = {}
+            self.tile_counts = {}
+            self.chunk_count = 1
+            self.add_chunk(0, 0)
+        self.population = 0
+        self.set_cells(cells)
+
+    def fast_forward(self, generations):
+        """
+        Assuming a cycle (p, dx, dy) has been found (see detect_cycles),
+        advances the world by the largest multiple k * p of p time steps not
+        larger than 'generations', without computing them: the world is
+        translated by (k * dx, k * dy), and k * p is added to the 'time'
+        attribute. Returns k * p, or 0 if no cycle has been found.
+        """
+        if self.cycle is None:
+            return 0
+        period, x_offset, y_offset = self.cycle
+        count = generations // period
+        if count == 0:
+            return 0
+        cycle = self.cycle
+        if x_offset or y_offset:
+            self.translate(count * x_offset, count * y_offset)
+        self.time += count * period
+        self.forget_history()
+        self.cycle = cycle
+        self.check_cycle()
+        return count * period
+
+    def checkpoint(self):
+        """
+        Helper method that saves a snapshot of the world into the file at
+        'checkpoint_path' if the 'checkpoint_every' attribute is a positive
+        'int' and 'time' is a multiple of it.
+        """
+        if self.checkpoint_every and self.time % self.checkpoint_every == 0:
+            import snapshot
+            start = time.perf_counter()
+            snapshot.save(self, self.checkpoint_path)
+            if self.profiler is not None:
+                self.profiler.time('checkpoint', time.perf_counter() - start)
+
+    def list_step(self):
+        """
+        Helper method that updates a world stored as lists of Booleans (or
+        bytearrays, in the 'infinite' case) by a single time step. Does not
+        increment the 'time' attribute.
+
+        Like the other step helper methods, returns the set of coordinates
+        of the cells that changed if the 'tracking' method returns True, and
+        None otherwise.
+
+        The new grid is written into a second, preallocated grid (or, in the
+        'infinite' case, a second bytearray for each chunk) which is then
+        swapped with the current one, so that no new grid is allocated.
         """
-        self.time += 1
         if self.world_type == 'infinite':
-            current_world = self.copy_world()
-            for chunk_index in current_world.chunk_dict.keys():
-                for chunk_x in range(Life.chunk_size):
-                    for chunk_y in range(Life.chunk_size):
-                        x_coord = Life.chunk_size * chunk_index[0] + chunk_x
-                        y_coord = Life.chunk_size * chunk_index[1] + chunk_y
-                        neighbors = current_world.get_neighbors(x_coord, y_coord)
-                        neighbor_values = [current_world.get_cell(*n) for n in neighbors]
-                        cell = current_world.get_cell(x_coord, y_coord)
-                        new_cell = conway(cell[0], sum([n[0] for n in neighbor_values]))
-                        if new_cell:
-                            self.set_cell(x_coord, y_coord, mode='set')
-                        else:
-                            self.set_cell(x_coord, y_coord, mode='clear')
+            return self.list_chunk_step()
+        world, back = self.world, self.back
+        size = self.size
+        table = [bool(value) for value in self.table]
+        if self.profiler is not None:
+            self.profiler.count('cells_evaluated', size * size)
+        population = 0
+        changes = set() if self.tracking() else None
+        for x in range(size):
+            up, row, down = world[x - 1], world[x], world[(x + 1) % size]
+            new_row = back[x]
+            for y in range(size):
+                left, right = y - 1, (y + 1) % size
+                new_row[y] = table[
+                    9 * row[y]
+                    + up[left] + up[y] + up[right] + row[left] + row[right]
+                    + down[left] + down[y] + down[right]
+                ]
+            population += new_row.count(True)
+            if changes is not None and new_row != row:
+                changes.update(
+                    (x, y) for y in range(size) if new_row[y] != row[y]
+                )
+        self.world, self.back = back, world
+        self.population = population
+        return changes
+
+    def list_chunk_step(self):
+        """
+        Helper method that updates an 'infinite' world stored with the 'list'
+        engine by a single time step.
+
+        For every chunk, the chunk together with a border of one cell taken
+        from the neighboring chunks is copied into the 'scratch' bytearray,
+        from which the new chunk is computed into the chunk's buffer in the
+        'back_dict' dictionary. Once every chunk is computed, the buffers are
+        swapped with the chunks. The tile counts of the new chunks (see
+        block_counts) are kept in the 'tile_counts' dictionary.
+        """
+        size, tile = Life.chunk_size, Life.tile_size
+        width = size + 2
+        chunks, back_dict = self.chunk_dict, self.back_dict
+        scratch, zeros = self.scratch, self.zeros
+        table = self.table
+        tile_counts = self.tile_counts
+        no_tiles = bytes((size // tile) ** 2)
+        population = 0
+        evaluated = 0
+        border_chunks = set()
+        changes = set() if self.tracking() else None
+        for (x_index, y_index), chunk in chunks.items():
+            padded_row = 0
+            for x, row_range in ((-1, (size - 1,)), (0, range(size)), (1, (0,))):
+                left = chunks.get((x_index + x, y_index - 1))
+                middle = chunks.get((x_index + x, y_index))
+                right = chunks.get((x_index + x, y_index + 1))
+                for r in row_range:
+                    start = padded_row * width
+                    scratch[start] = left[size * r + size - 1] if left else 0
+                    scratch[start + 1:start + size + 1] = (
+                        middle[size * r:size * (r + 1)] if middle else zeros
+                    )
+                    scratch[start + size + 1] = right[size * r] if right else 0
+                    padded_row += 1
+            back = back_dict.get((x_index, y_index))
+            if back is None:
+                back = back_dict[(x_index, y_index)] = bytearray(size * size)
+            if 1 not in scratch:
+                back[:] = chunk
+                tile_counts[(x_index, y_index)] = no_tiles
+                continue
+            evaluated += 1
+            for x in range(size):
+                for y in range(size):
+                    p = width * (x + 1) + y + 1
+                    back[size * x + y] = table[
+                        9 * scratch[p]
+                        + scratch[p - width - 1] + scratch[p - width]
+                        + scratch[p - width + 1] + scratch[p - 1]
+                        + scratch[p + 1] + scratch[p + width - 1]
+                        + scratch[p + width] + scratch[p + width + 1]
+                    ]
+            if changes is not None and back != chunk:
+                start_x, start_y = size * x_index, size * y_index
+                changes.update(
+                    (start_x + i // size, start_y + i % size)
+                    for i in range(size * size) if back[i] != chunk[i]
+                )
+            tiles = tile_counts[(x_index, y_index)] = block_counts(back, tile)
+            count = sum(tiles)
+            if count:
+                population += count
+                # Chunks next to alive cells on the border of this chunk must
+                # exist, so that cells can be born in them in the next step.
+                first = 1 in back[:size]
+                last = 1 in back[-size:]
+                west = 1 in back[::size]
+                east = 1 in back[size - 1::size]
+                for x, y, alive in (
+                        (-1, 0, first), (1, 0, last), (0, -1, west), (0, 1, east),
+                        (-1, -1, back[0]), (-1, 1, back[size - 1]),
+                        (1, -1, back[-size]), (1, 1, back[-1])):
+                    if alive:
+                        border_chunks.add((x_index + x, y_index + y))
+        for key in chunks:
+            chunks[key], back_dict[key] = back_dict[key], chunks[key]
+        for chunk in border_chunks:
+            self.add_chunk(*chunk)
+        self.population = population
+        if self.profiler is not None:
+            self.profiler.count('cells_evaluated', evaluated * size * size)
+        return changes
+
+    def numpy_step(self):
+        """
+        Helper method that updates a 'torus' world stored as a NumPy array by
+        a single time step.
+
+        The grid is copied into the preallocated 'padded' array, surrounded by
+        a border of one cell that wraps around the edges of the torus. The
+        neighbor sums of all cells are then computed at once by step_band,
+        into the preallocated 'rows' and 'block' arrays, and the new grid is
+        written into the 'back' array, which is then swapped with the current
+        one. If the 'workers' attribute is larger than 1, the grid is instead
+        split into that many bands of rows, which are updated in parallel by a
+        pool of threads, each band using its own rows of the preallocated
+        arrays. Does not increment the 'time' attribute.
+        """
+        import numpy
+        world, back, padded = self.world, self.back, self.padded
+        rows, block = self.rows, self.block
+        padded[1:-1, 1:-1] = world
+        padded[0, 1:-1] = world[-1]
+        padded[-1, 1:-1] = world[0]
+        padded[:, 0] = padded[:, -2]
+        padded[:, -1] = padded[:, 1]
+        table = None
+        if self.table != CONWAY_TABLE:
+            table = numpy.frombuffer(self.table, numpy.uint8)
+        if self.workers > 1:
+            bounds = [self.size * i // self.workers for i in range(self.workers + 1)]
+            list(self.get_pool().map(
+                step_band,
+                [padded[start:end + 2] for start, end in zip(bounds, bounds[1:])],
+                [back[start:end] for start, end in zip(bounds, bounds[1:])],
+                [rows[start:end] for start, end in zip(bounds, bounds[1:])],
+                [block[start:end] for start, end in zip(bounds, bounds[1:])],
+                self.workers * [table]
+            ))
         else:
-            current_world = self.copy_world()
-            self.world = [
-                [conway(
-                    int(current_world.world[x][y]), 
-                    sum([current_world.get_cell(i,j) 
-                         for i,j in current_world.get_neighbors(x,y)])
-                ) 
-                for y in range(self.size) ]
-                for x in range(self.size)
+            step_band(padded, back, rows, block, table)
+        self.world, self.back = back, world
+        self.population = int(numpy.count_nonzero(back))
+        if self.profiler is not None:
+            self.profiler.count('cells_evaluated', self.size * self.size)
+        if self.tracking():
+            x_coords, y_coords = numpy.nonzero(back != world)
+            return set(zip(x_coords.tolist(), y_coords.tolist()))
+        return None
+
+    def sparse_step(self):
+        """
+        Helper method that updates an 'infinite' world stored as a set of alive
+        cells by a single time step.
+
+        Only alive cells and their neighbors can be alive in the next step, so
+        only those cells are looked at: every alive cell adds 1 to the neighbor
+        count of each of its neighbors, and the cells with a nonzero count are
+        then updated by looking up the transition table. If the rule lets
+        cells with no alive neighbors survive (S0), the alive cells with a zero
+        count survive as well. Does not increment the 'time' attribute.
+        """
+        cells = self.cells
+        counts = {}
+        for x_coord, y_coord in cells:
+            for x, y in Life.neighbor_vec:
+                neighbor = (x_coord + x, y_coord + y)
+                counts[neighbor] = counts.get(neighbor, 0) + 1
+        table = self.table
+        self.cells = {
+            cell for cell, neighbor_sum in counts.items()
+            if table[9 * (cell in cells) + neighbor_sum]
+        }
+        if self.survival & 1:
+            self.cells.update(cell for cell in cells if cell not in counts)
+        self.population = len(self.cells)
+        if self.profiler is not None:
+            self.profiler.count('cells_evaluated', len(counts))
+        if self.tracking():
+            return self.cells ^ cells
+        return None
+
+    def bitboard_step(self):
+        """
+        Helper method that updates an 'infinite' world stored with the
+        'bitboard' engine by a single time step. Does not increment the 'time'
+        attribute.
+
+        Every chunk is computed by step_chunks into the chunk's buffer in the
+        'back_dict' dictionary, to be swapped with the chunk once every chunk
+        is computed. If the 'workers' attribute is larger than 1, the chunks
+        are instead split into that many bands (see chunk_bands), which are
+        computed in parallel by a pool of processes: each worker is sent the
+        rows of its band and of the chunks around it, and packs, updates,
+        unpacks and counts them all, so that only splitting the chunks and
+        putting the new ones in place is left to this process.
+        """
+        size = Life.chunk_size
+        chunks = self.chunk_dict
+        rule = (self.birth, self.survival)
+        tracking = self.tracking()
+        if self.workers > 1 and len(chunks) > 1:
+            pool = self.get_pool()
+            futures = [
+                pool.submit(step_chunks, band, halo, rule, None, None, tracking)
+                for band, halo in self.chunk_bands()
             ]
-            self.population = sum([sum(self.world[x]) 
-                                   for x in range(self.size)])
+            population = 0
+            border_chunks = set()
+            changes = set() if tracking else None
+            for future in futures:
+                new_chunks, tiles, count, border, band_changes = future.result()
+                chunks.update(new_chunks)
+                self.tile_counts.update(tiles)
+                population += count
+                border_chunks |= border
+                if changes is not None:
+                    changes |= band_changes
+        else:
+            back_dict, tiles, population, border_chunks, changes = step_chunks(
+                chunks, {}, rule, self.back_dict, self.tile_counts, tracking
+            )
+            for key in chunks:
+                chunks[key], back_dict[key] = back_dict[key], chunks[key]
+        evaluated = len(chunks)
+        for chunk in border_chunks - chunks.keys():
+            self.add_chunk(*chunk)
+        self.population = population
+        if self.profiler is not None:
+            self.profiler.count('cells_evaluated', evaluated * size * size)
+        return changes
+
+    def chunk_bands(self):
+        """
+        Helper method that splits the chunks of an 'infinite' world stored
+        with the 'bitboard' engine into at most 'workers' bands of about as
+        many chunks each, where a band is made of all the chunks whose first
+        chunk coordinate is in some range. Returns a list of ordered pairs
+        (b, h), where b is a dictionary of the chunks of a band, and h a
+        dictionary of its halo: the chunks just above and just below the band,
+        which are the only neighbors of its chunks outside of it.
+        """
+        import bisect
+        chunks = self.chunk_dict
+        keys = sorted(chunks)
+        bands = []
+        start = 0
+        for i in range(1, self.workers + 1):
+            end = len(keys) * i // self.workers
+            if end <= start:
+                continue
+            # The band goes on up to the last chunk in the same row of chunks.
+            end = bisect.bisect_left(keys, (keys[end - 1][0] + 1,))
+            first, last = keys[start][0], keys[end - 1][0]
+            halo = (keys[bisect.bisect_left(keys, (first - 1,)):start]
+                    + keys[end:bisect.bisect_left(keys, (last + 2,))])
+            bands.append(({key: chunks[key] for key in keys[start:end]},
+                          {key: chunks[key] for key in halo}))
+            start = end
+        return bands
+
+    def get_pool(self):
+        """
+        Helper method that returns the pool of workers used for parallel
+        stepping, creating it if needed: a pool of threads for the 'numpy'
+        engine (since NumPy releases the GIL while adding up arrays), and a
+        pool of processes for the 'bitboard' engine.
+        """
+        if self.pool is None:
+            import concurrent.futures
+            if self.engine == 'numpy':
+                self.pool = concurrent.futures.ThreadPoolExecutor(self.workers)
+            else:
+                self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        return self.pool
+
+    def close(self):
+        """
+        Shuts down the pool of workers used for parallel stepping, if there is
+        one. It will be created again if needed.
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
 
     def print_chunk(self, x_index, y_index):
         """
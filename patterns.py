@@ -0,0 +1,434 @@
+import os, re, string
+from operator import mul, or_
+from itertools import chain, compress, islice, repeat
+import life, hashlife
+
+BATCH_SIZE = 65536
+
+# Regular expression matching the count of a run of cells in an RLE pattern.
+RLE_COUNT = re.compile(r'(\d+)')
+
+# Translation table turning the cells of an RLE pattern into binary digits:
+# 'b' is a dead cell and every other letter an alive one.
+RLE_DIGITS = str.maketrans(string.ascii_letters.replace('b', '') + 'b',
+                           51 * '1' + '0')
+
+def read_plaintext(lines):
+    """
+    Given an iterable of 'lines' in the plaintext (.cells) format, yields the
+    coordinates (as ordered pairs of 'int's) of the alive cells they contain,
+    one line at a time, so that large files are never read as a whole.
+
+    Lines starting with '!' are comments. Every other line is a row of cells,
+    with 'O' (or '*') for alive cells and any other character for dead cells.
+    The first character of the first row is the cell (0, 0), and rows go
+    downwards, i.e. towards larger y coordinates.
+    """
+    y = 0
+    for line in lines:
+        if line.startswith('!'):
+            continue
+        for x, char in enumerate(line.rstrip('\r\n')):
+            if char in 'O*':
+                yield (x, y)
+        y += 1
+
+def read_rle(lines):
+    """
+    Given an iterable of 'lines' in the RLE (.rle) format, yields the
+    coordinates (as ordered pairs of 'int's) of the alive cells they contain,
+    one line at a time, so that large files are never read as a whole.
+
+    The first cell of the pattern is the cell (0, 0), unless a '#CXRLE' line
+    gives another position with 'Pos=x,y'. Every state other than 'b' (dead)
+    is read as alive.
+    """
+    for x_coord, y_coord, mask in read_rle_rows(lines):
+        yield from compress(zip(range(x_coord, x_coord + mask.bit_length()),
+                                repeat(y_coord)), mask_bytes(mask))
+
+def read_rle_rows(lines):
+    """
+    Given an iterable of 'lines' in the RLE (.rle) format, yields a tuple
+    (x, y, m) for each row of the pattern with alive cells (see read_rle),
+    where bit i of the 'int' m is the cell (x + i, y).
+
+    Rather than going through the pattern one run at a time, each row is
+    expanded into a string with one character per cell (see expand_row),
+    which is turned into binary digits by a translation table (see
+    RLE_DIGITS), and then into an 'int' at once.
+    """
+    x_start = y_start = 0
+    y = None
+    pending = []
+    for line in lines:
+        if line.startswith('#'):
+            position = re.search(r'Pos\s*=\s*(-?\d+)\s*,\s*(-?\d+)', line)
+            if line.startswith('#CXRLE') and position:
+                x_start, y_start = int(position[1]), int(position[2])
+            continue
+        if y is None:
+            y = y_start
+            if line.lstrip().startswith('x'):
+                continue
+        # Lines are only looked at once a row ends in them, so that a long
+        # row spanning many lines is split once.
+        pending.append(line)
+        if '$' not in line and '!' not in line:
+            continue
+        text, end, rest = ''.join(''.join(pending).split()).partition('!')
+        rows = text.split('$')
+        pending = [] if end else [rows.pop()]
+        for i, row in enumerate(rows):
+            # Every row but the last one ends with the number of rows to move
+            # down (if not 1) before the '$'.
+            cells = row.rstrip(string.digits)
+            digits = expand_row(cells)
+            if '1' in digits:
+                yield (x_start, y, int(digits[::-1], 2))
+            if not end or i + 1 < len(rows):
+                count = row[len(cells):]
+                y += int(count) if count else 1
+        if end:
+            return
+    digits = expand_row(''.join(''.join(pending).split()))
+    if '1' in digits:
+        yield (x_start, y, int(digits[::-1], 2))
+
+def expand_row(text):
+    """
+    Helper function that returns the row of an RLE pattern given by 'text'
+    as a string of binary digits, one per cell (see RLE_DIGITS).
+
+    The text is split around the counts of the runs, and each count is
+    replaced at once by the character following it, repeated one time fewer
+    than the count.
+    """
+    parts = RLE_COUNT.split(text)
+    if len(parts) > 1:
+        texts = parts[2::2]
+        parts[1::2] = map(mul, [text[:1] for text in texts],
+                          [int(count) - 1 for count in parts[1::2]])
+    return ''.join(parts).translate(RLE_DIGITS)
+
+def mask_bytes(mask, length=None):
+    """
+    Helper function that returns the 'int' 'mask' as a bytes object with one
+    byte per cell ('length' of them, by default as many as the bits of the
+    mask): byte i is 1 if bit i of the mask is 1, and 0 otherwise.
+    """
+    if length is None:
+        length = mask.bit_length()
+    return format(mask, f'0{length}b')[::-1].encode().translate(life.DIGIT_BITS)
+
+def read_rle_bands(lines, height=life.Life.chunk_size):
+    """
+    Given an iterable of 'lines' in the RLE (.rle) format, yields a tuple
+    (x, y, c, r) for each band of 'height' rows of the pattern with alive
+    cells (starting at a multiple of 'height'), where c is the number of
+    alive cells in the band and r is the band as a region of cells (see
+    Life.get_region) whose upper-left cell is (x, y), as narrow as its alive
+    cells allow.
+
+    The rows of the band (see read_rle_rows) are turned into bytes objects
+    with one byte per cell, which are transposed all at once with zip.
+    """
+    band = {}
+    index = None
+    for x_coord, y_coord, mask in chain(read_rle_rows(lines), [(0, None, 0)]):
+        if band and (y_coord is None or y_coord // height != index):
+            low = min((mask & -mask).bit_length() - 1 for mask in band.values())
+            width = max(mask.bit_length() for mask in band.values()) - low
+            band_rows = [mask_bytes(band[y] >> low, width) if y in band
+                         else bytes(width)
+                         for y in range(height * index, height * (index + 1))]
+            yield (band_x + low, height * index,
+                   sum(mask.bit_count() for mask in band.values()),
+                   [bytes(cells) for cells in zip(*band_rows)])
+            band = {}
+        if y_coord is not None:
+            index, band_x = y_coord // height, x_coord
+            band[y_coord] = mask
+
+def read_macrocell(lines, tree):
+    """
+    Given an iterable of 'lines' in the Macrocell (.mc) format and a HashLife
+    object 'tree', returns the node of the tree (centered around the cell
+    (0, 0), like the root) described by those lines.
+
+    Every line after the header is a node: either an 8x8 block given row by
+    row, with '.' for dead cells, '*' for alive cells and '$' at the end of
+    each row, or a line 'k a b c d' for a node of level k whose children are
+    the nodes on lines a, b, c and d (counting from 1, with 0 for an empty
+    node). The last node is the whole pattern. Only the table of distinct
+    nodes is kept in memory, never the cells themselves.
+    """
+    nodes = [None]
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '[#':
+            continue
+        if line[0] in '.*$':
+            mask = 0
+            x = y = 0
+            for char in line:
+                if char == '$':
+                    x, y = 0, y + 1
+                else:
+                    if char == '*':
+                        mask |= 1 << (8 * y + x)
+                    x += 1
+            nodes.append(tree.block(mask))
+            continue
+        level, *children = (int(field) for field in line.split())
+        empty = tree.empty(level - 1)
+        nodes.append(tree.join(*(
+            nodes[child] if child else empty for child in children
+        )))
+    root = nodes[-1]
+    if root is None:
+        return tree.empty(3)
+    if root.level == 3:
+        return tree.centre(root)
+    return root
+
+def write_plaintext(world, file, name=None):
+    """
+    Given a Life object 'world' and a text 'file' open for writing, writes
+    all the alive cells of the world in the plaintext (.cells) format, with
+    the upper-left corner of the smallest rectangle containing them as the
+    cell (0, 0). If a 'name' is given, it is written as a comment.
+
+    Only the alive cells are looked at, one row at a time.
+    """
+    if name is not None:
+        file.write(f'!Name: {name}\n')
+    cells = sorted(world.live_cells(), key=lambda cell: (cell[1], cell[0]))
+    if not cells:
+        return
+    min_x = min(x for x, y in cells)
+    row, line = cells[0][1], []
+    for x, y in cells:
+        if y != row:
+            file.write(''.join(line) + '\n' + (y - row - 1) * '\n')
+            row, line = y, []
+        line.extend((x - min_x - len(line)) * '.')
+        line.append('O')
+    file.write(''.join(line) + '\n')
+
+def write_rle(world, file, name=None):
+    """
+    Given a Life object 'world' and a text 'file' open for writing, writes
+    all the alive cells of the world in the RLE (.rle) format, along with a
+    '#CXRLE' line giving the position of the pattern, so that reading it back
+    puts every cell where it was. If a 'name' is given, it is written as a
+    comment.
+
+    Only the alive cells are looked at, and the runs of alive cells in each
+    row are written as they are found.
+    """
+    cells = sorted(world.live_cells(), key=lambda cell: (cell[1], cell[0]))
+    if name is not None:
+        file.write(f'#N {name}\n')
+    if not cells:
+        file.write(f'x = 0, y = 0, rule = {world.rule}\n!\n')
+        return
+    min_x = min(x for x, y in cells)
+    max_x = max(x for x, y in cells)
+    min_y, max_y = cells[0][1], cells[-1][1]
+    file.write(f'#CXRLE Pos={min_x},{min_y}\n')
+    file.write(f'x = {max_x - min_x + 1}, y = {max_y - min_y + 1}, '
+               f'rule = {world.rule}\n')
+    line = ''
+
+    def emit(count, tag):
+        nonlocal line
+        token = (str(count) if count > 1 else '') + tag
+        if len(line) + len(token) > 70:
+            file.write(line + '\n')
+            line = ''
+        line += token
+
+    row, x_next = min_y, min_x
+    run_start = run_end = None
+    for x, y in cells + [(None, None)]:
+        if run_end is not None and (y != row or x != run_end):
+            if run_start > x_next:
+                emit(run_start - x_next, 'b')
+            emit(run_end - run_start, 'o')
+            x_next = run_end
+            run_start = None
+        if x is None:
+            break
+        if y != row:
+            emit(y - row, '$')
+            row, x_next = y, min_x
+        if run_start is None:
+            run_start = x
+        run_end = x + 1
+    file.write(line + '!\n')
+
+def write_macrocell(world, file):
+    """
+    Given a Life object 'world' and a text 'file' open for writing, writes
+    all the alive cells of the world in the Macrocell (.mc) format.
+
+    With the 'hashlife' engine, the nodes of the quadtree are written as
+    they are. Otherwise, a quadtree is first built from the alive cells,
+    without ever building a grid of all the cells.
+    """
+    if world.engine == 'hashlife':
+        tree, root = world.tree, world.tree.root
+    else:
+        tree = hashlife.HashLife()
+        root = tree.build(world.live_cells())
+    file.write(f'[M2] (cgol-tkinter)\n#R {world.rule}\n')
+    indices = {}
+
+    def block(node):
+        rows = []
+        for y in range(8):
+            row = ''.join(
+                '*' if cell_value(node, x, y) else '.' for x in range(8)
+            ).rstrip('.')
+            rows.append(row + '$')
+        return ''.join(rows)
+
+    def cell_value(node, x, y):
+        while node.level > 0:
+            half = 1 << (node.level - 1)
+            if y < half:
+                node = node.nw if x < half else node.ne
+            else:
+                node = node.sw if x < half else node.se
+            x, y = x % half, y % half
+        return node.population
+
+    # The nodes are written children first, using an explicit stack instead
+    # of recursion, and each node is written only once.
+    stack = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        if node.population == 0 or node in indices:
+            continue
+        if node.level == 3:
+            file.write(block(node) + '\n')
+        elif ready:
+            children = [indices.get(child, 0)
+                        for child in (node.nw, node.ne, node.sw, node.se)]
+            file.write(f'{node.level} {children[0]} {children[1]} '
+                       f'{children[2]} {children[3]}\n')
+        else:
+            stack.append((node, True))
+            stack.extend((child, False)
+                         for child in (node.se, node.sw, node.ne, node.nw))
+            continue
+        indices[node] = len(indices) + 1
+
+def pattern_format(path):
+    """
+    Returns the format of the pattern file at the given 'path', based on its
+    extension: 'rle', 'mc' or 'cells' (the default).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    return {'.rle': 'rle', '.mc': 'mc'}.get(extension, 'cells')
+
+def load(world, path, x_offset=0, y_offset=0):
+    """
+    Given a Life object 'world' and the 'path' of a pattern file, sets all the
+    alive cells of the pattern in the world, shifted by ('x_offset',
+    'y_offset').
+
+    The file is read as a stream. An RLE file is loaded in bands of rows (see
+    load_rle). A Macrocell file loaded into a world using the 'hashlife'
+    engine is added to its quadtree directly, without ever listing its cells.
+    The cells of any other file are set in batches of about BATCH_SIZE cells
+    with Life.set_cells.
+    """
+    file_format = pattern_format(path)
+    with open(path) as file:
+        if file_format == 'rle':
+            load_rle(world, file, x_offset, y_offset)
+            return
+        if file_format == 'mc':
+            if world.engine == 'hashlife' and x_offset == y_offset == 0:
+                world.forget_history()
+                world.tree.set_root(read_macrocell(file, world.tree))
+                world.population = world.tree.population
+                return
+            tree = hashlife.HashLife()
+            tree.set_root(read_macrocell(file, tree))
+            cells = tree.live_cells()
+        else:
+            cells = read_plaintext(file)
+        for batch in iter(lambda: list(islice(cells, BATCH_SIZE)), []):
+            world.set_cells(shift(batch, x_offset, y_offset))
+
+def load_rle(world, lines, x_offset=0, y_offset=0):
+    """
+    Given a Life object 'world' and an iterable of 'lines' in the RLE (.rle)
+    format, sets all the alive cells of the pattern in the world, shifted by
+    ('x_offset', 'y_offset'), without ever listing the cells of dense rows:
+    1. With the 'hashlife' engine, the rows (see read_rle_rows) are cut into
+    8x8 blocks (see hashlife.column_blocks), from which the quadtree is built
+    once at the end.
+    2. With the 'list' and 'bitboard' engines, in the 'infinite' case, the
+    pattern is read one band of Life.chunk_size rows at a time (see
+    read_rle_bands), and each band is written with Life.set_region, ORed with
+    the cells already alive in it, if any. The cells of bands with fewer than
+    one alive cell in 16 are set with Life.set_cells instead.
+    3. Otherwise, the cells are set in batches of about BATCH_SIZE cells with
+    Life.set_cells.
+    """
+    size = life.Life.chunk_size
+    if world.engine == 'hashlife':
+        blocks = {}
+        for x_coord, y_coord, mask in read_rle_rows(lines):
+            hashlife.column_blocks(x_coord + x_offset, y_coord + y_offset,
+                                   [mask], blocks)
+        world.forget_history()
+        world.tree.set_root(world.tree.build_blocks(blocks))
+        world.population = world.tree.population
+        return
+    if world.world_type != 'infinite' or world.engine == 'sparse':
+        cells = read_rle(lines)
+        for batch in iter(lambda: list(islice(cells, BATCH_SIZE)), []):
+            world.set_cells(shift(batch, x_offset, y_offset))
+        return
+    for x_coord, y_coord, count, region in read_rle_bands(lines, size):
+        x_coord, y_coord = x_coord + x_offset, y_coord + y_offset
+        if 16 * count < len(region) * size:
+            world.set_cells([
+                cell for i, row in enumerate(region)
+                for cell in zip(repeat(x_coord + i),
+                                compress(range(y_coord, y_coord + size), row))
+            ])
+            continue
+        alive = world.get_region(x_coord, y_coord, len(region), size)
+        if any(1 in row for row in alive):
+            region = [bytes(map(or_, *rows)) for rows in zip(region, alive)]
+        world.set_region(x_coord, y_coord, region)
+
+def shift(cells, x_offset, y_offset):
+    """
+    Returns the list of 'int' cell coordinates 'cells' shifted by
+    ('x_offset', 'y_offset').
+    """
+    if x_offset == y_offset == 0:
+        return cells
+    return [(x + x_offset, y + y_offset) for x, y in cells]
+
+def save(world, path, name=None):
+    """
+    Given a Life object 'world' and a 'path', writes all the alive cells of
+    the world into a pattern file at that path, in the format given by its
+    extension (see pattern_format).
+    """
+    file_format = pattern_format(path)
+    with open(path, 'w') as file:
+        if file_format == 'mc':
+            write_macrocell(world, file)
+        elif file_format == 'rle':
+            write_rle(world, file, name)
+        else:
+            write_plaintext(world, file, name)
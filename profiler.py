@@ -0,0 +1,128 @@
+import csv, json, os
+from collections import deque
+
+class Profiler:
+    """
+    Collects timings and counters from a Life object (and from the LifeWindow
+    showing it), one record per call of Life.step (or per time step, with
+    engines other than 'hashlife').
+
+    A Profiler object is attached to a Life object by setting its 'profiler'
+    attribute. When that attribute is None, which is the default, nothing is
+    recorded, and the only cost is a few checks per time step.
+
+    Timings (in seconds) are recorded with 'time', under the name of the
+    phase they were spent in:
+    1. 'compute': updating the grid.
+    2. 'gc': deleting empty chunks (see Life.collect_chunks).
+    3. 'hash': detecting cycles (see Life.detect_cycles).
+    4. 'timeline': retaining past states (see Life.keep_timeline).
+    5. 'checkpoint': saving snapshots.
+    6. 'copy': copying the world (see Life.copy_world).
+    7. 'draw': drawing the world in a LifeWindow.
+    Counters are recorded with 'count', such as 'cells_evaluated',
+    'chunks_allocated', 'chunks_freed', 'neighbor_lookups', 'nodes_computed'
+    (with the 'hashlife' engine), 'frames', and the canvas items
+    'items_created', 'items_reused' and 'items_hidden'.
+    """
+    def __init__(self, history=10000):
+        """
+        Initializes an empty profiler, which keeps the records of the last
+        'history' calls of Life.step (along with the totals of everything
+        recorded since it was created).
+        """
+        self.records = deque(maxlen=history)
+        self.current = {}
+        self.totals = {}
+        self.phases = set()
+        self.generations = 0
+
+    def time(self, phase, seconds):
+        """
+        Adds a number of 'seconds' spent in the given 'phase' to the current
+        record and to the totals.
+        """
+        self.phases.add(phase)
+        self.current[phase] = self.current.get(phase, 0.0) + seconds
+        self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+
+    def count(self, counter, amount=1):
+        """
+        Adds an 'amount' to the given 'counter', in the current record and in
+        the totals.
+        """
+        self.current[counter] = self.current.get(counter, 0) + amount
+        self.totals[counter] = self.totals.get(counter, 0) + amount
+
+    def end_generation(self, time, generations=1, population=0):
+        """
+        Ends the current record, after the world was updated by 'generations'
+        time steps, up to the time step 'time', with the given 'population'.
+        Everything recorded since the end of the last record (including, for
+        instance, the drawing of the last frame) is part of this record.
+        """
+        record = {'time': time, 'generations': generations,
+                  'population': population}
+        record.update(self.current)
+        self.records.append(record)
+        self.current = {}
+        self.generations += generations
+
+    def columns(self):
+        """
+        Returns the list of the names of all the values found in the records,
+        starting with 'time', 'generations' and 'population'.
+        """
+        names = set()
+        for record in self.records:
+            names.update(record)
+        names -= {'time', 'generations', 'population'}
+        return ['time', 'generations', 'population'] + sorted(names)
+
+    def report(self):
+        """
+        Returns a list of lines (as strings) summing up everything recorded so
+        far: the average time spent in each phase per time step (or, for
+        'draw', per frame), and the total of each counter along with its
+        average per time step.
+        """
+        generations = max(self.generations, 1)
+        frames = max(self.totals.get('frames', 0), 1)
+        lines = [f'generations: {self.generations}']
+        for name, total in sorted(self.totals.items()):
+            if name == 'draw':
+                lines.append(f'frame time: {1000 * total / frames:.3f} ms')
+            elif name in self.phases:
+                lines.append(f'{name}: {1000 * total / generations:.3f} ms/gen')
+            else:
+                lines.append(f'{name}: {total} ({total / generations:.1f}/gen)')
+        return lines
+
+    def write_csv(self, file):
+        """
+        Writes the records into the text 'file' open for writing, in the CSV
+        format, with one row per record and one column per value (see
+        'columns').
+        """
+        writer = csv.DictWriter(file, self.columns(), restval=0)
+        writer.writeheader()
+        writer.writerows(self.records)
+
+    def write_json(self, file):
+        """
+        Writes the totals and the records into the text 'file' open for
+        writing, in the JSON format.
+        """
+        json.dump({'generations': self.generations, 'totals': self.totals,
+                   'records': list(self.records)}, file, indent=2)
+
+    def save(self, path):
+        """
+        Saves the records into the file at the given 'path': in the JSON
+        format if its extension is '.json', and in the CSV format otherwise.
+        """
+        with open(path, 'w', newline='') as file:
+            if os.path.splitext(path)[1].lower() == '.json':
+                self.write_json(file)
+            else:
+                self.write_csv(file)
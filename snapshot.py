@@ -0,0 +1,259 @@
+import mmap, os, struct
+import life, hashlife
+
+# A snapshot file is made of:
+# 1. A header (HEADER), with the world type (0 = 'infinite', 1 = 'torus'),
+# the engine, size, time and population of the world, the number of chunks
+# stored and the offset of the index, followed (since version 2) by the rule
+# string of the world (RULE).
+# 2. The alive chunks, each one stored as chunk_size little-endian 32-bit
+# rows (CHUNK), where bit y of row x is the cell (x, y) of the chunk -- the
+# same layout as the 'bitboard' engine. In the 'torus' case, the grid is cut
+# into chunks the same way, starting from the cell (0, 0).
+# 3. The index: an entry (INDEX_ENTRY) for every chunk, with its chunk
+# coordinates and its offset, sorted by chunk coordinates.
+MAGIC = b'LIFESNAP'
+VERSION = 2
+HEADER = struct.Struct('<8sHB16sQQQQQ')
+RULE = struct.Struct('32s')
+CHUNK = struct.Struct(f'<{life.Life.chunk_size}I')
+INDEX_ENTRY = struct.Struct('<qqQ')
+WORLD_TYPES = ('infinite', 'torus')
+
+def chunk_data(world):
+    """
+    Given a Life object 'world', yields an ordered pair (k, d) for every
+    chunk of the world with alive cells in it, where k is the key of the chunk
+    and d its packed rows, as stored in a snapshot file (see CHUNK).
+    """
+    size = life.Life.chunk_size
+    if world.engine == 'bitboard':
+        for key, rows in world.chunk_dict.items():
+            if any(rows):
+                yield (key, CHUNK.pack(*rows))
+    elif world.engine == 'list' and world.world_type == 'infinite':
+        for key, chunk in world.chunk_dict.items():
+            if 1 in chunk:
+                yield (key, CHUNK.pack(*(
+                    int(chunk[size * x:size * (x + 1)].translate(
+                        life.BIT_DIGITS
+                    )[::-1], 2) for x in range(size)
+                )))
+    elif world.engine == 'numpy':
+        import numpy
+        count = -(-world.size // size)
+        packed = numpy.zeros((count * size, count * size // 8), dtype=numpy.uint8)
+        bits = numpy.packbits(world.world, axis=1, bitorder='little')
+        packed[:world.size, :bits.shape[1]] = bits
+        blocks = packed.reshape(count, size, count, size // 8).swapaxes(1, 2)
+        for x_index, y_index in zip(*numpy.nonzero(blocks.any(axis=(2, 3)))):
+            yield ((int(x_index), int(y_index)),
+                   blocks[x_index, y_index].tobytes())
+    else:
+        chunks = {}
+        for x, y in world.live_cells():
+            rows = chunks.get((x // size, y // size))
+            if rows is None:
+                rows = chunks[(x // size, y // size)] = size * [0]
+            rows[x % size] |= 1 << (y % size)
+        for key, rows in chunks.items():
+            yield (key, CHUNK.pack(*rows))
+
+def save(world, path):
+    """
+    Given a Life object 'world', saves a snapshot of it into the file at the
+    given 'path'.
+
+    The snapshot is first written into a temporary file next to it, which is
+    then flushed to disk and renamed, so that the file at 'path' always holds
+    a complete snapshot -- even if the process dies while saving.
+    """
+    temporary = path + '.tmp'
+    index = []
+    with open(temporary, 'wb') as file:
+        file.write(bytes(HEADER.size))
+        file.write(RULE.pack(world.rule.encode()))
+        offset = HEADER.size + RULE.size
+        for key, data in chunk_data(world):
+            file.write(data)
+            index.append((key, offset))
+            offset += CHUNK.size
+        index.sort()
+        for (x_index, y_index), chunk_offset in index:
+            file.write(INDEX_ENTRY.pack(x_index, y_index, chunk_offset))
+        file.seek(0)
+        file.write(HEADER.pack(
+            MAGIC, VERSION, WORLD_TYPES.index(world.world_type),
+            world.engine.encode(), world.size or 0, world.time,
+            world.population, len(index), offset
+        ))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def load(path, engine=None, **options):
+    """
+    Returns a Life object restored from the snapshot file at the given 'path'
+    (see Snapshot.to_life), using the given 'engine' (by default, the one the
+    snapshot was saved with) and any other keyword arguments of Life.
+    """
+    with Snapshot(path) as snapshot:
+        return snapshot.to_life(engine, **options)
+
+class Snapshot:
+    """
+    A snapshot file, opened with mmap: only the header is read when it is
+    opened, and a chunk is only read from the file when it is looked at, so
+    single chunks of a huge snapshot can be inspected at once.
+    """
+    def __init__(self, path):
+        """
+        Opens the snapshot file at the given 'path', and reads its header into
+        the attributes 'world_type', 'engine', 'size' (None in the 'infinite'
+        case), 'time', 'population', 'chunk_count' and 'rule'. Raises a
+        ValueError if the file is not a snapshot file.
+        """
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f'not a snapshot file: {path!r}')
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, world_type, engine, size, self.time, self.population,
+         self.chunk_count, self.index_offset) = HEADER.unpack_from(self.map)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            self.close()
+            raise ValueError(f'not a snapshot file: {path!r}')
+        self.rule = 'B3/S23'
+        if version >= 2:
+            rule = RULE.unpack_from(self.map, HEADER.size)[0]
+            self.rule = rule.rstrip(b'\0').decode()
+        self.world_type = WORLD_TYPES[world_type]
+        self.engine = engine.rstrip(b'\0').decode()
+        self.size = size if self.world_type == 'torus' else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        """
+        Closes the memory map of the file.
+        """
+        self.map.close()
+
+    def entry(self, i):
+        """
+        Helper method that returns the entry number 'i' of the index, as an
+        ordered pair (k, o), where k is the key of the chunk and o its offset.
+        """
+        x_index, y_index, offset = INDEX_ENTRY.unpack_from(
+            self.map, self.index_offset + INDEX_ENTRY.size * i
+        )
+        return ((x_index, y_index), offset)
+
+    def keys(self):
+        """
+        Yields the keys of all the chunks stored in the snapshot, in order.
+        """
+        for i in range(self.chunk_count):
+            yield self.entry(i)[0]
+
+    def get_chunk(self, x_index, y_index):
+        """
+        Given 'int' chunk coordinates ('x_index', 'y_index'), returns the
+        chunk with those coordinates as a tuple of chunk_size 'int' rows,
+        where bit y of row x is the cell (x, y) of the chunk.
+
+        The chunk is found with a binary search in the index, so only a few
+        entries of the index and the chunk itself are read from the file.
+        """
+        low, high = 0, self.chunk_count
+        while low < high:
+            middle = (low + high) // 2
+            key, offset = self.entry(middle)
+            if key == (x_index, y_index):
+                return CHUNK.unpack_from(self.map, offset)
+            elif key < (x_index, y_index):
+                low = middle + 1
+            else:
+                high = middle
+        return life.Life.chunk_size * (0,)
+
+    def print_chunk(self, x_index, y_index):
+        """
+        Given an ordered pair of 'int' chunk coordinates ('x_index', 'y_index'),
+        prints the chunk with the given coordinates in the terminal, like
+        Life.print_chunk, without restoring the world.
+        """
+        size = life.Life.chunk_size
+        print('+' + (size * '-') + '+')
+        for row in self.get_chunk(x_index, y_index):
+            print('|' + ''.join(
+                '#' if (row >> y) & 1 else ' ' for y in range(size)
+            ) + '|')
+        print('+' + (size * '-') + '+')
+
+    def to_life(self, engine=None, **options):
+        """
+        Returns a Life object restored from the snapshot, using the given
+        'engine' (by default, the one the snapshot was saved with) and any
+        other keyword arguments of Life (by default, with the rule of the saved
+        world), with the 'time' and 'population' attributes of the saved
+        world.
+
+        With the 'bitboard' and 'numpy' engines, the packed rows are copied
+        into the world as they are; with the 'hashlife' engine, the quadtree
+        is built once from all the chunks.
+        """
+        size = life.Life.chunk_size
+        options.setdefault('rule', self.rule)
+        world = life.Life(self.world_type, self.size, engine or self.engine,
+                          **options)
+        if world.engine == 'numpy':
+            import numpy
+            count = -(-self.size // size)
+            packed = numpy.zeros((count * size, count * size // 8),
+                                 dtype=numpy.uint8)
+            for i in range(self.chunk_count):
+                (x_index, y_index), offset = self.entry(i)
+                packed[size * x_index:size * (x_index + 1),
+                       size // 8 * y_index:size // 8 * (y_index + 1)] = (
+                    numpy.frombuffer(self.map, numpy.uint8, CHUNK.size, offset)
+                    .reshape(size, size // 8)
+                )
+            world.world[:] = numpy.unpackbits(
+                packed, axis=1, bitorder='little'
+            )[:self.size, :self.size]
+        elif world.engine == 'hashlife':
+            blocks = {}
+            for i in range(self.chunk_count):
+                (x_index, y_index), offset = self.entry(i)
+                hashlife.row_blocks(size * x_index, size * y_index,
+                                    CHUNK.unpack_from(self.map, offset), blocks)
+            world.tree.set_root(world.tree.build_blocks(blocks))
+        elif world.engine == 'bitboard':
+            for i in range(self.chunk_count):
+                (x_index, y_index), offset = self.entry(i)
+                world.add_chunk(x_index, y_index)
+                world.chunk_dict[(x_index, y_index)][:] = CHUNK.unpack_from(
+                    self.map, offset
+                )
+                for x, y in life.Life.neighbor_vec:
+                    world.add_chunk(x_index + x, y_index + y)
+        else:
+            for i in range(self.chunk_count):
+                (x_index, y_index), offset = self.entry(i)
+                rows = CHUNK.unpack_from(self.map, offset)
+                width = height = size
+                if self.size is not None:
+                    width = min(size, self.size - size * x_index)
+                    height = min(size, self.size - size * y_index)
+                world.set_region(size * x_index, size * y_index, [
+                    format(row, f'0{size}b')[::-1][:height].encode().translate(
+                        life.DIGIT_BITS
+                    ) for row in rows[:width]
+                ])
+        world.time = self.time
+        world.population = self.population
+        return world
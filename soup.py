@@ -0,0 +1,321 @@
+import argparse, csv, json, os, time
+from collections import Counter
+from functools import lru_cache
+from itertools import repeat
+import life
+
+# A soup is stabilized once its population has been periodic, with a period
+# of at most MAX_PERIOD, for the last WINDOW time steps; this is checked
+# every CHECK_EVERY time steps.
+MAX_PERIOD = 30
+WINDOW = 4 * MAX_PERIOD
+CHECK_EVERY = MAX_PERIOD
+
+def stabilize(world, max_generations):
+    """
+    Given a Life object 'world', updates it one time step at a time until it
+    is stabilized (see WINDOW), or until its 'time' attribute reaches
+    'max_generations'. Returns the period of its population, or None if it
+    did not stabilize in time.
+
+    Only the population is looked at, so spaceships flying away (which
+    never let the whole world repeat itself) do not keep a soup from being
+    stabilized.
+    """
+    populations = [world.population]
+    while world.time < max_generations:
+        world.step()
+        populations.append(world.population)
+        if world.population == 0:
+            return 1
+        if len(populations) > WINDOW and world.time % CHECK_EVERY == 0:
+            recent = populations[-WINDOW:]
+            for period in range(1, MAX_PERIOD + 1):
+                if recent[period:] == recent[:-period]:
+                    return period
+    return None
+
+def separate(cells):
+    """
+    Given an iterable of 'int' cell coordinates 'cells', returns the list of
+    the objects they make up, each one as a list of coordinates: two alive
+    cells at most 2 cells apart (horizontally and vertically) can affect the
+    same dead cell, so they are put in the same object.
+
+    Objects close enough to each other to be in contact (such as two blocks
+    with a single dead cell between them) are therefore counted as a single
+    object.
+    """
+    remaining = set(cells)
+    objects = []
+    while remaining:
+        stack = [remaining.pop()]
+        cells = []
+        while stack:
+            x_coord, y_coord = stack.pop()
+            cells.append((x_coord, y_coord))
+            for x in range(-2, 3):
+                for y in range(-2, 3):
+                    cell = (x_coord + x, y_coord + y)
+                    if cell in remaining:
+                        remaining.remove(cell)
+                        stack.append(cell)
+        objects.append(cells)
+    return objects
+
+def normalize(cells):
+    """
+    Returns the 'int' cell coordinates 'cells' translated so that the
+    smallest x and y coordinates are 0, as a frozenset.
+    """
+    min_x = min(x for x, y in cells)
+    min_y = min(y for x, y in cells)
+    return frozenset((x - min_x, y - min_y) for x, y in cells)
+
+def encode(cells):
+    """
+    Helper function that returns the normalized 'cells' (see normalize) as
+    a string: the rows of the smallest rectangle containing them, from the
+    smallest y coordinate, as hexadecimal masks of their x coordinates
+    separated by dots.
+    """
+    rows = [0] * (max(y for x, y in cells) + 1)
+    for x, y in cells:
+        rows[y] |= 1 << x
+    return '.'.join(format(row, 'x') for row in rows)
+
+def canonical(phases):
+    """
+    Given the list of the 'phases' of an object (each one a collection of
+    'int' cell coordinates), returns the shortest of the encodings (see
+    encode) of all the phases, rotated and reflected in every possible way
+    -- the smallest one alphabetically, if several are as short. The same
+    object always gets the same string, whatever its phase, position and
+    orientation.
+    """
+    codes = []
+    for cells in phases:
+        for x_sign, y_sign, swap in ((x_sign, y_sign, swap)
+                                     for x_sign in (1, -1)
+                                     for y_sign in (1, -1)
+                                     for swap in (False, True)):
+            codes.append(encode(normalize([
+                (y_sign * y, x_sign * x) if swap else (x_sign * x, y_sign * y)
+                for x, y in cells
+            ])))
+    return min(codes, key=lambda code: (len(code), code))
+
+@lru_cache(maxsize=65536)
+def classify(cells, rule='B3/S23'):
+    """
+    Given the normalized cells of an object (see normalize) and a 'rule'
+    string, returns the name of the object, made of a prefix and its
+    canonical string (see canonical), separated by an underscore:
+    1. 'xs' and the population, for a still life (such as 'xs4_3.3' for the
+    block).
+    2. 'xp' and the period, for an oscillator (such as 'xp2_7' for the
+    blinker).
+    3. 'xq' and the period, for a spaceship (such as 'xq4_...' for the
+    glider).
+    If the object is not periodic on its own, with a period of at most
+    MAX_PERIOD, returns 'unknown' and its population instead.
+
+    The object is run alone, with cycle detection (see
+    Life.detect_cycles). Results are cached, since most soups are made of
+    the same few objects.
+    """
+    world = life.Life('infinite', None, 'sparse', rule=rule)
+    world.set_cells(cells)
+    world.detect_cycles(2 * MAX_PERIOD)
+    while world.cycle is None and world.time < 2 * MAX_PERIOD:
+        world.step()
+    if world.cycle is None or world.cycle[0] > MAX_PERIOD:
+        return f'unknown_{len(cells)}'
+    period, x_offset, y_offset = world.cycle
+    phases = []
+    for i in range(period):
+        phases.append(list(world.live_cells()))
+        world.step()
+    if period == 1:
+        prefix = f'xs{len(cells)}'
+    elif x_offset == y_offset == 0:
+        prefix = f'xp{period}'
+    else:
+        prefix = f'xq{period}'
+    return f'{prefix}_{canonical(phases)}'
+
+def search(seed, side=16, density=0.5, rule='B3/S23', engine='bitboard',
+           max_generations=20000):
+    """
+    Runs the soup given by 'seed': a 'side' x 'side' square of an 'infinite'
+    world, filled at random with the given 'density' and 'seed' (see
+    Life.random_fill), updated with the given 'rule' and 'engine' until it
+    is stabilized (see stabilize).
+
+    Returns a tuple (s, g, o), where s is the 'seed', g the number of time
+    steps it took to stabilize, and o the list of the names of the objects
+    it stabilized into (see separate and classify), or None if it did not
+    stabilize within 'max_generations' time steps.
+    """
+    world = life.Life('infinite', None, engine, rule=rule)
+    world.random_fill(0, 0, side, side, density, seed)
+    if stabilize(world, max_generations) is None:
+        return (seed, world.time, None)
+    names = [classify(normalize(cells), rule)
+             for cells in separate(world.live_cells())]
+    return (seed, world.time, names)
+
+class Census:
+    """
+    The aggregated results of a soup search: the number of times each object
+    was found (in the 'counts' Counter), the first soup each one was found
+    in (in the 'samples' dictionary), and the seeds of the soups that did not
+    stabilize.
+    """
+    def __init__(self, rule='B3/S23', side=16, density=0.5):
+        """
+        Initializes an empty census of soups of the given 'side' and
+        'density', run with the given 'rule'.
+        """
+        self.rule = life.rule_string(*life.parse_rule(rule))
+        self.side = side
+        self.density = density
+        self.counts = Counter()
+        self.samples = {}
+        self.unstabilized = []
+        self.soups = 0
+        self.generations = 0
+
+    def add(self, result):
+        """
+        Adds the 'result' of a soup (as returned by search) to the census.
+        """
+        seed, generations, names = result
+        self.soups += 1
+        self.generations += generations
+        if names is None:
+            self.unstabilized.append(seed)
+            return
+        self.counts.update(names)
+        for name in names:
+            self.samples.setdefault(name, seed)
+
+    def write_csv(self, file):
+        """
+        Writes the census into the text 'file' open for writing, in the CSV
+        format, with one row per object (its name, how many times it was
+        found and the seed of the first soup it was found in), from the most
+        common one.
+        """
+        writer = csv.writer(file)
+        writer.writerow(['object', 'count', 'sample_seed'])
+        for name, count in self.counts.most_common():
+            writer.writerow([name, count, self.samples[name]])
+
+    def write_json(self, file):
+        """
+        Writes the census, along with the parameters of the soups and the
+        seeds of the soups that did not stabilize, into the text 'file' open
+        for writing, in the JSON format.
+        """
+        json.dump({
+            'rule': self.rule, 'side': self.side, 'density': self.density,
+            'soups': self.soups, 'generations': self.generations,
+            'unstabilized': self.unstabilized,
+            'objects': dict(self.counts.most_common()),
+            'samples': self.samples,
+        }, file, indent=2)
+
+    def save(self, path):
+        """
+        Saves the census into the file at the given 'path': in the JSON
+        format if its extension is '.json', and in the CSV format otherwise.
+        """
+        with open(path, 'w', newline='') as file:
+            if os.path.splitext(path)[1].lower() == '.json':
+                self.write_json(file)
+            else:
+                self.write_csv(file)
+
+def run(census, seeds, workers=1, engine='bitboard', max_generations=20000):
+    """
+    Runs the soups with the given 'seeds' (see search), with the parameters
+    of the Census object 'census', and adds their results to it. If
+    'workers' is larger than 1, the soups are run in parallel by a pool of
+    that many processes.
+
+    The results are added in the order of the seeds, so the census is the
+    same whatever the number of workers. Returns the number of seconds the
+    soups took.
+    """
+    seeds = list(seeds)
+    arguments = (seeds, repeat(census.side), repeat(census.density),
+                 repeat(census.rule), repeat(engine), repeat(max_generations))
+    start = time.perf_counter()
+    if workers > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            chunk_size = max(1, len(seeds) // (16 * workers))
+            for result in pool.map(search, *arguments, chunksize=chunk_size):
+                census.add(result)
+    else:
+        for result in map(search, *arguments):
+            census.add(result)
+    return time.perf_counter() - start
+
+def main(argv=None):
+    """
+    Runs a soup search as specified by the command line arguments 'argv'
+    (by default, those the program was called with), saves the census and
+    prints how fast it ran, along with the most common objects.
+    """
+    parser = argparse.ArgumentParser(
+        description='Runs random soups and counts the objects they '
+                    'stabilize into.'
+    )
+    parser.add_argument('-n', '--soups', type=int, required=True,
+                        help='number of soups to run')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the first soup; the next soups get the '
+                             'next seeds (default: 0)')
+    parser.add_argument('--side', type=int, default=16,
+                        help='side of the square of random cells (default: 16)')
+    parser.add_argument('--density', type=float, default=0.5,
+                        help='density of the random cells (default: 0.5)')
+    parser.add_argument('--rule', default='B3/S23',
+                        help="rule string (default: B3/S23)")
+    parser.add_argument('--engine', choices=['list', 'sparse', 'hashlife', 'bitboard'],
+                        default='bitboard',
+                        help='engine used to run the soups (default: bitboard)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of processes (default: number of cores)')
+    parser.add_argument('--max-generations', type=int, default=20000,
+                        metavar='N',
+                        help='give up on soups not stabilized after N time '
+                             'steps (default: 20000)')
+    parser.add_argument('-o', '--output', default='census.csv',
+                        help='file to save the census in, as CSV or JSON '
+                             '(default: census.csv)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='number of the most common objects to print')
+    args = parser.parse_args(argv)
+
+    census = Census(args.rule, args.side, args.density)
+    seconds = run(census, range(args.seed, args.seed + args.soups),
+                  args.workers, args.engine, args.max_generations)
+    census.save(args.output)
+    print(f'soups: {census.soups}')
+    print(f'unstabilized: {len(census.unstabilized)}')
+    print(f'objects: {sum(census.counts.values())} '
+          f'({len(census.counts)} distinct)')
+    print(f'seconds: {seconds:.3f}')
+    if seconds > 0:
+        print(f'soups/sec: {census.soups / seconds:.1f}')
+        cores = min(args.workers, os.cpu_count() or 1)
+        print(f'soups/sec per core: {census.soups / seconds / cores:.1f}')
+        print(f'generations/sec: {census.generations / seconds:.1f}')
+    for name, count in census.counts.most_common(args.top):
+        print(f'{count:8d}  {name}')
+
+if __name__ == '__main__':
+    main()
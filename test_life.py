@@ -0,0 +1,427 @@
+import random, tracemalloc
+import pytest
+import life
+
+def reference_step(cells, size=None, rule=life.CONWAY_RULE):
+    """
+    Returns the set of alive cells after one time step from the set of alive
+    'cells', computed cell by cell with the ordered pair 'rule' of birth and
+    survival masks (see life.parse_rule), on a 'size' x 'size' torus, or on
+    an infinite grid if 'size' is None. With the default rule, each cell is
+    computed with life.conway instead.
+    """
+    counts = {}
+    for x_coord, y_coord in cells:
+        for x, y in life.Life.neighbor_vec:
+            neighbor = (x_coord + x, y_coord + y)
+            if size is not None:
+                neighbor = (neighbor[0] % size, neighbor[1] % size)
+            counts[neighbor] = counts.get(neighbor, 0) + 1
+    candidates = set(counts) | set(cells)
+    if rule == life.CONWAY_RULE:
+        return {cell for cell in candidates
+                if life.conway(1 if cell in cells else 0, counts.get(cell, 0))}
+    birth, survival = rule
+    if birth & 1:
+        candidates = {(x, y) for x in range(size) for y in range(size)}
+    return {cell for cell in candidates
+            if ((survival if cell in cells else birth)
+                >> counts.get(cell, 0)) & 1}
+
+def soup(side, density=0.4, seed=1):
+    """
+    Returns a set of random cells in a 'side' x 'side' square, alive with
+    probability 'density'.
+    """
+    generator = random.Random(seed)
+    return {(x, y) for x in range(side) for y in range(side)
+            if generator.random() < density}
+
+ENGINES = [
+    ('torus', 'list', {}),
+    ('torus', 'numpy', {}),
+    ('infinite', 'list', {}),
+    ('infinite', 'sparse', {}),
+    ('infinite', 'hashlife', {}),
+    ('infinite', 'bitboard', {}),
+    ('infinite', 'bitboard', {'workers': 2}),
+]
+
+RULES = [
+    ('B3/S23', 1 << 3, 1 << 2 | 1 << 3),
+    ('B36/S23', 1 << 3 | 1 << 6, 1 << 2 | 1 << 3),
+    ('B2/S', 1 << 2, 0),
+    ('B3678/S34678', 0b111001000, 0b111011000),
+    ('B3/S023', 1 << 3, 1 << 0 | 1 << 2 | 1 << 3),
+    ('B1/S1', 1 << 1, 1 << 1),
+    ('B0/S8', 1 << 0, 1 << 8),
+]
+
+@pytest.mark.parametrize('world_type, engine, options, rule, birth, survival', [
+    (*engine, *rule) for engine in ENGINES for rule in RULES
+    # Rules where cells are born with no alive neighbors need a torus.
+    if engine[0] == 'torus' or not rule[1] & 1
+])
+def test_engines_match_conway(world_type, engine, options, rule, birth,
+                              survival):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 40 if world_type == 'torus' else None
+    cells = soup(40)
+    world = life.Life(world_type, size, engine, rule=rule, **options)
+    assert (world.birth, world.survival) == (birth, survival)
+    assert world.rule == rule
+    world.set_cells(cells)
+    for generation in range(30):
+        world.step()
+        cells = reference_step(cells, size, (birth, survival))
+        assert set(world.live_cells()) == cells
+        assert world.population == len(cells)
+    world.close()
+
+@pytest.mark.parametrize('world_type, engine, options', ENGINES)
+def test_timeline_rewind_matches_stepping(world_type, engine, options):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 40 if world_type == 'torus' else None
+    cells = soup(24)
+    world = life.Life(world_type, size, engine, **options)
+    world.set_cells(cells)
+    world.keep_timeline(keyframe_every=8)
+    states = [cells]
+    for generation in range(40):
+        world.step()
+        states.append(reference_step(states[-1], size))
+    timeline = world.timeline
+    assert timeline.retained() == list(range(41))
+    # The changes are not known with the 'hashlife' engine, so every state
+    # is a keyframe.
+    assert timeline.keyframes == [engine == 'hashlife' or time % 8 == 0
+                                  for time in range(41)]
+    for time in list(range(40, -1, -1)) + list(range(41)) + [37, 3, 21]:
+        world.rewind(time)
+        assert world.time == time
+        assert set(world.live_cells()) == states[time]
+        assert world.population == len(states[time])
+    world.close()
+
+def test_timeline_scrubbing_uses_cached_state():
+    import timeline
+    world = life.Life('infinite', None, 'list')
+    world.set_cells(soup(24))
+    world.keep_timeline(keyframe_every=16)
+    world.step(15)
+    states = [world.timeline.cells(time) for time in range(16)]
+    world.rewind(7)
+    # Once a state is rebuilt, its neighbors are rebuilt from it with a
+    # single delta, in either direction, without looking at the keyframe.
+    world.timeline.data[0] = timeline.array('q')
+    for time in list(range(8, 16)) + list(range(14, 1, -1)):
+        world.rewind(time)
+        assert set(world.live_cells()) == states[time]
+    # Without it, the state is rebuilt from the keyframe.
+    world.timeline.cached = None
+    world.rewind(5)
+    assert set(world.live_cells()) != states[5]
+
+def test_timeline_evicts_oldest_keyframes():
+    import sys
+    world = life.Life('infinite', None, 'list')
+    world.set_cells(soup(32))
+    world.keep_timeline(budget=20000, keyframe_every=4)
+    states = {0: set(world.live_cells())}
+    for generation in range(60):
+        world.step()
+        states[world.time] = set(world.live_cells())
+        timeline = world.timeline
+        assert timeline.size <= 20000 or timeline.keyframes.count(True) == 1
+    retained = timeline.retained()
+    assert retained[0] > 0 and retained[-1] == 60
+    assert retained == list(range(retained[0], 61))
+    assert timeline.keyframes[0]
+    assert timeline.size == sum(sys.getsizeof(data) for data in timeline.data)
+    for time in retained:
+        world.rewind(time)
+        assert set(world.live_cells()) == states[time]
+    with pytest.raises(ValueError):
+        world.rewind(retained[0] - 1)
+
+@pytest.mark.parametrize('world_type, engine, options', ENGINES)
+def test_timeline_truncates_after_rewind(world_type, engine, options):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 40 if world_type == 'torus' else None
+    cells = soup(24)
+    world = life.Life(world_type, size, engine, **options)
+    world.set_cells(cells)
+    world.keep_timeline(keyframe_every=8)
+    for generation in range(20):
+        world.step()
+    world.rewind(10)
+    # The later states are kept until the world is updated...
+    assert world.timeline.newest() == 20
+    world.step()
+    assert world.timeline.retained() == list(range(12))
+    for generation in range(11):
+        cells = reference_step(cells, size)
+    assert set(world.live_cells()) == cells
+    # ...or its cells are changed, which turns the current state into a
+    # keyframe.
+    world.rewind(5)
+    world.set_cell(30, 30)
+    world.step()
+    assert world.timeline.retained() == list(range(7))
+    assert world.timeline.keyframes[5]
+    world.rewind(5)
+    assert (30, 30) in set(world.live_cells())
+    world.close()
+
+def test_hashlife_jump_matches_conway():
+    cells = soup(24)
+    world = life.Life('infinite', None, 'hashlife')
+    world.set_cells(cells)
+    world.step(64)
+    for generation in range(64):
+        cells = reference_step(cells)
+    assert set(world.live_cells()) == cells
+
+def blinkers(count, spacing=40):
+    """
+    Returns a grid of 'count' x 'count' blinkers, 'spacing' cells apart, so
+    that the world spans several chunks but never grows.
+    """
+    return [(spacing * i + k, spacing * j)
+            for i in range(count) for j in range(count) for k in range(3)]
+
+@pytest.mark.parametrize('world_type, engine, cells, options', [
+    ('torus', 'list', soup(64), {}),
+    ('torus', 'numpy', soup(64), {}),
+    ('torus', 'numpy', soup(64), {'workers': 2}),
+    ('infinite', 'list', blinkers(2), {}),
+    ('infinite', 'bitboard', blinkers(2), {}),
+])
+def test_allocations_per_step_stay_flat(world_type, engine, cells, options):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    world = life.Life(world_type, 64 if world_type == 'torus' else None, engine,
+                      **options)
+    world.set_cells(cells)
+    for generation in range(20):
+        world.step()
+    tracemalloc.start()
+    try:
+        world.step()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for generation in range(30):
+            world.step()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        world.close()
+    # The double buffers mean that nothing grows with the number of steps
+    # taken, and that no step allocates a copy of the grid.
+    assert after - before < 4096
+    assert peak - before < 16384
+
+GLIDER = [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]
+
+@pytest.mark.parametrize('engine', ['list', 'sparse', 'hashlife', 'bitboard'])
+@pytest.mark.parametrize('generations', [10, 11, 13, 100])
+def test_headless_skip_matches_stepping(engine, generations):
+    import headless
+    world = life.Life('infinite', None, engine)
+    world.set_cells(GLIDER)
+    world.detect_cycles(64)
+    headless.run(world, generations, on_cycle='skip')
+    cells = set(GLIDER)
+    for generation in range(generations):
+        cells = reference_step(cells)
+    assert world.time == generations
+    assert set(world.live_cells()) == cells
+
+def test_hashlife_cache_stays_within_limit():
+    import hashlife
+    cells = soup(48)
+    tree = hashlife.HashLife(cache_limit=5000)
+    tree.set_cells(cells)
+    largest = 0
+    join = tree.join
+
+    def counting_join(*quads):
+        nonlocal largest
+        largest = max(largest, len(tree.cache) + len(tree.results))
+        return join(*quads)
+
+    tree.join = counting_join
+    tree.advance(64)
+    for generation in range(64):
+        cells = reference_step(cells)
+    assert set(tree.live_cells()) == cells
+    assert largest < 5100
+    assert tree.working == []
+
+@pytest.mark.parametrize('world_type, engine', [
+    ('torus', 'list'),
+    ('torus', 'numpy'),
+    ('infinite', 'list'),
+    ('infinite', 'sparse'),
+    ('infinite', 'hashlife'),
+    ('infinite', 'bitboard'),
+])
+@pytest.mark.parametrize('block', [1, 3, 4, 8, 16, 32, 45])
+@pytest.mark.parametrize('x_coord, y_coord', [(-7, 5), (-16, 8)])
+def test_density_counts_every_block(world_type, engine, block, x_coord, y_coord):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 37 if world_type == 'torus' else None
+    cells = soup(size or 100)
+    world = life.Life(world_type, size, engine)
+    world.set_cells(cells)
+    world.step()
+    cells = reference_step(cells, size)
+    width, height = 120 // block + 1, 90 // block + 1
+    expected = [height * [0] for i in range(width)]
+    for i in range(width * block):
+        for j in range(height * block):
+            x, y = x_coord + i, y_coord + j
+            if size is not None:
+                x, y = x % size, y % size
+            if (x, y) in cells:
+                expected[i // block][j // block] += 1
+    assert world.density(x_coord, y_coord, width, height, block) == expected
+
+@pytest.mark.parametrize('world_type, engine, options', ENGINES)
+def test_rle_load_matches_cells(world_type, engine, options, tmp_path):
+    import patterns
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 200 if world_type == 'torus' else None
+    # A dense soup, a sparse row far away and a run longer than a line.
+    cells = soup(70) | {(300 + 7 * i, 90) for i in range(20)}
+    cells |= {(x, -40) for x in range(-130, 20)}
+    source = life.Life('infinite', None, 'sparse')
+    source.set_cells(cells)
+    path = str(tmp_path / 'pattern.rle')
+    patterns.save(source, path)
+    world = life.Life(world_type, size, engine, **options)
+    world.set_cells([(1, 1), (500, 500)])
+    patterns.load(world, path, 5, -3)
+    expected = {(x + 5, y - 3) for x, y in cells} | {(1, 1), (500, 500)}
+    if size is not None:
+        expected = {(x % size, y % size) for x, y in expected}
+    assert set(world.live_cells()) == expected
+    assert world.population == len(expected)
+    world.close()
+
+@pytest.mark.parametrize('engine', ['list', 'hashlife'])
+def test_macrocell_load_resets_history(engine, tmp_path):
+    import patterns
+    blinker = life.Life('infinite', None, 'hashlife')
+    blinker.set_cells([(20, 20), (21, 20), (22, 20)])
+    path = str(tmp_path / 'blinker.mc')
+    patterns.save(blinker, path)
+    world = life.Life('infinite', None, engine)
+    world.set_cells(GLIDER)
+    world.keep_timeline()
+    world.step(3)
+    cells = set(world.live_cells())
+    patterns.load(world, path)
+    world.step()
+    world.rewind(3)
+    assert set(world.live_cells()) == cells | {(20, 20), (21, 20), (22, 20)}
+
+@pytest.mark.parametrize('world_type, engine, options', ENGINES)
+def test_get_region_matches_cells(world_type, engine, options):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    size = 40 if world_type == 'torus' else None
+    cells = soup(40)
+    world = life.Life(world_type, size, engine, **options)
+    world.set_cells(cells)
+    x_coord, y_coord, width, height = -13, 7, 70, 95
+    region = world.get_region(x_coord, y_coord, width, height)
+    for i, row in enumerate(region):
+        for j, value in enumerate(row):
+            x, y = x_coord + i, y_coord + j
+            if size is not None:
+                x, y = x % size, y % size
+            assert value == ((x, y) in cells)
+    world.close()
+
+@pytest.mark.parametrize('world_type, size, saved, restored', [
+    (world_type, size, saved, restored)
+    for world_type, size, engines in [
+        ('torus', 45, ['list', 'numpy']),
+        ('torus', 70, ['list', 'numpy']),
+        ('infinite', None, ['list', 'sparse', 'hashlife', 'bitboard']),
+    ]
+    for saved in engines for restored in engines
+])
+def test_snapshot_round_trip(world_type, size, saved, restored, tmp_path):
+    import snapshot
+    if 'numpy' in (saved, restored):
+        pytest.importorskip('numpy')
+    cells = soup(size or 40)
+    if size is None:
+        cells = {(x - 20, y - 50) for x, y in cells}
+    world = life.Life(world_type, size, saved, rule='B36/S23')
+    world.set_cells(cells)
+    world.step(5)
+    cells = set(world.live_cells())
+    path = str(tmp_path / 'world.snap')
+    snapshot.save(world, path)
+    copy = snapshot.load(path, restored)
+    assert copy.engine == restored
+    assert (copy.world_type, copy.size, copy.rule) == (world_type, size, 'B36/S23')
+    assert (copy.time, copy.population) == (5, len(cells))
+    assert set(copy.live_cells()) == cells
+    world.step()
+    copy.step()
+    assert set(copy.live_cells()) == set(world.live_cells())
+
+def test_snapshot_get_chunk(tmp_path):
+    import snapshot
+    world = life.Life('infinite', None, 'list')
+    world.set_cells([(0, 0), (1, 33), (31, 31), (-1, -70), (64, 5)])
+    path = str(tmp_path / 'world.snap')
+    snapshot.save(world, path)
+    with snapshot.Snapshot(path) as saved:
+        assert list(saved.keys()) == [(-1, -3), (0, 0), (0, 1), (2, 0)]
+        assert saved.chunk_count == 4
+        rows = saved.get_chunk(0, 0)
+        assert len(rows) == life.Life.chunk_size
+        assert rows[0] == 1 and rows[31] == 1 << 31
+        assert sum(map(bool, rows)) == 2
+        assert saved.get_chunk(0, 1)[1] == 1 << 1
+        assert saved.get_chunk(-1, -3)[31] == 1 << 26
+        assert saved.get_chunk(2, 0)[0] == 1 << 5
+        for key in [(1, 0), (-1, 0), (0, -3), (3, 0), (100, -100)]:
+            assert saved.get_chunk(*key) == life.Life.chunk_size * (0,)
+
+def test_snapshot_version_1(tmp_path):
+    import snapshot
+    cells = soup(40)
+    rows = {}
+    for x, y in cells:
+        key = (x // 32, y // 32)
+        rows.setdefault(key, 32 * [0])[x % 32] |= 1 << (y % 32)
+    # Version 1 files have no rule after the header, and always use B3/S23.
+    data = b''.join(snapshot.CHUNK.pack(*rows[key]) for key in sorted(rows))
+    index = b''.join(
+        snapshot.INDEX_ENTRY.pack(*key, snapshot.HEADER.size
+                                  + i * snapshot.CHUNK.size)
+        for i, key in enumerate(sorted(rows))
+    )
+    header = snapshot.HEADER.pack(
+        snapshot.MAGIC, 1, 0, b'sparse', 0, 12, len(cells), len(rows),
+        snapshot.HEADER.size + len(data)
+    )
+    path = tmp_path / 'old.snap'
+    path.write_bytes(header + data + index)
+    world = snapshot.load(str(path))
+    assert (world.engine, world.rule, world.time) == ('sparse', 'B3/S23', 12)
+    assert set(world.live_cells()) == cells
+    path.write_bytes(b'LIFESNAP' + bytes(snapshot.HEADER.size))
+    with pytest.raises(ValueError):
+        snapshot.Snapshot(str(path))
@@ -0,0 +1,185 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+class Timeline:
+    """
+    A bounded history of the past states of a Life object, which lets any
+    state it retains be restored without simulating the world again (see
+    Life.keep_timeline and Life.rewind).
+
+    Each retained time step is stored as an entry, which is either:
+    1. A keyframe: the coordinates of all the alive cells of the world.
+    2. A delta: the coordinates of the cells that changed (were born or
+    died) since the previous entry, as returned by the step helper methods.
+    Since a cell changes exactly when its state is toggled, the same delta
+    leads from the previous state to this one and back.
+    A keyframe is taken every 'keyframe_every' entries, and whenever the cells
+    that changed are not known (with the 'hashlife' engine, or after the cells
+    were changed other than by a time step), so restoring a state never
+    applies more than 'keyframe_every' deltas.
+
+    Coordinates are stored flattened, as arrays of 64-bit 'int's (x0, y0, x1,
+    y1, ...). When the entries take more than 'budget' bytes, the oldest
+    keyframe is forgotten, along with all the deltas up to the next one (but
+    the newest keyframe and its deltas are always kept).
+    """
+    def __init__(self, budget=64 * 2 ** 20, keyframe_every=256):
+        """
+        Initializes an empty timeline, keeping at most about 'budget' bytes of
+        entries, with a keyframe every 'keyframe_every' entries.
+        """
+        self.budget = budget
+        self.keyframe_every = keyframe_every
+        self.times = []
+        self.keyframes = []
+        self.data = []
+        self.size = 0
+        self.since_keyframe = 0
+        self.dirty = True
+        self.cached = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def oldest(self):
+        """
+        Returns the time of the oldest retained state, or None if the timeline
+        is empty.
+        """
+        return self.times[0] if self.times else None
+
+    def newest(self):
+        """
+        Returns the time of the newest retained state, or None if the timeline
+        is empty.
+        """
+        return self.times[-1] if self.times else None
+
+    def retained(self):
+        """
+        Returns the list of the times of all the retained states, in order.
+        """
+        return list(self.times)
+
+    def prepare(self, world):
+        """
+        Helper method called by Life.step before every time step of the Life
+        object 'world': if the current state of the world is not retained
+        (because the timeline is empty, or the cells were changed since the
+        last entry), it is retained as a keyframe, replacing any entry at the
+        current time. Any entries after the current time (left over after
+        rewinding the world) are forgotten, since the world is about to leave
+        the states they lead to.
+        """
+        if self.dirty or not self.times:
+            self.truncate(world.time)
+            self.add(world.time, True, world.live_cells())
+            self.dirty = False
+        elif self.times[-1] > world.time:
+            self.truncate(world.time + 1)
+
+    def record(self, world, changes):
+        """
+        Helper method called by Life.step after every time step of the Life
+        object 'world', with the set of cells that changed during it (or None
+        if they are not known), which retains the new state of the world.
+        """
+        if changes is None or self.since_keyframe + 1 >= self.keyframe_every:
+            self.add(world.time, True, world.live_cells())
+        else:
+            self.add(world.time, False, changes)
+        self.evict()
+
+    def add(self, time, keyframe, cells):
+        """
+        Helper method that appends an entry for the given 'time', which is a
+        keyframe if 'keyframe' is True and a delta otherwise, made of the
+        coordinates of the given 'cells'.
+        """
+        data = array('q', chain.from_iterable(cells))
+        self.times.append(time)
+        self.keyframes.append(keyframe)
+        self.data.append(data)
+        self.size += sys.getsizeof(data)
+        self.since_keyframe = 0 if keyframe else self.since_keyframe + 1
+
+    def truncate(self, time):
+        """
+        Helper method that forgets every entry at or after the given 'time'.
+        """
+        i = bisect_left(self.times, time)
+        if i == len(self.times):
+            return
+        self.size -= sum(sys.getsizeof(data) for data in self.data[i:])
+        del self.times[i:], self.keyframes[i:], self.data[i:]
+        if self.cached is not None and self.cached[0] >= time:
+            self.cached = None
+        self.since_keyframe = 0
+        for keyframe in reversed(self.keyframes):
+            if keyframe:
+                break
+            self.since_keyframe += 1
+
+    def evict(self):
+        """
+        Helper method that forgets the oldest keyframe and the deltas up to
+        the next one, for as long as the entries take more than 'budget'
+        bytes and there is more than one keyframe.
+        """
+        while self.size > self.budget:
+            try:
+                end = self.keyframes.index(True, 1)
+            except ValueError:
+                return
+            self.size -= sum(sys.getsizeof(data) for data in self.data[:end])
+            if self.cached is not None and self.cached[0] < self.times[end]:
+                self.cached = None
+            del self.times[:end], self.keyframes[:end], self.data[:end]
+
+    def cells(self, time):
+        """
+        Returns the set of the coordinates of the alive cells of the world at
+        the given 'time', which must be one of the retained times (see
+        'retained') -- otherwise, raises a ValueError.
+
+        The state is rebuilt from the nearest keyframe before it, or from the
+        last state rebuilt if it is closer and only deltas lie in between
+        (in either direction), so that scrubbing through consecutive time steps
+        applies a single delta each time.
+        """
+        i = bisect_left(self.times, time)
+        if i == len(self.times) or self.times[i] != time:
+            raise ValueError(f'time step {time} is not retained')
+        start = i
+        while not self.keyframes[start]:
+            start -= 1
+        cells = None
+        if self.cached is not None:
+            j = bisect_left(self.times, self.cached[0])
+            low, high = min(i, j), max(i, j)
+            if high - low < i - start and not any(self.keyframes[low + 1:high + 1]):
+                cells = self.cached[1]
+        if cells is None:
+            data = self.data[start]
+            cells = set(zip(data[::2], data[1::2]))
+            low, high = start, i
+        for data in self.data[low + 1:high + 1]:
+            cells.symmetric_difference_update(zip(data[::2], data[1::2]))
+        self.cached = (time, cells)
+        return set(cells)
+
+    def nearest(self, time):
+        """
+        Returns the retained time closest to the given 'time' (the earlier
+        one, in case of a tie), or None if the timeline is empty.
+        """
+        if not self.times:
+            return None
+        i = bisect_right(self.times, time)
+        if i == 0:
+            return self.times[0]
+        if i == len(self.times) or time - self.times[i - 1] <= self.times[i] - time:
+            return self.times[i - 1]
+        return self.times[i]
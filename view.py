@@ -1,35 +1,140 @@
-import life, tkinter as tk, random
+import argparse, life, tkinter as tk, threading, time
 
 SCALE = 400
-root = tk.Tk()
-root.title("Conway's Game of Life")
+
+def image_pixels(world, x_coord, y_coord, zoom, cell_size, bg, cell):
+    """
+    Returns the bytes of the pixels of a PPM image of the 'zoom' x 'zoom'
+    square of cells of the Life object 'world' whose upper-left cell is
+    ('x_coord', 'y_coord'), with one 'cell_size' x 'cell_size' square of
+    pixels per cell, of the color 'cell' if it is alive and 'bg' otherwise
+    (both bytes objects of 3 RGB values).
+
+    The cells in view are read at once with Life.get_region (or NumPy), and
+    each of them is then looked up in a palette of 'cell_size' pixels wide
+    squares, with NumPy if it is installed, whatever the engine.
+    """
+    try:
+        import numpy
+    except ImportError:
+        colors = (bg * cell_size, cell * cell_size)
+        region = world.get_region(x_coord, y_coord, zoom, zoom)
+        # The image has one row of pixels per y coordinate, so the region is
+        # transposed, and each cell is looked up in 'colors' at once.
+        return b''.join(
+            cell_size * b''.join(map(colors.__getitem__, line))
+            for line in zip(*region)
+        )
+    if world.engine == 'numpy':
+        x_coords = numpy.arange(x_coord, x_coord + zoom)
+        y_coords = numpy.arange(y_coord, y_coord + zoom)
+        values = world.world[numpy.ix_(x_coords % world.size,
+                                       y_coords % world.size)]
+    else:
+        region = world.get_region(x_coord, y_coord, zoom, zoom)
+        values = numpy.frombuffer(b''.join(region), dtype=numpy.uint8)
+        values = values.reshape(zoom, zoom)
+    palette = numpy.frombuffer(bg * cell_size + cell * cell_size,
+                               dtype=numpy.uint8).reshape(2, 3 * cell_size)
+    # The image has one row of pixels per y coordinate, in which each cell
+    # takes 'cell_size' pixels.
+    return palette.take(values.T, axis=0).repeat(cell_size, axis=0).tobytes()
+
+def density_pixels(world, x_coord, y_coord, zoom, bg, cell):
+    """
+    Returns an ordered pair (s, p), where p is the bytes of the pixels of an
+    's' x 's' PPM image of the 'zoom' x 'zoom' square of cells of the Life
+    object 'world' whose upper-left cell is ('x_coord', 'y_coord'), where
+    each pixel shows a 'block' x 'block' square of cells, with 'block' the
+    smallest power of two for the image to fit in the canvas. The color of a
+    pixel goes from the color 'bg' (no alive cells) to the color 'cell' (only
+    alive cells), both bytes objects of 3 RGB values, with any alive cell
+    making it at least a little brighter.
+
+    The number of alive cells in each block is given by Life.density, and
+    the image starts at the multiples of 'block' just before 'x_coord' and
+    'y_coord' (less than a block away), so that each pixel is a single
+    quadtree node with the 'hashlife' engine, or made of whole tiles of
+    chunks with the 'list' and 'bitboard' engines. Building an image then
+    takes about as long however many cells are in view.
+    """
+    block = 1 << (-(-zoom // (2 * SCALE)) - 1).bit_length()
+    x_start, y_start = x_coord - x_coord % block, y_coord - y_coord % block
+    side = -(-(zoom + max(x_coord - x_start, y_coord - y_start)) // block)
+    scale = max(1, 2 * SCALE // side)
+    area = block * block
+    shades = [0] + [-(-255 * count // area) for count in range(1, area + 1)]
+    channels = [
+        bytes(start + (end - start) * level // 255 for level in range(256))
+        for start, end in zip(bg, cell)
+    ]
+    repeats = [scale * bytes((level,)) for level in range(256)]
+    counts = world.density(x_start, y_start, side, side, block)
+    levels = bytearray()
+    for row in zip(*counts):
+        line = bytes(map(shades.__getitem__, row))
+        if scale > 1:
+            line = b''.join(map(repeats.__getitem__, line))
+        levels += scale * line
+    pixels = bytearray(3 * len(levels))
+    for i, channel in enumerate(channels):
+        pixels[i::3] = levels.translate(channel)
+    return (scale * side, pixels)
+
 class LifeWindow(tk.Canvas):
     """
     Subclass of the Tkinter Canvas class.
     Its objects represent windows in which to view a particular grid of a Life object.
     """
-    def __init__(self, world):
+    def __init__(self, world, render_mode='rectangles', master=None):
         """
         Given a Life object 'world', initializes a LifeWindow
         object which lets the user view the grid of the 'world'
-        object.
+        object, inside the Tkinter window 'master' (by default, the
+        root window).
+
+        The 'render_mode' argument chooses how the grid is drawn:
+        either as one rectangle item per alive cell ('rectangles', the
+        default), as a single image ('image'), which is faster for
+        large views, or as a single image where each pixel shows the
+        density of a whole block of cells ('density'), which is used
+        whenever the view is too large for each cell to get a pixel.
 
         The LifeWindow object lets the user click on it to set
         or clear cells, as well as using certain keys to move the
         view across the grid and zooming in and out.
 
         The default background color is black, the default cell color is white,
-        the default speed is 100, and the default zoom level is 20.
+        the default speed is 100 time steps per second, the default frame rate
+        is 30 redraws per second, and the default zoom level is 20.
+
+        A timeline of the past states of the world is kept (see
+        Life.keep_timeline), so that the user can rewind it -- except with the
+        'hashlife' engine, which would need a keyframe every time step.
         """
         self.world = world
+        self.world.track_changes = True
+        if self.world.timeline is None and self.world.engine != 'hashlife':
+            self.world.keep_timeline()
         self.zoom = 20
         self.is_running = False
         self.speed = 100
+        self.frame_rate = 30
+        self.lock = threading.Lock()
+        self.stopped = None
+        self.pending = set()
+        self.refresh_id = None
         self.coords = (0,0)
         self.bg_color = "#000000"
         self.cell_color = "#FFFFFF"
-        super().__init__(root, width = 2 * SCALE, height = 2 * SCALE, 
+        self.items = {}
+        self.free_items = []
+        self.view = None
+        self.render_mode = render_mode
+        super().__init__(master, width = 2 * SCALE, height = 2 * SCALE, 
                          bg = "#000000")
+        self.image = tk.PhotoImage(master=self)
+        self.create_image(0, 0, anchor='nw', image=self.image, tags='image')
         self.bind("<Button>", self.on_click)
         self.grid(column = 1, row = 1, columnspan=30, rowspan=30)
         self.draw()
@@ -45,27 +150,169 @@ class LifeWindow(tk.Canvas):
         else:
             return self.world.get_cell(x,y)
 
-    def draw(self):
+    def draw(self, changed=None):
+        """
+        Draws (or redraws) the LifeWindow object, with draw_rectangles (see
+        there for the meaning of 'changed') or, if the 'render_mode' attribute
+        is 'image' or 'density', with draw_image or draw_density.
+
+        If a Profiler object is attached to the world (see Life.step), the
+        time spent drawing is recorded as the 'draw' phase, and the number of
+        frames drawn as 'frames'.
+        """
+        profiler = self.world.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        if self.render_mode == 'image':
+            self.draw_image()
+        elif self.render_mode == 'density':
+            self.draw_density()
+        else:
+            self.draw_rectangles(changed)
+        if profiler is not None:
+            profiler.time('draw', time.perf_counter() - start)
+            profiler.count('frames')
+
+    def draw_rectangles(self, changed=None):
         """
-        Draws (or redraws) the whole LifeWindow object.
+        Helper method that draws (or redraws) the view of the LifeWindow
+        object as rectangle items.
+
+        Every alive cell in view is drawn as a rectangle item, kept in the
+        'items' dictionary under its position in the view. Rectangles of cells
+        that die are hidden and kept in the 'free_items' list, to be reused
+        for cells that become alive later.
+
+        If 'changed' is a set of coordinates of the cells that changed since
+        the last call (as returned by Life.step), only those cells are
+        redrawn. Otherwise, or if the view was moved or zoomed since the last
+        call, every cell in view is checked, but only the rectangles of cells
+        whose state differs from what is on the canvas are updated.
         """
-        self.delete('all')
+        profiler = self.world.profiler
+        created = reused = hidden = 0
         cell_size = 2 * SCALE // self.zoom
-        for x in range(self.zoom):
-            for y in range(self.zoom):
-                world_x = self.coords[0] + x
-                world_y = self.coords[1] + y
-                if self.world.world_type != "infinite":
-                    world_x = world_x % self.world.size
-                    world_y = world_y % self.world.size
-                if self.cell(world_x, world_y):
-                    self.create_rectangle(
-                    x * cell_size, 
-                    y * cell_size, 
-                    (x + 1) * cell_size,
-                    (y + 1) * cell_size,
+        if self.view is None or self.view[1] != self.zoom:
+            for item in self.items.values():
+                self.itemconfigure(item, state='hidden')
+                self.free_items.append(item)
+            self.items = {}
+            changed = None
+        elif self.view[0] != self.coords:
+            x_shift = self.coords[0] - self.view[0][0]
+            y_shift = self.coords[1] - self.view[0][1]
+            self.move('cell', -x_shift * cell_size, -y_shift * cell_size)
+            items, self.items = self.items, {}
+            for (x, y), item in items.items():
+                if 0 <= x - x_shift < self.zoom and 0 <= y - y_shift < self.zoom:
+                    self.items[(x - x_shift, y - y_shift)] = item
+                else:
+                    self.itemconfigure(item, state='hidden')
+                    self.free_items.append(item)
+            changed = None
+        self.view = (self.coords, self.zoom)
+        if changed is None:
+            positions = [(x, y) for x in range(self.zoom) for y in range(self.zoom)]
+        else:
+            positions = []
+            for world_x, world_y in changed:
+                x = world_x - self.coords[0]
+                y = world_y - self.coords[1]
+                if self.world.world_type != 'infinite':
+                    # On a torus, the same cell can appear more than once in
+                    # view if the view is larger than the world.
+                    size = self.world.size
+                    positions.extend(
+                        (i, j) for i in range(x % size, self.zoom, size)
+                        for j in range(y % size, self.zoom, size)
+                    )
+                elif 0 <= x < self.zoom and 0 <= y < self.zoom:
+                    positions.append((x, y))
+        for x, y in positions:
+            alive = self.cell(*self.wrap(self.coords[0] + x, self.coords[1] + y))
+            item = self.items.get((x, y))
+            if alive and item is None:
+                rectangle = (x * cell_size, y * cell_size,
+                             (x + 1) * cell_size, (y + 1) * cell_size)
+                if self.free_items:
+                    item = self.free_items.pop()
+                    tk.Canvas.coords(self, item, *rectangle)
+                    self.itemconfigure(item, state='normal')
+                    reused += 1
+                else:
+                    item = self.create_rectangle(
+                    *rectangle,
                     fill = self.cell_color,
-                    outline = self.bg_color)
+                    outline = self.bg_color,
+                    tags = 'cell')
+                    created += 1
+                self.items[(x, y)] = item
+            elif not alive and item is not None:
+                self.itemconfigure(item, state='hidden')
+                self.free_items.append(item)
+                del self.items[(x, y)]
+                hidden += 1
+        if profiler is not None:
+            profiler.count('items_created', created)
+            profiler.count('items_reused', reused)
+            profiler.count('items_hidden', hidden)
+
+    def draw_image(self):
+        """
+        Draws the whole view of the LifeWindow object as a single image, with
+        one square of pixels per cell, by building the bytes of a PPM image
+        of the view (see image_pixels) and loading them into the 'image'
+        attribute.
+        """
+        cell_size = 2 * SCALE // self.zoom
+        side = cell_size * self.zoom
+        bg = bytes(value // 256 for value in self.winfo_rgb(self.bg_color))
+        cell = bytes(value // 256 for value in self.winfo_rgb(self.cell_color))
+        pixels = image_pixels(self.world, self.coords[0], self.coords[1],
+                              self.zoom, cell_size, bg, cell)
+        self.image.configure(data=b'P6 %d %d 255\n' % (side, side) + pixels,
+                             format='PPM')
+
+    def draw_density(self):
+        """
+        Draws the whole view of the LifeWindow object as a single image where
+        each pixel shows a block of cells (see density_pixels), by building
+        the bytes of a PPM image of the view and loading them into the
+        'image' attribute.
+        """
+        bg = bytes(value // 256 for value in self.winfo_rgb(self.bg_color))
+        cell = bytes(value // 256 for value in self.winfo_rgb(self.cell_color))
+        side, pixels = density_pixels(self.world, self.coords[0],
+                                      self.coords[1], self.zoom, bg, cell)
+        self.image.configure(data=b'P6 %d %d 255\n' % (side, side) + pixels,
+                             format='PPM')
+
+    def wrap(self, x, y):
+        """
+        Helper method that, given 'int' cell coordinates 'x' and 'y', returns
+        the coordinates of the same cell inside the grid: on a torus, these
+        are taken modulo the size of the world.
+        """
+        if self.world.world_type != 'infinite':
+            return (x % self.world.size, y % self.world.size)
+        return (x, y)
+
+    def set_render_mode(self, render_mode):
+        """
+        Helper method that switches the LifeWindow object to the given
+        'render_mode' ('rectangles', 'image' or 'density') and redraws it.
+        """
+        self.render_mode = render_mode
+        if render_mode in ('image', 'density'):
+            self.itemconfigure('cell', state='hidden')
+            self.free_items.extend(self.items.values())
+            self.items = {}
+            self.view = None
+            self.itemconfigure('image', state='normal')
+        else:
+            self.image.blank()
+            self.itemconfigure('image', state='hidden')
+        self.draw()
 
     def on_click(self, event):
         """
@@ -76,70 +323,186 @@ class LifeWindow(tk.Canvas):
         previously turned off, or
         2. Clear the cell where the event took place, if the cell was
         previously turned on.
-        Afterwards, it will redraw the LifeWindow object.
+        Afterwards, it will redraw the cell.
         """
         cell_size = 2 * SCALE // self.zoom
+        if cell_size == 0:
+            return
         cell_x = self.coords[0] + int(event.x / cell_size)
         cell_y = self.coords[1] + int(event.y / cell_size)
         if self.world.world_type != 'infinite':
             cell_x = cell_x % self.world.size
             cell_y = cell_y % self.world.size
-        if self.cell(cell_x, cell_y):
-            self.world.set_cell(cell_x, cell_y, mode='clear')
-        else:
-            self.world.set_cell(cell_x, cell_y)
-        self.draw()
+        with self.lock:
+            if self.cell(cell_x, cell_y):
+                self.world.set_cell(cell_x, cell_y, mode='clear')
+            else:
+                self.world.set_cell(cell_x, cell_y)
+            self.draw({(cell_x, cell_y)})
         
     def take_step(self):
         """
         Helper method that updates the grid by a single time step and
-        then redraws the LifeWindow object.
+        then redraws the cells that changed.
         """
-        self.world.step()
-        self.draw()
+        with self.lock:
+            self.draw(self.world.step())
+
+    def rewind(self, time):
+        """
+        Helper method that stops the simulation, restores the state the world
+        was in at the time step 'time' (see Life.rewind), or at the closest
+        time step retained by its timeline, and then redraws the view. Does
+        nothing more than stopping it if the world keeps no timeline.
+        """
+        self.stop()
+        if self.world.timeline is None:
+            return
+        with self.lock:
+            time = self.world.timeline.nearest(time)
+            if time is not None and time != self.world.time:
+                self.world.rewind(time)
+                self.pending = set()
+                self.view = None
+                self.draw()
+
+    def stop(self):
+        """
+        Helper method that stops the simulation, if it is running. The
+        background thread running 'simulate' is not waited for: it checks its
+        'stopped' event under 'lock' before every time step, so once this
+        returns, it takes no more time steps.
+        """
+        self.is_running = False
+        if self.stopped is not None:
+            self.stopped.set()
+            self.stopped = None
+        if self.refresh_id is not None:
+            self.after_cancel(self.refresh_id)
+            self.refresh_id = None
 
     def run(self, start_stop=False):
         """
-        Given a Boolean 'start_stop' argument, does one of three
-        things:
+        Given a Boolean 'start_stop' argument, does one of two things:
         1. If start_stop = True and the simulation was previously not
         running, it starts running by switching the value of the 'is_running'
-        attribute and recursively calling itself.
+        attribute, starting a background thread running 'simulate', and
+        starting to redraw the view with 'refresh'.
         2. If start_stop = True and the simulation was previously running,
-        it stops running by switching the value of the 'is_running' attribute.
-        3. If start_stop = False, runs the simulation by taking one time step
-        and recursively calling itself -- but only if the 'is_running' attribute
-        is True.
-        """
-        if start_stop:
-            self.is_running = not self.is_running
-            self.after(1000 // self.speed, self.run)
-        elif self.is_running:
-            self.take_step()
-            self.after(1000 // self.speed, self.run)
+        it stops running by switching the value of the 'is_running' attribute,
+        which makes both the background thread and 'refresh' stop.
+        Each background thread gets its own 'stopped' event, which is set as
+        soon as the simulation stops, so that a thread still finishing a time
+        step never keeps running alongside the next one.
+        """
+        if not start_stop:
+            return
+        self.is_running = not self.is_running
+        if self.stopped is not None:
+            self.stopped.set()
+            self.stopped = None
+        if self.is_running:
+            self.stopped = threading.Event()
+            threading.Thread(target=self.simulate, args=(self.stopped,),
+                             daemon=True).start()
+            if self.refresh_id is not None:
+                self.after_cancel(self.refresh_id)
+            self.refresh()
+
+    def simulate(self, stopped):
+        """
+        Helper method, run in a background thread, that updates the grid by
+        'speed' time steps per second (or as many as it can, if it can't keep
+        up) for as long as the 'is_running' attribute is True and the
+        threading.Event 'stopped' is not set.
+
+        The cells that changed since the view was last redrawn are collected
+        in the 'pending' attribute, which is set to None if they are unknown.
+
+        The world is only read or changed under 'lock', which is held for a
+        whole time step: anything else that needs it on the Tkinter thread,
+        such as drawing a frame in 'refresh', waits for the current time step
+        to end. With time steps slower than a frame, the window therefore
+        only responds between them.
+        """
+        next_time = time.perf_counter()
+        while True:
+            with self.lock:
+                if stopped.is_set() or not self.is_running:
+                    return
+                changes = self.world.step()
+                if changes is None or self.pending is None:
+                    self.pending = None
+                else:
+                    self.pending ^= changes
+            next_time += 1 / self.speed
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                stopped.wait(delay)
+            else:
+                next_time = time.perf_counter()
+
+    def refresh(self):
+        """
+        Helper method that redraws the cells that changed since the last
+        redraw, as collected by 'simulate', and then calls itself again after
+        1 / 'frame_rate' seconds -- but only if the 'is_running' attribute is
+        True. Any time steps taken in between are simply not shown.
+        """
+        running = self.is_running
+        with self.lock:
+            changed, self.pending = self.pending, set()
+            self.draw(changed)
+        if running:
+            self.refresh_id = self.after(max(1, 1000 // self.frame_rate),
+                                         self.refresh)
+        else:
+            self.refresh_id = None
 
     def change_view(self, event):
         """
         Helper method that, upon being called with some 'event' argument,
         (which is usually pressing a key), will either move the current
-        view of the grid (if the key pressed was one of W, A, S, or D)
-        or zoom in/out (if the key pressed was either N or M).
+        view of the grid (if the key pressed was one of W, A, S, or D),
+        zoom in/out (if the key pressed was either N or M), or switch
+        between the 'rectangles', 'image' and 'density' render modes (if the
+        key pressed was R).
+
+        The view moves by a twentieth of its width, and zooms by a tenth of
+        it (but always by at least one cell), so that huge views can be
+        reached quickly. Whenever the view gets wider than the canvas in
+        pixels, the 'density' render mode is used, since no other mode can
+        show it.
         """
         x, y = self.coords
+        move = max(1, self.zoom // 20)
+        zoom = max(1, self.zoom // 10)
         match event.keysym:
             case 'a':
-                self.coords = (x - 1, y)
+                self.coords = (x - move, y)
             case 'd':
-                self.coords = (x + 1, y)
+                self.coords = (x + move, y)
             case 'w':
-                self.coords = (x, y - 1)
+                self.coords = (x, y - move)
             case 's':
-                self.coords = (x, y + 1)
+                self.coords = (x, y + move)
             case 'n':
-                self.zoom += 1
+                self.zoom += zoom
             case 'm':
-                self.zoom -= 1
-        self.draw()
+                self.zoom = max(1, self.zoom - zoom)
+            case 'r':
+                modes = ('rectangles', 'image', 'density')
+                render_mode = modes[(modes.index(self.render_mode) + 1) % 3]
+                if 2 * SCALE // self.zoom == 0:
+                    render_mode = 'density'
+                with self.lock:
+                    self.set_render_mode(render_mode)
+                return
+        with self.lock:
+            if 2 * SCALE // self.zoom == 0 and self.render_mode != 'density':
+                self.set_render_mode('density')
+            else:
+                self.draw()
 
     def change_color(self, bg, cell):
         """
@@ -152,202 +515,359 @@ class LifeWindow(tk.Canvas):
         """
         self.bg_color, self.cell_color = bg, cell
         self.configure(bg=self.bg_color)
-        self.draw()
-
-
-global l
-l = life.Life()
-global w 
-w = LifeWindow(l)
+        self.itemconfigure('cell', fill=self.cell_color, outline=self.bg_color)
+        if self.render_mode != 'rectangles':
+            with self.lock:
+                self.draw()
 
-def new_world_window():
-    """
-    Creates a new 'New World' helper window, which lets the user
-    create a new grid with an specified world type and size.
-    """
-    def create_world():
-        global l
-        global w
-        type_list = ["infinite", "torus"]
-        w_size = int(e1.get()) if e1.get() else 32
-        w_type = type_list[var.get()]
-        l = life.Life(world_type=w_type,size=w_size)
-        w = LifeWindow(l)
-        world_window.destroy()
-        draw_widgets(w)
-
-    w.is_running = False
-    world_window = tk.Toplevel(root)
-    world_window.title("New World")
-    
-    l1 = tk.Label(world_window,text="World Type:")
-    l1.grid(column=0, row=0)
-
-    
-    var = tk.IntVar()
-    r1 = tk.Radiobutton(world_window,
-                        text="Infinite",
-                        variable=var,
-                        value=0)
-    r1.grid()
-    r2 = tk.Radiobutton(world_window,
-                        text="Torus (finite)",
-                        variable=var,
-                        value=1)
-    r2.grid()    
-    l2 = tk.Label(world_window,text="Size (default: 32):")
-    l2.grid()
-    e1 = tk.Entry(world_window)
-    e1.grid()
-    b1 = tk.Button(world_window,text="Create World",command=create_world)
-    b1.grid()
-
-def new_speed_window():
-    """
-    Creates a new 'Set Speed' helper window, which lets the user choose the 
-    simulation speed.
-    """
-    def set_speed():
-        w.speed = int(e1.get())
-        speed_window.destroy()
-    w.is_running = False
-    speed_window = tk.Toplevel(root)
-    speed_window.title("Set Speed")
-
-    l1 = tk.Label(speed_window,text="Speed: ")
-    l1.grid(column=0,row=0)
-    e1 = tk.Entry(speed_window)
-    e1.grid(column=1,row=0)
-    b1 = tk.Button(speed_window, text="Change speed", command=set_speed)
-    b1.grid(column=1,row=1)
-
-def new_stats_window():
-    """
-    Creates a new 'Stats' helper window, with relevant information about the 
-    world, including Population, Time, the coordinates of the Upper left corner
-    of the view, and the Speed.
-    """
-    w.is_running = False
-    stats_window = tk.Toplevel(root)
-    stats_window.title("Stats")
-
-    lb1 = tk.Listbox(stats_window)
-    lb1.insert(1, "Population:")
-    lb1.insert(2, str(w.world.population))
-    lb1.insert(3, "Time:")
-    lb1.insert(4, str(w.world.time))
-    lb1.insert(5, "Upper left corner:")
-    lb1.insert(6, f"x= {w.coords[0]}, y = {w.coords[1]}")
-    lb1.insert(7, "Speed:")
-    lb1.insert(8, str(w.speed))
-    lb1.grid()
-
-def new_color_window():
-    """
-    Creates a new 'Color Scheme' helper window, which lets the user choose
-    the background color and cell color in the grid (using RGB in Hexadecimal
-    format).
-    """
-    def set_colors():
-        bg = e1.get() if len(e1.get()) > 0 else w.bg_color
-        cell = e2.get() if len(e2.get()) > 0 else w.cell_color
-        w.change_color(bg, cell)
-        color_window.destroy()
-
-    w.is_running = False
-    color_window = tk.Toplevel(root)
-    color_window.title("Color Scheme")
-
-    l1 = tk.Label(color_window,text="Background color: ")
-    l1.grid(column=0,row=0)
-    l2 = tk.Label(color_window,text="Cell color: ")
-    l2.grid(column=0,row=1)
-    e1 = tk.Entry(color_window)
-    e1.grid(column=1,row=0)
-    e2 = tk.Entry(color_window)
-    e2.grid(column=1,row=1)
-    b1 = tk.Button(color_window, text="Change Colors", command=set_colors)
-    b1.grid(column=1,row=2)
-    
-def new_rand_window():
+class LifeApp:
     """
-    Creates a new 'Randomize Rectangle' helper window, which lets the user
-    specify the coordinates of the upper-left corner and lower-right corner of a
-    rectangle that will be randomly populated by alive cells, with a particular
-    density.
-    """
-    def set_random():
-        x1, x2 = int(e1.get()), int(e2.get())
-        y1, y2 = int(e3.get()), int(e4.get())
-        density = float(e5.get())
-        for x in range(x1, x2 + 1):
-            for y in range(y1, y2 + 1):
-                val = random.randint(1,100)
-                if val <= int(100 * density):
-                    w.world.set_cell(x,y)
-        rand_window.destroy()
-        w.draw()
-
-    w.is_running = False
-    rand_window = tk.Toplevel(root)
-    rand_window.geometry('270x120')
-    rand_window.title("Randomize Rectangle")
-
-    l1 = tk.Label(rand_window,text="x_1: ")
-    l1.grid(column=0, row=0)
-    e1 = tk.Entry(rand_window,width=9)
-    e1.grid(column=1, row=0)
-    l2 = tk.Label(rand_window,text="x_2: ")
-    l2.grid(column=0, row=1)
-    e2 = tk.Entry(rand_window,width=9)
-    e2.grid(column=1, row=1)
-    l3 = tk.Label(rand_window,text="y_1: ")
-    l3.grid(column=2, row=0)
-    e3 = tk.Entry(rand_window,width=9)
-    e3.grid(column=3, row=0)
-    l4 = tk.Label(rand_window,text="y_2: ")
-    l4.grid(column=2, row=1)
-    e4 = tk.Entry(rand_window,width=9)
-    e4.grid(column=3, row=1)
-    
-    l5 = tk.Label(rand_window,text="Density: ")
-    l5.grid(column=0, row=2)
-    e5 = tk.Entry(rand_window,width=9)
-    e5.grid(column=1, row=2)
-    
-    b1 = tk.Button(rand_window, 
-                   text="Generate rectangle",
-                   command=set_random)
-    b1.grid(column=0, row=4, columnspan=4)
-
-def draw_widgets(w):
-    """
-    Given a LifeWindow object 'w', creates all of the Tkinter
-    widgets that are to the left of the LifeWindow.
+    The whole GUI: a Tkinter root window showing a LifeWindow, with the
+    buttons that open the helper windows to its left.
+
+    Nothing is created when the module is imported: the Tkinter root window
+    is only created along with a LifeApp object, so the module can be
+    imported by other programs (which may also create several LifeApp
+    objects, each with its own root window).
     """
-    b1 = tk.Button(root, text="Take step", command=w.take_step)
-    b1.grid(column=0, row=4)
+    def __init__(self, world=None, master=None):
+        """
+        Given a Life object 'world' (by default, an empty 'infinite' world),
+        initializes a LifeApp object showing it in the Tkinter window
+        'master' (by default, a new root window).
+        """
+        self.root = master if master is not None else tk.Tk()
+        self.root.title("Conway's Game of Life")
+        self.world = world if world is not None else life.Life()
+        self.window = LifeWindow(self.world, master=self.root)
+        self.draw_widgets()
+
+    def new_world_window(self):
+        """
+        Creates a new 'New World' helper window, which lets the user
+        create a new grid with an specified world type and size.
+        """
+        def create_world():
+            type_list = ["infinite", "torus"]
+            w_size = int(e1.get()) if e1.get() else 32
+            w_type = type_list[var.get()]
+            w_rule = e2.get() or 'B3/S23'
+            world = life.Life(world_type=w_type,size=w_size,rule=w_rule)
+            self.window.stop()
+            self.window.destroy()
+            self.world = world
+            self.window = LifeWindow(world, master=self.root)
+            world_window.destroy()
+
+        self.window.is_running = False
+        world_window = tk.Toplevel(self.root)
+        world_window.title("New World")
+        
+        l1 = tk.Label(world_window,text="World Type:")
+        l1.grid(column=0, row=0)
+
+        
+        var = tk.IntVar()
+        r1 = tk.Radiobutton(world_window,
+                            text="Infinite",
+                            variable=var,
+                            value=0)
+        r1.grid()
+        r2 = tk.Radiobutton(world_window,
+                            text="Torus (finite)",
+                            variable=var,
+                            value=1)
+        r2.grid()    
+        l2 = tk.Label(world_window,text="Size (default: 32):")
+        l2.grid()
+        e1 = tk.Entry(world_window)
+        e1.grid()
+        l3 = tk.Label(world_window,text="Rule (default: B3/S23):")
+        l3.grid()
+        e2 = tk.Entry(world_window)
+        e2.grid()
+        b1 = tk.Button(world_window,text="Create World",command=create_world)
+        b1.grid()
+
+    def new_speed_window(self):
+        """
+        Creates a new 'Set Speed' helper window, which lets the user choose the 
+        simulation speed and the frame rate.
+        """
+        def set_speed():
+            if e1.get():
+                self.window.speed = int(e1.get())
+            if e2.get():
+                self.window.frame_rate = int(e2.get())
+            speed_window.destroy()
+        self.window.is_running = False
+        speed_window = tk.Toplevel(self.root)
+        speed_window.title("Set Speed")
+
+        l1 = tk.Label(speed_window,text="Speed: ")
+        l1.grid(column=0,row=0)
+        e1 = tk.Entry(speed_window)
+        e1.grid(column=1,row=0)
+        l2 = tk.Label(speed_window,text="Frame rate: ")
+        l2.grid(column=0,row=1)
+        e2 = tk.Entry(speed_window)
+        e2.grid(column=1,row=1)
+        b1 = tk.Button(speed_window, text="Change speed", command=set_speed)
+        b1.grid(column=1,row=2)
+
+    def new_stats_window(self):
+        """
+        Creates a new 'Stats' helper window, with relevant information about the 
+        world, including Population, Time, the coordinates of the Upper left corner
+        of the view, and the Speed, refreshed twice per second while the window is
+        open (without stopping the simulation).
+
+        The 'Start profiling' button attaches a Profiler object to the world, and
+        its report (the time spent per time step in each phase of Life.step, the
+        frame time and the counters) is then shown below the other values.
+        """
+        def start_profiling():
+            import profiler
+            with self.window.lock:
+                self.window.world.profiler = profiler.Profiler()
+
+        def update():
+            # The window may have been closed since the last update.
+            if not stats_window.winfo_exists():
+                return
+            with self.window.lock:
+                lines = [
+                    "Population:", str(self.window.world.population),
+                    "Time:", str(self.window.world.time),
+                    "Upper left corner:", f"x= {self.window.coords[0]}, y = {self.window.coords[1]}",
+                    "Speed:", str(self.window.speed),
+                ]
+                if self.window.world.profiler is not None:
+                    lines.append("Profile:")
+                    lines.extend(self.window.world.profiler.report())
+            lb1.delete(0, tk.END)
+            lb1.insert(tk.END, *lines)
+            stats_window.after(500, update)
+
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("Stats")
+
+        lb1 = tk.Listbox(stats_window, width=40, height=24)
+        lb1.grid()
+        b1 = tk.Button(stats_window, text="Start profiling", command=start_profiling)
+        b1.grid()
+        update()
+
+    def new_history_window(self):
+        """
+        Creates a new 'History' helper window, which lets the user rewind the
+        world to any of the time steps retained by its timeline, either by
+        dragging the slider (which ranges from the oldest to the newest retained
+        time step, and is updated twice per second) or one time step at a time
+        with the 'Back' and 'Forward' buttons.
+
+        The slider calls its command whenever its value changes, including
+        when 'update' moves it to the current time step, so the last value
+        shown is remembered and not mistaken for the user rewinding the world.
+        """
+        shown = [None]
+
+        def update():
+            # The window may have been closed since the last update.
+            if not history_window.winfo_exists():
+                return
+            with self.window.lock:
+                timeline = self.window.world.timeline
+                current = self.window.world.time
+                if timeline is None:
+                    oldest = newest = None
+                    size = 0
+                else:
+                    oldest, newest = timeline.oldest(), timeline.newest()
+                    size = timeline.size
+            if oldest is None:
+                oldest = newest = current
+            shown[0] = current
+            s1.configure(from_=oldest, to=newest)
+            s1.set(current)
+            if timeline is None:
+                l1.configure(text="No timeline is kept")
+            else:
+                l1.configure(text=f"Retained: {oldest} - {newest} "
+                                  f"({size / 2 ** 20:.1f} MiB)")
+            history_window.after(500, update)
+
+        def scrub(value):
+            if int(value) != shown[0]:
+                shown[0] = int(value)
+                self.window.rewind(int(value))
+
+        def move(offset):
+            self.window.stop()
+            with self.window.lock:
+                current = self.window.world.time
+            self.window.rewind(current + offset)
+
+        history_window = tk.Toplevel(self.root)
+        history_window.title("History")
+
+        l1 = tk.Label(history_window, text="")
+        l1.grid(column=0, row=0, columnspan=2)
+        s1 = tk.Scale(history_window, orient=tk.HORIZONTAL, length=300,
+                      command=scrub)
+        s1.grid(column=0, row=1, columnspan=2)
+        b1 = tk.Button(history_window, text="Back", command=lambda : move(-1))
+        b1.grid(column=0, row=2)
+        b2 = tk.Button(history_window, text="Forward", command=lambda : move(1))
+        b2.grid(column=1, row=2)
+        update()
+
+    def new_color_window(self):
+        """
+        Creates a new 'Color Scheme' helper window, which lets the user choose
+        the background color and cell color in the grid (using RGB in Hexadecimal
+        format).
+        """
+        def set_colors():
+            bg = e1.get() if len(e1.get()) > 0 else self.window.bg_color
+            cell = e2.get() if len(e2.get()) > 0 else self.window.cell_color
+            self.window.change_color(bg, cell)
+            color_window.destroy()
+
+        self.window.is_running = False
+        color_window = tk.Toplevel(self.root)
+        color_window.title("Color Scheme")
+
+        l1 = tk.Label(color_window,text="Background color: ")
+        l1.grid(column=0,row=0)
+        l2 = tk.Label(color_window,text="Cell color: ")
+        l2.grid(column=0,row=1)
+        e1 = tk.Entry(color_window)
+        e1.grid(column=1,row=0)
+        e2 = tk.Entry(color_window)
+        e2.grid(column=1,row=1)
+        b1 = tk.Button(color_window, text="Change Colors", command=set_colors)
+        b1.grid(column=1,row=2)
+        
+    def new_rand_window(self):
+        """
+        Creates a new 'Randomize Rectangle' helper window, which lets the user
+        specify the coordinates of the upper-left corner and lower-right corner of a
+        rectangle that will be randomly populated by alive cells, with a particular
+        density.
+        """
+        def set_random():
+            x1, x2 = int(e1.get()), int(e2.get())
+            y1, y2 = int(e3.get()), int(e4.get())
+            density = float(e5.get())
+            with self.window.lock:
+                self.window.world.random_fill(x1, y1, x2 - x1 + 1, y2 - y1 + 1, density)
+                self.window.draw()
+            rand_window.destroy()
+
+        self.window.is_running = False
+        rand_window = tk.Toplevel(self.root)
+        rand_window.geometry('270x120')
+        rand_window.title("Randomize Rectangle")
+
+        l1 = tk.Label(rand_window,text="x_1: ")
+        l1.grid(column=0, row=0)
+        e1 = tk.Entry(rand_window,width=9)
+        e1.grid(column=1, row=0)
+        l2 = tk.Label(rand_window,text="x_2: ")
+        l2.grid(column=0, row=1)
+        e2 = tk.Entry(rand_window,width=9)
+        e2.grid(column=1, row=1)
+        l3 = tk.Label(rand_window,text="y_1: ")
+        l3.grid(column=2, row=0)
+        e3 = tk.Entry(rand_window,width=9)
+        e3.grid(column=3, row=0)
+        l4 = tk.Label(rand_window,text="y_2: ")
+        l4.grid(column=2, row=1)
+        e4 = tk.Entry(rand_window,width=9)
+        e4.grid(column=3, row=1)
+        
+        l5 = tk.Label(rand_window,text="Density: ")
+        l5.grid(column=0, row=2)
+        e5 = tk.Entry(rand_window,width=9)
+        e5.grid(column=1, row=2)
+        
+        b1 = tk.Button(rand_window, 
+                       text="Generate rectangle",
+                       command=set_random)
+        b1.grid(column=0, row=4, columnspan=4)
+
+    def draw_widgets(self):
+        """
+        Creates all of the Tkinter widgets that are to the left of the
+        LifeWindow. They always act on the current LifeWindow object (the
+        'window' attribute), so they don't have to be created again when
+        a new world is created.
+        """
+        b1 = tk.Button(self.root, text="Take step",
+                       command=lambda : self.window.take_step())
+        b1.grid(column=0, row=4)
 
-    b2 = tk.Button(root, text="Run/Stop", command=lambda : w.run(start_stop=True))
-    b2.grid(column=0, row=5)
+        b2 = tk.Button(self.root, text="Run/Stop",
+                       command=lambda : self.window.run(start_stop=True))
+        b2.grid(column=0, row=5)
 
-    b3 = tk.Button(root, text="Set speed", command=new_speed_window)
-    b3.grid(column=0, row=6)
+        b3 = tk.Button(self.root, text="Set speed", command=self.new_speed_window)
+        b3.grid(column=0, row=6)
 
-    b4 = tk.Button(root, text="Color Scheme", command=new_color_window)
-    b4.grid(column=0, row=8)
+        b4 = tk.Button(self.root, text="Color Scheme", command=self.new_color_window)
+        b4.grid(column=0, row=8)
 
-    b5 = tk.Button(root, text="New World", command=new_world_window)
-    b5.grid(column=0, row=1)
+        b5 = tk.Button(self.root, text="New World", command=self.new_world_window)
+        b5.grid(column=0, row=1)
 
-    b6 = tk.Button(root, text="Statistics", command=new_stats_window)
-    b6.grid(column=0, row=10)
+        b6 = tk.Button(self.root, text="Statistics", command=self.new_stats_window)
+        b6.grid(column=0, row=10)
 
-    b7 = tk.Button(root, text="Randomize", command=new_rand_window)
-    b7.grid(column=0, row=11)
-    root.bind("<KeyPress>", w.change_view)
+        b7 = tk.Button(self.root, text="Randomize", command=self.new_rand_window)
+        b7.grid(column=0, row=11)
 
+        b8 = tk.Button(self.root, text="History", command=self.new_history_window)
+        b8.grid(column=0, row=12)
+        self.root.bind("<KeyPress>", lambda event: self.window.change_view(event))
 
+    def mainloop(self):
+        """
+        Runs the Tkinter event loop of the application, until its window is
+        closed, and then stops the simulation.
+        """
+        self.root.mainloop()
+        self.window.is_running = False
 
-draw_widgets(w)
-root.mainloop()
+def main(argv=None):
+    """
+    Runs the GUI, as specified by the command line arguments 'argv' (by
+    default, those the program was called with): the world is created as
+    in headless.py, optionally from a pattern file.
+    """
+    parser = argparse.ArgumentParser(
+        description="Conway's Game of Life simulator with Tkinter."
+    )
+    parser.add_argument('pattern', nargs='?',
+                        help='pattern file (.cells, .rle or .mc) to start from')
+    parser.add_argument('--world', choices=['infinite', 'torus'],
+                        default='infinite', help='world type')
+    parser.add_argument('--size', type=int, default=32,
+                        help='size of the torus (default: 32)')
+    parser.add_argument('--engine',
+                        choices=['list', 'numpy', 'sparse', 'hashlife', 'bitboard'],
+                        default='list',
+                        help='engine used to update the world (default: list)')
+    parser.add_argument('--rule', default='B3/S23',
+                        help="rule string, such as 'B36/S23' (default: B3/S23)")
+    args = parser.parse_args(argv)
+    world = life.Life(world_type=args.world,
+                      size=args.size if args.world == 'torus' else None,
+                      engine=args.engine, rule=args.rule)
+    if args.pattern:
+        import patterns
+        patterns.load(world, args.pattern)
+    LifeApp(world).mainloop()
+
+if __name__ == '__main__':
+    main()